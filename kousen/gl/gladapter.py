@@ -3,11 +3,35 @@
 This module provides the base components of OpenGL node adapters.
 """
 
-class GLNodeAdapter(object):
+class GLNodeAdapterType(type):
+    """
+    The GLNodeAdapterType metaclass registers every GLNodeAdapter-derived class that declares the node class it adapts.
+    """
+    def __init__(cls, name, bases, attrs):
+        """
+        Constructor.
+
+        @param name  The name of the new class.
+        @param bases The base classes of the new class.
+        @param attrs The attribute dictionary of the new class.
+        """
+        super(GLNodeAdapterType, cls).__init__(name, bases, attrs)
+        if attrs.get('__node__', None):
+            cls.register(cls)
+
+class GLNodeAdapter(object, metaclass=GLNodeAdapterType):
     """
     The GLNodeAdapter implements an OpenGL adapter interface for an node.
     """
-    _nodemap = {}
+    _registry = {}
+    _dispatch = {}
+    _adapters = {}
+    # Incremented whenever the dispatch table is invalidated (e.g. a GLRenderList recompiles on a change).
+    _generation = 0
+
+    # True if the adapter paints by itself (i.e. through its render method) in a GLRenderList; otherwise the subtree
+    # of the node is painted through the paint_enter and paint_exit methods.
+    __compiled__ = False
 
     def __init__(self, node):
         """
@@ -21,23 +45,96 @@ class GLNodeAdapter(object):
     @classmethod
     def adapter(cls, node):
         """
-        Returns the best matched GLNodeAdapter-derived class for a node.
+        Returns the cached GLNodeAdapter instance for a node; the instance is created on first request, and replaced
+        if the adapter class resolved for the node changed (e.g. after a registration).
+
+        @param node The node to adapt.
+        @returns    The GLNodeAdapter-derived instance adapting the node.
+        """
+        adapter = cls._adapters.get(node, None)
+        adapterclass = cls.resolve(node)
+        if adapter is None or adapter.__class__ is not adapterclass:
+            if adapter is not None:
+                adapter.cleanup()
+            adapter = cls._adapters[node] = adapterclass(node)
+        return adapter
+
+    @classmethod
+    def resolve(cls, node):
         """
-        nodename = node.__class__.__name__
-        adapter = cls._nodemap.get(nodename, None)
+        Returns the best matched GLNodeAdapter-derived class for a node.
 
-        if not adapter:
-            # If there is no adapter, find an adapter for the node by finding
-            # the first matching adapter in a traversal of the node's class
-            # hierarchy.
-            for subnodename in [c.__name__ for c in node.baseclasses()]:
-                adapter = next((c for c in cls.subclasses() if c.__node__.__name__ == subnodename), None)
-                if adapter:
-                    cls._nodemap[nodename] = adapter
-                    break
+        @param node The node to adapt.
+        @returns    The GLNodeAdapter-derived class registered for the closest class in the node's class hierarchy.
+        """
+        nodeclass = node.__class__
+        try:
+            return cls._dispatch[nodeclass]
+        except KeyError:
+            pass
+
+        # Find the first registered adapter in a traversal of the node's class
+        # hierarchy (i.e. the method resolution order).
+        adapter = next((cls._registry[c] for c in nodeclass.mro() if c in cls._registry), None)
         if not adapter:
             raise Exception("Unable to resolve an adapter for node {0}".format(str(node)))
-        return adapter(node)
+        cls._dispatch[nodeclass] = adapter
+        return adapter
+
+    @classmethod
+    def register(cls, adapter):
+        """
+        Registers a GLNodeAdapter-derived class for the node class declared in its __node__ attribute.
+
+        The registration replaces any previous adapter of the same node class and invalidates the dispatch table.
+
+        @param adapter The GLNodeAdapter-derived class.
+        """
+        cls._registry[adapter.__node__] = adapter
+        cls.invalidate()
+
+    @classmethod
+    def invalidate(cls):
+        """
+        Invalidates the node class dispatch table; the cached adapters whose class changed are replaced on their next
+        request, when the OpenGL context is current.
+        """
+        cls._dispatch.clear()
+        cls._generation += 1
+
+    @classmethod
+    def generation(cls):
+        """
+        Queries the generation of the dispatch table.
+
+        @returns A number incremented whenever the dispatch table is invalidated.
+        """
+        return cls._generation
+
+    @classmethod
+    def release(cls, node):
+        """
+        Releases the cached adapters of a node and all of its children.
+
+        @param node The node that is no longer adapted (e.g. removed from the scene graph).
+        """
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            adapter = cls._adapters.pop(node, None)
+            if adapter is not None:
+                adapter.cleanup()
+            stack.extend(node.children())
+
+    @classmethod
+    def releaseAll(cls):
+        """
+        Releases all cached adapters (e.g. when the OpenGL context changes).
+        """
+        # An adapter may release other adapters on cleanup (e.g. the adapters of a scatter's prototype).
+        while cls._adapters:
+            node, adapter = cls._adapters.popitem()
+            adapter.cleanup()
 
     @classmethod
     def subclasses(cls, recursive = True):
@@ -93,4 +190,32 @@ class GLNodeAdapter(object):
         """
         Exit OpenGL Render operation.  Execute any logic required during OpenGL redering but after processing additional nodes.
         """
-        pass
\ No newline at end of file
+        pass
+
+    def render(self):
+        """
+        Compiled OpenGL Render operation.  Returns the drawing data of the node for a GLRenderList; only called if the adapter is compiled.
+
+        The data is regenerated whenever the node changes and is drawn with the world matrix loaded in the model view
+        matrix and the color set, within the render state.
+
+        @returns A tuple of the Matrix4x4 world matrix, the geometry (an object implementing the call() method), the
+                 (r, g, b, a) color (None if the geometry carries its own colors) and the GLRenderState; None if the node
+                 draws nothing by itself.
+        """
+        return None
+
+    def instanced(self):
+        """
+        Compiled OpenGL Render operation.  Returns the mesh buffer drawing the same image as the render() geometry, for
+        the instanced drawing of the nodes sharing it; only called if the adapter is compiled.
+
+        @returns A GLMeshBuffer; None if the node cannot be drawn instanced.
+        """
+        return None
+
+    def cleanup(self):
+        """
+        Releases any OpenGL resources held by the adapter.  Called once the adapter is removed from the adapter cache.
+        """
+        pass
@@ -3,6 +3,7 @@
 This module provides class defintions of OpenGL camera node adapters.
 """
 from OpenGL import GL
+from kousen.gl.glutil import GLState
 from kousen.scenegraph import CameraNode
 from kousen.gl.gladapter import GLNodeAdapter
 
@@ -39,8 +40,8 @@ class GLCameraAdapter(GLNodeAdapter):
         zfar = self._node.zfar
         matrix = self._node.projectionMatrix()            
 
-        GL.glMatrixMode(GL.GL_PROJECTION)
+        GLState.setMatrixMode(GL.GL_PROJECTION)
         GL.glLoadIdentity()
         GL.glFrustum(viewport[0], viewport[1], viewport[2], viewport[3], znear, zfar)
-        GL.glMultMatrixf(matrix.data())
+        GL.glMultMatrixf(matrix.buffer())
 
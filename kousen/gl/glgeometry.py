@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+This module provides the OpenGL representation of tessellated meshes.
+"""
+import numpy
+from OpenGL import GL
+from kousen.gl.glutil import GLClientAttribScope, GLDisplayList
+
+class GLMeshBuffer(object):
+    """
+    The GLMeshBuffer holds an indexed triangle mesh in vertex buffer objects (e.g. for instanced drawing).
+
+    The buffers are uploaded on the first bind, so a GLMeshBuffer can be created without a current OpenGL context.
+    """
+    def __init__(self, key, vertices, indices, colors=None):
+        """
+        Constructor.
+
+        @param key      The key identifying the mesh.
+        @param vertices An (N,3) array of vertex positions.
+        @param indices  An (M,3) array of triangle vertex indices.
+        @param colors   An (N,3) array of vertex colors; None if the mesh has no colors.
+        """
+        super(GLMeshBuffer, self).__init__()
+        self.key = key
+        self._vertices = numpy.ascontiguousarray(vertices, dtype=numpy.float32)
+        self._indices = numpy.ascontiguousarray(indices, dtype=numpy.uint32)
+        self._colors = numpy.ascontiguousarray(colors, dtype=numpy.float32) if colors is not None else None
+        self._buffers = None
+
+    def __len__(self):
+        """
+        The len operator.
+
+        @returns The number of vertex indices (i.e. three per triangle).
+        """
+        return self._indices.size
+
+    def hasColors(self):
+        """
+        Queries if the mesh has vertex colors.
+
+        @returns True if the mesh has vertex colors; False otherwise.
+        """
+        return self._colors is not None
+
+    def _upload(self, target, data):
+        """
+        Internal method to upload an array into a new buffer object.
+
+        @returns The buffer object id.
+        """
+        buffer = GL.glGenBuffers(1)
+        GL.glBindBuffer(target, buffer)
+        GL.glBufferData(target, data.nbytes, data, GL.GL_STATIC_DRAW)
+        GL.glBindBuffer(target, 0)
+        return buffer
+
+    def bind(self):
+        """
+        Binds the buffers as the vertex (and color) arrays and the element array; the client states must be saved by the caller.
+        """
+        if self._buffers is None:
+            self._buffers = (
+                self._upload(GL.GL_ARRAY_BUFFER, self._vertices),
+                self._upload(GL.GL_ELEMENT_ARRAY_BUFFER, self._indices),
+                self._upload(GL.GL_ARRAY_BUFFER, self._colors) if self._colors is not None else 0)
+        vertices, indices, colors = self._buffers
+        GL.glEnableClientState(GL.GL_VERTEX_ARRAY)
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, vertices)
+        GL.glVertexPointer(3, GL.GL_FLOAT, 0, None)
+        if colors:
+            GL.glEnableClientState(GL.GL_COLOR_ARRAY)
+            GL.glBindBuffer(GL.GL_ARRAY_BUFFER, colors)
+            GL.glColorPointer(3, GL.GL_FLOAT, 0, None)
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, 0)
+        GL.glBindBuffer(GL.GL_ELEMENT_ARRAY_BUFFER, indices)
+
+    def unbind(self):
+        """
+        Unbinds the element array.
+        """
+        GL.glBindBuffer(GL.GL_ELEMENT_ARRAY_BUFFER, 0)
+
+    def release(self):
+        """
+        Deletes the buffers.
+        """
+        if self._buffers is not None:
+            buffers = [buffer for buffer in self._buffers if buffer]
+            GL.glDeleteBuffers(len(buffers), buffers)
+        self._buffers = None
+
+class GLGeometryCache(object):
+    """
+    The GLGeometryCache shares one recorded display list (and one GLMeshBuffer) per tessellated mesh between all node adapters.
+    """
+    _geometries = {}
+    _buffers = {}
+
+    @classmethod
+    def geometry(cls, mesh):
+        """
+        Returns the display list of a mesh; the display list is recorded on first request.
+
+        @param mesh The kousen.math.Mesh to draw.
+        @returns    The GLDisplayList drawing the mesh.
+        """
+        displaylist = cls._geometries.get(mesh.key, None)
+        if displaylist is None:
+            displaylist = cls._geometries[mesh.key] = GLDisplayList()
+        if not displaylist.isValid(mesh.key):
+            with displaylist.record(mesh.key):
+                with GLClientAttribScope(GL.GL_CLIENT_VERTEX_ARRAY_BIT):
+                    GL.glEnableClientState(GL.GL_VERTEX_ARRAY)
+                    GL.glEnableClientState(GL.GL_NORMAL_ARRAY)
+                    GL.glVertexPointer(3, GL.GL_FLOAT, 0, mesh.vertices)
+                    GL.glNormalPointer(GL.GL_FLOAT, 0, mesh.normals)
+                    GL.glDrawElements(GL.GL_TRIANGLES, mesh.indices.size, GL.GL_UNSIGNED_INT, mesh.indices)
+        return displaylist
+
+    @classmethod
+    def buffer(cls, key, generator):
+        """
+        Returns a shared GLMeshBuffer; the buffer is created on first request.
+
+        @param key       The key identifying the mesh.
+        @param generator A callable returning the (vertices, indices, colors) arrays of the mesh.
+        @returns         The GLMeshBuffer of the mesh.
+        """
+        buffer = cls._buffers.get(key, None)
+        if buffer is None:
+            vertices, indices, colors = generator()
+            buffer = cls._buffers[key] = GLMeshBuffer(key, vertices, indices, colors)
+        return buffer
+
+    @classmethod
+    def meshBuffer(cls, mesh):
+        """
+        Returns the shared GLMeshBuffer of a mesh.
+
+        @param mesh The kousen.math.Mesh to draw.
+        @returns    The GLMeshBuffer of the mesh.
+        """
+        return cls.buffer(mesh.key, lambda: (mesh.vertices, mesh.indices, None))
+
+    @classmethod
+    def releaseAll(cls):
+        """
+        Releases all display lists and mesh buffers (e.g. when the OpenGL context changes).
+        """
+        for displaylist in cls._geometries.values():
+            displaylist.release()
+        cls._geometries.clear()
+        for buffer in cls._buffers.values():
+            buffer.release()
+        cls._buffers.clear()
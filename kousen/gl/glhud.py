@@ -3,6 +3,7 @@
 This module provides class defintions of OpenGL HUD node adapters.
 """
 from OpenGL import GL
+from kousen.gl.glutil import GLState
 from kousen.scenegraph import CameraHUDNode
 from kousen.gl.gladapter import GLNodeAdapter
 
@@ -35,12 +36,12 @@ class GLCameraHUDAdapter(GLNodeAdapter):
         Implements the GLNodeAdapter's paint_enter method for an OpenGL Render operation.
         """
         if self._node.camera:
-            GL.glPushAttrib(GL.GL_VIEWPORT_BIT | GL.GL_ENABLE_BIT)
-            GL.glMatrixMode(GL.GL_PROJECTION)
+            GLState.pushAttrib(GL.GL_VIEWPORT_BIT | GL.GL_ENABLE_BIT)
+            GLState.setMatrixMode(GL.GL_PROJECTION)
             GL.glPushMatrix();
             GL.glLoadIdentity()
             
-            GL.glDisable(GL.GL_LIGHTING)
+            GLState.disable(GL.GL_LIGHTING)
             GL.glViewport(10,10,80,80)               
             GL.glOrtho(-0.5,0.5,-0.5,0.5,-1.0, 1.0)
 
@@ -49,19 +50,19 @@ class GLCameraHUDAdapter(GLNodeAdapter):
             m[12] = 0.0
             m[13] = 0.0
             m[14] = 0.0                
-            GL.glMatrixMode(GL.GL_MODELVIEW)
+            GLState.setMatrixMode(GL.GL_MODELVIEW)
             GL.glPushMatrix();
-            GL.glLoadMatrixf(m.data());
+            GL.glLoadMatrixf(m.buffer());
 
     def paint_exit(self):
         """
         Implements the GLNodeAdapter's paint_exit method for an OpenGL Render operation.
         """
         if self._node.camera:
-            GL.glMatrixMode(GL.GL_MODELVIEW)
+            GLState.setMatrixMode(GL.GL_MODELVIEW)
             GL.glPopMatrix();
         
-            GL.glMatrixMode(GL.GL_PROJECTION)
+            GLState.setMatrixMode(GL.GL_PROJECTION)
             GL.glPopMatrix();
 
-            GL.glPopAttrib()
+            GLState.popAttrib()
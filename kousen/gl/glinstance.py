@@ -0,0 +1,313 @@
+# -*- coding: utf-8 -*-
+"""
+This module provides the hardware instanced drawing of repeated geometry.
+
+A GLInstanceBatch holds the per-instance world matrices and colors of the render records sharing a GLMeshBuffer in
+one buffer object; the GLInstancer draws the whole batch with one instanced draw call through a small GLSL 1.20
+program reading the instance data from vertex attributes advanced once per instance.  Only the compatibility profile
+entry points of GL_ARB_draw_instanced and GL_ARB_instanced_arrays (core in OpenGL 3.1 and 3.3) are required, which
+Mesa's software rasterizers (e.g. llvmpipe) expose; without them the records are drawn one by one.
+"""
+import ctypes
+import numpy
+from OpenGL import GL
+from kousen.gl.glutil import GLState, GLClientAttribScope
+
+class GLInstancer(object):
+    """
+    The GLInstancer draws GLInstanceBatches with the instancing program of the current OpenGL context.
+    """
+    # Set to False to draw every record one by one (e.g. to compare the output).
+    enabled = True
+    # The minimum number of records sharing a geometry to draw them instanced.
+    threshold = 8
+
+    # The attribute locations of the instance matrix columns and color; the location 0 aliases gl_Vertex.
+    __matrix__ = 1
+    __color__  = 5
+    # The instance data: the 16 floats of the column major matrix followed by the 4 floats of the color.
+    __stride__ = 20 * 4
+
+    __vertexshader__ = """
+        #version 120
+        attribute vec4 instanceColumn0;
+        attribute vec4 instanceColumn1;
+        attribute vec4 instanceColumn2;
+        attribute vec4 instanceColumn3;
+        attribute vec4 instanceColor;
+        void main()
+        {
+            mat4 world = mat4(instanceColumn0, instanceColumn1, instanceColumn2, instanceColumn3);
+            gl_Position = gl_ModelViewProjectionMatrix * (world * gl_Vertex);
+            gl_FrontColor = gl_Color * instanceColor;
+        }
+        """
+
+    __fragmentshader__ = """
+        #version 120
+        void main()
+        {
+            gl_FragColor = gl_Color;
+        }
+        """
+
+    _program = None
+    _drawElementsInstanced = None
+    _vertexAttribDivisor = None
+    _garbage = []
+
+    @classmethod
+    def _resolve(cls, name, extension):
+        """
+        Internal method to resolve an OpenGL entry point, from the core profile or else from an ARB extension.
+
+        @param name      The name of the core entry point.
+        @param extension The module of the ARB extension.
+        @returns         The entry point if it is available in the current context; None otherwise.
+        """
+        candidates = [getattr(GL, name, None)]
+        try:
+            module = __import__('OpenGL.GL.ARB.' + extension, fromlist=[name + 'ARB'])
+            candidates.append(getattr(module, name + 'ARB', None))
+        except ImportError:
+            pass
+        for function in candidates:
+            try:
+                if function is not None and bool(function):
+                    return function
+            except Exception:
+                pass
+        return None
+
+    @classmethod
+    def _compile(cls, shadertype, source):
+        """
+        Internal method to compile a shader.
+
+        @returns The shader object id; None if the compilation failed.
+        """
+        shader = GL.glCreateShader(shadertype)
+        GL.glShaderSource(shader, source)
+        GL.glCompileShader(shader)
+        if not GL.glGetShaderiv(shader, GL.GL_COMPILE_STATUS):
+            GL.glDeleteShader(shader)
+            return None
+        return shader
+
+    @classmethod
+    def _link(cls):
+        """
+        Internal method to build the instancing program.
+
+        @returns The program object id; 0 if the program could not be built.
+        """
+        try:
+            vertex = cls._compile(GL.GL_VERTEX_SHADER, cls.__vertexshader__)
+            fragment = cls._compile(GL.GL_FRAGMENT_SHADER, cls.__fragmentshader__)
+            if vertex is None or fragment is None:
+                return 0
+            program = GL.glCreateProgram()
+            GL.glAttachShader(program, vertex)
+            GL.glAttachShader(program, fragment)
+            for column in range(4):
+                GL.glBindAttribLocation(program, cls.__matrix__ + column, 'instanceColumn{0}'.format(column))
+            GL.glBindAttribLocation(program, cls.__color__, 'instanceColor')
+            GL.glLinkProgram(program)
+            GL.glDeleteShader(vertex)
+            GL.glDeleteShader(fragment)
+            if not GL.glGetProgramiv(program, GL.GL_LINK_STATUS):
+                GL.glDeleteProgram(program)
+                return 0
+            return program
+        except Exception:
+            # e.g. an OpenGL 1.x context without shader entry points.
+            return 0
+
+    @classmethod
+    def supported(cls):
+        """
+        Queries if the current OpenGL context supports instanced drawing; the support is detected once per context.
+
+        @returns True if the batches can be drawn instanced; False otherwise.
+        """
+        if not cls.enabled:
+            return False
+        if cls._program is None:
+            cls._drawElementsInstanced = cls._resolve('glDrawElementsInstanced', 'draw_instanced')
+            cls._vertexAttribDivisor = cls._resolve('glVertexAttribDivisor', 'instanced_arrays')
+            supported = cls._drawElementsInstanced is not None and cls._vertexAttribDivisor is not None
+            cls._program = cls._link() if supported else 0
+        return bool(cls._program)
+
+    @classmethod
+    def discard(cls, buffer):
+        """
+        Queues a buffer object for deletion; the buffers are deleted on the next draw, with the OpenGL context current.
+
+        @param buffer The buffer object id.
+        """
+        cls._garbage.append(buffer)
+
+    @classmethod
+    def _collect(cls):
+        """
+        Internal method to delete the queued buffer objects.
+        """
+        if cls._garbage:
+            GL.glDeleteBuffers(len(cls._garbage), cls._garbage)
+            del cls._garbage[:]
+
+    @classmethod
+    def draw(cls, mesh, buffer, count):
+        """
+        Draws instances of a mesh.
+
+        @param mesh   The GLMeshBuffer of the mesh.
+        @param buffer The buffer object holding the instance data.
+        @param count  The number of instances.
+        """
+        cls._collect()
+        GL.glUseProgram(cls._program)
+        # The instance matrices are world matrices.
+        GLState.setMatrixMode(GL.GL_MODELVIEW)
+        GL.glLoadIdentity()
+        if not mesh.hasColors():
+            GLState.setColor((1.0, 1.0, 1.0, 1.0))
+        with GLClientAttribScope(GL.GL_CLIENT_VERTEX_ARRAY_BIT):
+            mesh.bind()
+            GL.glBindBuffer(GL.GL_ARRAY_BUFFER, buffer)
+            locations = [cls.__matrix__ + column for column in range(4)] + [cls.__color__]
+            for offset, location in enumerate(locations):
+                GL.glEnableVertexAttribArray(location)
+                GL.glVertexAttribPointer(location, 4, GL.GL_FLOAT, GL.GL_FALSE, cls.__stride__, ctypes.c_void_p(offset * 16))
+                cls._vertexAttribDivisor(location, 1)
+            GL.glBindBuffer(GL.GL_ARRAY_BUFFER, 0)
+
+            cls._drawElementsInstanced(GL.GL_TRIANGLES, len(mesh), GL.GL_UNSIGNED_INT, None, count)
+
+            for location in locations:
+                cls._vertexAttribDivisor(location, 0)
+                GL.glDisableVertexAttribArray(location)
+            mesh.unbind()
+        GL.glUseProgram(0)
+        if mesh.hasColors():
+            # The color array leaves the current color undefined.
+            GLState.invalidateColor()
+
+    @classmethod
+    def releaseAll(cls):
+        """
+        Releases the program and the queued buffers (e.g. when the OpenGL context changes); the support is detected again.
+        """
+        cls._collect()
+        if cls._program:
+            GL.glDeleteProgram(cls._program)
+        cls._program = None
+
+class GLInstanceBatch(object):
+    """
+    The GLInstanceBatch holds the instance data of the render records sharing a mesh and a render state.
+    """
+    def __init__(self, mesh, state, rows, matrices, colors):
+        """
+        Constructor.
+
+        @param mesh     The shared GLMeshBuffer.
+        @param state    The shared GLRenderState.
+        @param rows     The positions of the records in the render list.
+        @param matrices The float32 world matrix buffers of the records.
+        @param colors   The (r, g, b, a) colors of the records (None for white).
+        """
+        super(GLInstanceBatch, self).__init__()
+        self.mesh = mesh
+        self.state = state
+        self.rows = numpy.array(rows, dtype=numpy.intp)
+        self._data = numpy.empty((len(rows), 20), dtype=numpy.float32)
+        self._data[:, :16] = matrices
+        self._data[:, 16:] = [color or (1.0, 1.0, 1.0, 1.0) for color in colors]
+        self._buffer = 0
+        # The instance data in the buffer: None if stale, True if all instances, a mask if a subset.
+        self._uploaded = None
+
+    def __len__(self):
+        """
+        The len operator.
+
+        @returns The number of instances.
+        """
+        return len(self.rows)
+
+    def update(self, index, matrix, color):
+        """
+        Updates the instance data of a record (e.g. after a transformation change).
+
+        @param index  The position of the record in the batch.
+        @param matrix The float32 world matrix buffer.
+        @param color  The (r, g, b, a) color (None for white).
+        """
+        self._data[index, :16] = matrix
+        self._data[index, 16:] = color or (1.0, 1.0, 1.0, 1.0)
+        self._uploaded = None
+
+    def setMatrices(self, matrices):
+        """
+        Updates the world matrices of every record (e.g. after a transformation change of their common parent).
+
+        @param matrices The (N,16) float32 world matrix buffers of the records.
+        """
+        self._data[:, :16] = matrices
+        self._uploaded = None
+
+    def setColor(self, color):
+        """
+        Updates the color of every record.
+
+        @param color The (r, g, b, a) color (None for white).
+        """
+        self._data[:, 16:] = color or (1.0, 1.0, 1.0, 1.0)
+        self._uploaded = None
+
+    def draw(self, visible=None):
+        """
+        Draws the visible instances with one instanced draw call; the buffer is only uploaded when its instances changed.
+
+        @param visible A boolean array of the visible records of the render list; None if every record is visible.
+        @returns       The number of drawn instances.
+        """
+        mask = visible[self.rows] if visible is not None else None
+        if mask is not None and mask.all():
+            mask = None
+        count = len(self.rows) if mask is None else int(mask.sum())
+        if not count:
+            return 0
+
+        if not self._buffer:
+            self._buffer = GL.glGenBuffers(1)
+        if mask is None:
+            if self._uploaded is not True:
+                self._upload(self._data)
+                self._uploaded = True
+        elif self._uploaded is None or self._uploaded is True or not numpy.array_equal(self._uploaded, mask):
+            self._upload(self._data[mask])
+            self._uploaded = mask
+        GLInstancer.draw(self.mesh, self._buffer, count)
+        return count
+
+    def _upload(self, data):
+        """
+        Internal method to upload the instance data.
+
+        @param data The (N,20) float32 array of the instance data.
+        """
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self._buffer)
+        GL.glBufferData(GL.GL_ARRAY_BUFFER, data.nbytes, numpy.ascontiguousarray(data), GL.GL_DYNAMIC_DRAW)
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, 0)
+
+    def release(self):
+        """
+        Releases the buffer; the buffer is deleted by the GLInstancer on its next draw.
+        """
+        if self._buffer:
+            GLInstancer.discard(self._buffer)
+        self._buffer = 0
+        self._uploaded = None
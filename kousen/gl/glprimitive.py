@@ -5,8 +5,10 @@ This module provides class defintions of OpenGL primitive node adapters.
 import array
 
 from OpenGL import GL
-from kousen.gl.glutil import GLScope
+from kousen.gl.glutil import GLState, GLScope, GLClientAttribScope, GLDisplayList
+from kousen.gl.glgeometry import GLGeometryCache
 from kousen.gl.gladapter import GLNodeAdapter
+from kousen.gl.glrender import GLRenderState
 from kousen.scenegraph import CubeNode, GridNode
 
 class GLColorCubeAdapter(GLNodeAdapter):
@@ -15,6 +17,17 @@ class GLColorCubeAdapter(GLNodeAdapter):
     """
     # Additional Meta Information
     __node__ = CubeNode
+    __compiled__ = True
+
+    # The corners of the cube, scaled by half the size of the node.
+    __corners = [-1 , -1 ,  1 ,
+                 -1 ,  1 ,  1 ,
+                  1 ,  1 ,  1 ,
+                  1 , -1 ,  1 ,
+                 -1 , -1 , -1 ,
+                 -1 ,  1 , -1 ,
+                  1 ,  1 , -1 ,
+                  1 , -1 , -1]
 
     def __init__(self, node):
         """
@@ -23,15 +36,9 @@ class GLColorCubeAdapter(GLNodeAdapter):
         @param node The adaptable node.
         """
         super(GLColorCubeAdapter, self).__init__(node)
-        self.__vertices   = array.array('f' , [ i * (node.size / 2) for i in
-                                              [-1 , -1 ,  1 ,
-                                               -1 ,  1 ,  1 ,
-                                                1 ,  1 ,  1 ,
-                                                1 , -1 ,  1 ,
-                                               -1 , -1 , -1 ,
-                                               -1 ,  1 , -1 ,
-                                                1 ,  1 , -1 ,
-                                                1 , -1 , -1] ] )
+        self.__geometry = GLDisplayList()
+        self.__size = None
+        self.__vertices = None
         self.__colors     = array.array('f' , [ 0 ,  0 ,  0 ,
                                                 1 ,  0 ,  1 ,
                                                 1 ,  1 ,  0 ,
@@ -49,32 +56,86 @@ class GLColorCubeAdapter(GLNodeAdapter):
                                                 6 ,  7 ,  0 ,
                                                 1 ,  5 ,  4] )
 
+    def _resize(self):
+        """
+        Internal method to regenerate the vertices when the size of the node changed.
+        """
+        if self.__size != self._node.size:
+            self.__size = self._node.size
+            self.__vertices = array.array('f', [ i * (self.__size / 2) for i in self.__corners ])
+
     def paint_enter(self):
         """
         Implements the GLNodeAdapter's paint_enter method for an OpenGL Render operation.
         """
-        GL.glPushAttrib(GL.GL_ENABLE_BIT | GL.GL_DEPTH_BUFFER_BIT | GL.GL_LINE_BIT | GL.GL_CURRENT_BIT)
-        GL.glDisable( GL.GL_LIGHTING )
+        self._resize()
+        GLState.pushAttrib(GL.GL_ENABLE_BIT | GL.GL_DEPTH_BUFFER_BIT | GL.GL_LINE_BIT | GL.GL_CURRENT_BIT)
+        GLState.disable(GL.GL_LIGHTING)
         GL.glPushClientAttrib(GL.GL_CLIENT_VERTEX_ARRAY_BIT)
         GL.glEnableClientState( GL.GL_COLOR_ARRAY )
         GL.glEnableClientState( GL.GL_VERTEX_ARRAY )
-        GL.glMatrixMode(GL.GL_MODELVIEW)
+        GLState.setMatrixMode(GL.GL_MODELVIEW)
         GL.glPushMatrix();
-        GL.glMultMatrixf(self._node.matrix().data())
+        GL.glMultMatrixf(self._node.matrix().buffer())
 
         GL.glColorPointer( 3, GL.GL_FLOAT, 0, self.__colors.tostring() )
         GL.glVertexPointer( 3, GL.GL_FLOAT, 0, self.__vertices.tostring() )
         GL.glDrawElements( GL.GL_QUADS, 24, GL.GL_UNSIGNED_BYTE, self.__colorindex.tostring( ) )
+        # The color array leaves the current color undefined.
+        GLState.invalidateColor()
 
     def paint_exit(self):
         """
         Implements the GLNodeAdapter's paint_exit method for an OpenGL Render operation.
         """
-        GL.glMatrixMode(GL.GL_MODELVIEW)
+        GLState.setMatrixMode(GL.GL_MODELVIEW)
         GL.glPopMatrix();
 
         GL.glPopClientAttrib();
-        GL.glPopAttrib()
+        GLState.popAttrib()
+
+    def cleanup(self):
+        """
+        Implements the GLNodeAdapter's cleanup method; deletes the geometry display list.
+        """
+        self.__geometry.release()
+
+    def render(self):
+        """
+        Implements the GLNodeAdapter's render method for a compiled OpenGL Render operation.
+        """
+        # The vertex arrays are dereferenced when the display list is recorded.
+        self._resize()
+        if not self.__geometry.isValid(self.__size):
+            with self.__geometry.record(self.__size):
+                with GLClientAttribScope(GL.GL_CLIENT_VERTEX_ARRAY_BIT):
+                    GL.glEnableClientState( GL.GL_COLOR_ARRAY )
+                    GL.glEnableClientState( GL.GL_VERTEX_ARRAY )
+                    GL.glColorPointer( 3, GL.GL_FLOAT, 0, self.__colors.tostring() )
+                    GL.glVertexPointer( 3, GL.GL_FLOAT, 0, self.__vertices.tostring() )
+                    GL.glDrawElements( GL.GL_QUADS, 24, GL.GL_UNSIGNED_BYTE, self.__colorindex.tostring( ) )
+        return (self._node.worldMatrix(), self.__geometry, None, GLRenderState.UNLIT)
+
+    def _triangles(self):
+        """
+        Internal method to generate the color cube as an indexed triangle mesh.
+
+        @returns A tuple of the vertices, the triangle indices and the vertex colors.
+        """
+        vertices = [self.__vertices[i:i + 3] for i in range(0, len(self.__vertices), 3)]
+        colors = [self.__colors[i:i + 3] for i in range(0, len(self.__colors), 3)]
+        triangles = []
+        for i in range(0, len(self.__colorindex), 4):
+            a, b, c, d = self.__colorindex[i:i + 4]
+            triangles.extend([(a, b, c), (a, c, d)])
+        return vertices, triangles, colors
+
+    def instanced(self):
+        """
+        Implements the GLNodeAdapter's instanced method for a compiled OpenGL Render operation.
+        """
+        self._resize()
+        return GLGeometryCache.buffer(('colorcube', self.__size), self._triangles)
 
 class GLGridAdapter(GLNodeAdapter):
     """
@@ -82,6 +143,7 @@ class GLGridAdapter(GLNodeAdapter):
     """
     # Additional Meta Information
     __node__ = GridNode
+    __compiled__ = True
 
     def __init__(self, node):
         """
@@ -90,40 +152,68 @@ class GLGridAdapter(GLNodeAdapter):
         @param node The adaptable node.
         """
         super(GLGridAdapter, self).__init__(node)
+        self.__geometry = GLDisplayList()
+
+    def cleanup(self):
+        """
+        Implements the GLNodeAdapter's cleanup method; deletes the geometry display list.
+        """
+        self.__geometry.release()
 
     def paint_enter(self):
         """
         Implements the GLNodeAdapter's paint_enter method for an OpenGL Render operation.
         """
-        GL.glPushAttrib(GL.GL_ENABLE_BIT | GL.GL_LIGHTING_BIT | GL.GL_LINE_BIT | GL.GL_CURRENT_BIT)
-        GL.glMatrixMode(GL.GL_MODELVIEW)
+        GLState.pushAttrib(GL.GL_ENABLE_BIT | GL.GL_LIGHTING_BIT | GL.GL_LINE_BIT | GL.GL_CURRENT_BIT)
+        GLState.setMatrixMode(GL.GL_MODELVIEW)
         GL.glPushMatrix();
-        GL.glMultMatrixf(self._node.matrix().data())
+        GL.glMultMatrixf(self._node.matrix().buffer())
 
-        GL.glEnable( GL.GL_COLOR_MATERIAL )
-        GL.glDisable( GL.GL_LIGHTING )
+        GLState.enable(GL.GL_COLOR_MATERIAL)
+        GLState.disable(GL.GL_LIGHTING)
         #GL.glLineWidth(3)
-        with GLScope( GL.GL_LINES ):
-            s = self._node.spacing
-            c = self._node.count/2*s
-            i = -c
-            while i <= c:
-                GL.glColor(0.5, 0.5, 0.5)
-                GL.glVertex3f(  i, 0.0,  -c);
-                GL.glVertex3f(  i, 0.0,   c)
-                GL.glVertex3f(  c, 0.0,   i);
-                GL.glVertex3f( -c, 0.0,   i);
-                i += s
-            GL.glColor(0.0, 0.0, 0.0)
-            GL.glVertex3f(0.0, 0.0,   -c);
-            GL.glVertex3f(0.0, 0.0,    c);
-            GL.glVertex3f( -c, 0.0,  0.0);
-            GL.glVertex3f(  c, 0.0,  0.0)
+
+        self._record()
+        self.__geometry.call()
+        # The grid lines are drawn with their own colors.
+        GLState.invalidateColor()
+
+    def _record(self):
+        """
+        Internal method to record the grid lines; they are only re-recorded when the grid dimensions change.
+        """
+        s = self._node.spacing
+        n = self._node.count
+        key = (s, n)
+        if not self.__geometry.isValid(key):
+            with self.__geometry.record(key):
+                with GLScope( GL.GL_LINES ):
+                    c = n/2*s
+                    i = -c
+                    while i <= c:
+                        GL.glColor(0.5, 0.5, 0.5)
+                        GL.glVertex3f(  i, 0.0,  -c);
+                        GL.glVertex3f(  i, 0.0,   c)
+                        GL.glVertex3f(  c, 0.0,   i);
+                        GL.glVertex3f( -c, 0.0,   i);
+                        i += s
+                    GL.glColor(0.0, 0.0, 0.0)
+                    GL.glVertex3f(0.0, 0.0,   -c);
+                    GL.glVertex3f(0.0, 0.0,    c);
+                    GL.glVertex3f( -c, 0.0,  0.0);
+                    GL.glVertex3f(  c, 0.0,  0.0)
 
     def paint_exit(self):
         """
         Implements the GLNodeAdapter's paint_exit method for an OpenGL Render operation.
         """
-        GL.glMatrixMode(GL.GL_MODELVIEW)
+        GLState.setMatrixMode(GL.GL_MODELVIEW)
         GL.glPopMatrix();
-        GL.glPopAttrib()
+        GLState.popAttrib()
+
+    def render(self):
+        """
+        Implements the GLNodeAdapter's render method for a compiled OpenGL Render operation.
+        """
+        self._record()
+        return (self._node.worldMatrix(), self.__geometry, None, GLRenderState.UNLIT)
@@ -0,0 +1,544 @@
+# -*- coding: utf-8 -*-
+"""
+This module provides the compiled render list of a scene graph.
+
+The GLRenderList flattens the scene graph into a list of render records, in scene graph order: each record holds the
+world matrix buffer, the geometry handle, the color and the render state of a node, so painting a frame is a loop over
+the records instead of a traversal of the scene graph.  The list is compiled when the structure of the scene graph
+changes (i.e. on rowsInserted and rowsRemoved) and its records are patched in place when the data of their nodes
+changes (i.e. on dataChanged).
+
+The records are submitted sorted by their state key (i.e. the render state, the geometry and the color) so the
+consecutive records with the same key share one state setup; the sort is stable and never moves a record across a
+fallback record, so the scene graph order of the fallback records (e.g. a camera setting the projection) is kept.
+
+The runs of sorted records sharing a render state and a mesh buffer (see GLNodeAdapter.instanced) are collected into
+GLInstanceBatches and drawn with one instanced draw call each; if the OpenGL context does not support instancing, the
+records of the batches are drawn one by one.
+
+The nodes whose adapters cannot be compiled (e.g. a camera or a HUD, which change the projection or draw in their own
+view space) are kept as fallback records; their subtrees are painted by a GLPaintVisitor.
+"""
+import itertools
+import numpy
+from OpenGL import GL
+from kousen.gl.gladapter import GLNodeAdapter
+from kousen.gl.glinstance import GLInstancer, GLInstanceBatch
+from kousen.gl.glutil import GLState, Scope
+from kousen.gl.gltraversal import GLPaintVisitor
+from kousen.math import Frustum
+from kousen.scenegraph.scene import TraversalEvent, walk
+
+class GLRenderState(Scope):
+    """
+    GLRenderState provides a context manager for the OpenGL server state shared by the render records of a kind of geometry.
+    """
+    def __init__(self, name, enable=(), disable=(), mask=GL.GL_ENABLE_BIT | GL.GL_CURRENT_BIT):
+        """
+        Constructor.
+
+        @param name    The name of the state; the states are ordered by name.
+        @param enable  The OpenGL capabilities enabled by the state.
+        @param disable The OpenGL capabilities disabled by the state.
+        @param mask    The OpenGL attribute mask saved on entering and restored on exiting the state.
+        """
+        super(GLRenderState, self).__init__()
+        self.name = name
+        self._enable = tuple(enable)
+        self._disable = tuple(disable)
+        self._mask = mask
+
+    def __repr__(self):
+        """
+        Generates the "official" string representation of the GLRenderState
+
+        @returns A string representation of the GLRenderState
+        """
+        return "{0}({1!r})".format(self.__class__.__name__, self.name)
+
+    def __enter__(self):
+        GLState.pushAttrib(self._mask)
+        for capability in self._enable:
+            GLState.enable(capability)
+        for capability in self._disable:
+            GLState.disable(capability)
+
+    def __exit__(self, type, value, traceback):
+        GLState.popAttrib()
+        return not type
+
+# The unit meshes are scaled by the mesh matrices, which requires the normals to be re-normalized.
+GLRenderState.SHADED = GLRenderState('shaded', enable=[GL.GL_NORMALIZE])
+# The geometry carrying its own colors (e.g. a grid or a color cube).
+GLRenderState.UNLIT = GLRenderState('unlit', enable=[GL.GL_COLOR_MATERIAL], disable=[GL.GL_LIGHTING])
+# The geometry entering the render states of its own parts (e.g. a scatter of a prototype subtree).
+GLRenderState.COMPOSITE = GLRenderState('composite')
+
+class GLRenderRecord(object):
+    """
+    GLRenderRecord provides the flattened drawing data of a node in a GLRenderList.
+    """
+    __slots__ = ('node', 'matrix', 'geometry', 'instanced', 'color', 'state', 'bounds', 'cullable')
+
+    def __init__(self, node, cullable):
+        """
+        Constructor.
+
+        @param node     The node drawn by the record.
+        @param cullable True if the node and all its ancestors are bounded in world space; False otherwise.
+        """
+        self.node = node
+        self.cullable = cullable
+        # The float32 world matrix buffer; for a fallback record, the world matrix buffer of the parent space.
+        self.matrix = None
+        # An object implementing the call() method (e.g. a GLDisplayList); None for a fallback record.
+        self.geometry = None
+        # The GLMeshBuffer drawing the geometry instanced; None if the geometry cannot be drawn instanced.
+        self.instanced = None
+        # The (r, g, b, a) color; None if the geometry carries its own colors.
+        self.color = None
+        self.state = None
+        self.bounds = None
+
+    def isFallback(self):
+        """
+        Queries if the record paints its node's subtree through a GLPaintVisitor.
+
+        @returns True if the node's adapter is not compiled; False otherwise.
+        """
+        return self.geometry is None and self.state is None
+
+    def key(self):
+        """
+        Calculates the state key of the record.
+
+        @returns A tuple of the render state name, the geometry (or mesh buffer) identity and the color.
+        """
+        return (self.state.name, id(self.instanced or self.geometry), self.color or ())
+
+class GLRenderList(object):
+    """
+    GLRenderList provides the compiled, flat render list of a scene graph model.
+    """
+    __identity__ = numpy.identity(4, dtype=numpy.float32).flatten()
+
+    def __init__(self):
+        """
+        Constructor.
+        """
+        super(GLRenderList, self).__init__()
+        self._model = None
+        self._records = None
+        self._index = {}
+        self._pending = set()
+        self._minima = None
+        self._maxima = None
+        self._cullable = None
+        self._empty = None
+        self._order = None
+        self._batches = {}
+        self._state = None
+        # The generation of the adapter dispatch table the list was compiled with.
+        self._generation = None
+        self._drawn = 0
+        self._culled = 0
+        self._transitions = 0
+        self._saved = 0
+        self._instanced = 0
+
+    def __len__(self):
+        """
+        The len operator.
+
+        @returns The number of records of the last compilation.
+        """
+        return len(self._records) if self._records else 0
+
+    @property
+    def drawn(self):
+        """
+        Convenience property for the number of records (and instances of the composite records, e.g. a scatter) drawn by the last paint.
+
+        @returns The number of drawn records.
+        """
+        return self._drawn
+
+    @property
+    def culled(self):
+        """
+        Convenience property for the number of records (and subtrees of the fallback records) culled by the last paint.
+
+        @returns The number of culled records.
+        """
+        return self._culled
+
+    @property
+    def transitions(self):
+        """
+        Convenience property for the number of state transitions (i.e. render state and color changes) issued by the last paint.
+
+        @returns The number of state transitions.
+        """
+        return self._transitions
+
+    @property
+    def saved(self):
+        """
+        Convenience property for the number of state transitions saved by the last paint, compared to a setup per record.
+
+        @returns The number of skipped state transitions.
+        """
+        return self._saved
+
+    @property
+    def instanced(self):
+        """
+        Convenience property for the number of instanced draw calls issued by the last paint.
+
+        @returns The number of drawn GLInstanceBatches (and instanced parts of the composite records).
+        """
+        return self._instanced
+
+    def setModel(self, model):
+        """
+        Sets the scene graph model compiled by the render list.
+
+        @param model An instance of AbstractSceneGraphModel; None to release the model.
+        """
+        if self._model is not None:
+            self._model.rowsInserted.disconnect(self.invalidate)
+            self._model.rowsRemoved.disconnect(self.invalidate)
+            self._model.modelReset.disconnect(self.invalidate)
+            self._model.dataChanged.disconnect(self._modelDataChanged)
+        self._model = model
+        if self._model is not None:
+            self._model.rowsInserted.connect(self.invalidate)
+            self._model.rowsRemoved.connect(self.invalidate)
+            self._model.modelReset.connect(self.invalidate)
+            self._model.dataChanged.connect(self._modelDataChanged)
+        self.invalidate()
+
+    def _modelDataChanged(self, topLeft, bottomRight):
+        """
+        Internal model data changed event handler.
+        """
+        self.patch(self._model.item(topLeft))
+
+    def invalidate(self, *args):
+        """
+        Invalidates the render list; the list is compiled again on the next paint (e.g. after a structural change).
+        """
+        self._records = None
+        self._release()
+        self._index.clear()
+        self._pending.clear()
+
+    def patch(self, item):
+        """
+        Marks the records of a subtree to be updated in place on the next paint (e.g. after a transformation or a color change).
+
+        @param item The AbstractSceneGraphItem at the root of the subtree.
+        """
+        if self._records is not None:
+            self._pending.add(item)
+
+    def _next(self, node):
+        """
+        Internal method to calculate the children compiled with a node; the subtree of a fallback node is not compiled.
+
+        @param node The current node in the compilation.
+        @returns    The list of children to compile.
+        """
+        return node.children() if GLNodeAdapter.adapter(node).__compiled__ else ()
+
+    def compile(self):
+        """
+        Compiles the scene graph into a flat list of records.
+        """
+        self._records = []
+        self._release()
+        self._index.clear()
+        self._pending.clear()
+        self._generation = GLNodeAdapter.generation()
+        if self._model is None:
+            return
+
+        root = self._model.root()
+        # The culling state of each entered node: True if the node and all its ancestors are bounded.
+        bounded = [True]
+        for event, node in walk(root, self._next):
+            if event == TraversalEvent.EXIT:
+                bounded.pop()
+                continue
+            adapter = GLNodeAdapter.adapter(node)
+            if not adapter.__compiled__:
+                self._append(GLRenderRecord(node, bounded[-1]))
+            elif node is not root:
+                record = GLRenderRecord(node, bounded[-1] and node.localBounds() is not None)
+                self._update(record)
+                if record.geometry is not None:
+                    self._append(record)
+            bounded.append(bounded[-1] and node.localBounds() is not None)
+
+        count = len(self._records)
+        self._minima = numpy.zeros((count, 3))
+        self._maxima = numpy.zeros((count, 3))
+        self._cullable = numpy.zeros(count, dtype=bool)
+        self._empty = numpy.zeros(count, dtype=bool)
+        for row, record in enumerate(self._records):
+            self._updateBounds(row, record)
+
+    def _sort(self):
+        """
+        Internal method to sort the records by their state key; the fallback records keep their position.
+
+        @returns The list of the record positions in submission order.
+        """
+        order = []
+        segment = []
+        for row, record in enumerate(self._records):
+            if record.isFallback():
+                order.extend(sorted(segment, key=lambda row: self._records[row].key()))
+                order.append(row)
+                segment = []
+            else:
+                segment.append(row)
+        order.extend(sorted(segment, key=lambda row: self._records[row].key()))
+        return order
+
+    def _batch(self, order):
+        """
+        Internal method to collect the runs of sorted records sharing a render state and a mesh buffer into GLInstanceBatches.
+
+        The runs shorter than GLInstancer.threshold are not worth an instanced draw call and are kept as records.
+
+        @param order The list of the record positions in submission order.
+        @returns     The list of the record positions and GLInstanceBatches in submission order.
+        """
+        def group(row):
+            record = self._records[row]
+            if record.isFallback() or record.instanced is None:
+                return (None, row)
+            return (record.instanced, record.state)
+
+        submission = []
+        for (mesh, state), run in itertools.groupby(order, group):
+            run = list(run)
+            if mesh is None or len(run) < GLInstancer.threshold:
+                submission.extend(run)
+                continue
+            records = [self._records[row] for row in run]
+            batch = GLInstanceBatch(mesh, state, run, [record.matrix for record in records], [record.color for record in records])
+            for index, row in enumerate(run):
+                self._batches[row] = (batch, index)
+            submission.append(batch)
+        return submission
+
+    def _release(self):
+        """
+        Internal method to release the submission order and its GLInstanceBatches.
+        """
+        for batch in set(batch for batch, _ in self._batches.values()):
+            batch.release()
+        self._batches.clear()
+        self._order = None
+
+    def _append(self, record):
+        """
+        Internal method to append a record to the compiled list.
+
+        @param record A GLRenderRecord.
+        """
+        if record.isFallback():
+            self._updateFallback(record)
+        self._index[record.node] = len(self._records)
+        self._records.append(record)
+
+    def _update(self, record):
+        """
+        Internal method to regenerate the drawing data of a record from its node's adapter.
+
+        @param record A GLRenderRecord of a compiled adapter.
+        """
+        node = record.node
+        adapter = GLNodeAdapter.adapter(node)
+        data = adapter.render()
+        if data is None:
+            record.geometry = None
+            return
+        matrix, record.geometry, record.color, record.state = data
+        record.instanced = adapter.instanced()
+        record.matrix = matrix.buffer()
+        bounds = node.localBounds()
+        if bounds is not None and hasattr(node, 'worldMatrix'):
+            bounds = bounds.transform(node.worldMatrix())
+        record.bounds = bounds
+
+    def _updateFallback(self, record):
+        """
+        Internal method to regenerate the parent space of a fallback record.
+
+        @param record A fallback GLRenderRecord.
+        """
+        parent = record.node.parent()
+        while parent is not None and not hasattr(parent, 'worldMatrix'):
+            parent = parent.parent()
+        record.matrix = parent.worldMatrix().buffer() if parent is not None else self.__identity__
+
+    def _updateBounds(self, row, record):
+        """
+        Internal method to copy the world bounds of a record into the culling arrays.
+
+        The fallback records are culled by their GLPaintVisitor; the records with unbounded (None) bounds are never
+        culled and those with empty bounds always are.
+
+        @param row    The position of the record in the list.
+        @param record A GLRenderRecord.
+        """
+        bounds = record.bounds
+        self._cullable[row] = record.cullable and not record.isFallback() and bounds is not None
+        self._empty[row] = self._cullable[row] and bounds.isEmpty()
+        if self._cullable[row] and not self._empty[row]:
+            self._minima[row] = tuple(bounds.minimum())
+            self._maxima[row] = tuple(bounds.maximum())
+
+    def refresh(self):
+        """
+        Compiles the list if it was invalidated (or an adapter was registered), otherwise patches the records of the
+        subtrees marked by patch().
+        """
+        if self._records is None or self._generation != GLNodeAdapter.generation():
+            self.compile()
+            return
+        while self._pending:
+            item = self._pending.pop()
+            for event, node in walk(item, lambda node: node.children()):
+                row = self._index.get(node, None) if event == TraversalEvent.ENTER else None
+                if row is None:
+                    continue
+                record = self._records[row]
+                if record.isFallback():
+                    self._updateFallback(record)
+                else:
+                    key = record.key()
+                    self._update(record)
+                    if record.geometry is None:
+                        # The node no longer draws anything by itself; the list is compiled again.
+                        self.invalidate()
+                        self.compile()
+                        return
+                    if row in self._batches and record.key()[:2] == key[:2]:
+                        # The order within a batch does not matter (e.g. after a color change).
+                        batch, index = self._batches[row]
+                        batch.update(index, record.matrix, record.color)
+                    elif record.key() != key:
+                        self._release()
+                self._updateBounds(row, record)
+
+    def _visible(self, frustum):
+        """
+        Internal method to classify the records against a frustum.
+
+        @param frustum The world space Frustum of the active camera; None if culling is disabled.
+        @returns       A boolean array, True for every visible record; None if every record is visible.
+        """
+        if frustum is None or not self._records:
+            return None
+        classification = frustum.classifyBoxes(self._minima, self._maxima)
+        return ((classification != Frustum.OUTSIDE) & ~self._empty) | ~self._cullable
+
+    def paint(self, frustum=None):
+        """
+        Paints the records, in scene graph order, between the paint operations of the root's adapter.
+
+        @param frustum The world space Frustum of the active camera; if None, culling is disabled.
+        """
+        self.refresh()
+        self._drawn = 0
+        self._culled = 0
+        self._transitions = 0
+        self._saved = 0
+        self._instanced = 0
+        if self._model is None:
+            return
+        if self._order is None:
+            self._order = self._batch(self._sort())
+
+        root = GLNodeAdapter.adapter(self._model.root())
+        root.paint_enter()
+        mask = self._visible(frustum)
+        visible = mask.tolist() if mask is not None else None
+        instancing = GLInstancer.supported()
+        # The current render state; the current color is mirrored by GLState.
+        self._state = None
+        GLState.setMatrixMode(GL.GL_MODELVIEW)
+        for entry in self._order:
+            if not isinstance(entry, GLInstanceBatch):
+                self._paintRecord(entry, visible, frustum)
+            elif instancing:
+                self._enter(entry.state)
+                drawn = entry.draw(mask)
+                self._drawn += drawn
+                self._culled += len(entry) - drawn
+                self._instanced += 1 if drawn else 0
+            else:
+                for row in entry.rows:
+                    self._paintRecord(row, visible, frustum)
+        self._enter(None)
+        root.paint_exit()
+
+    def _enter(self, state):
+        """
+        Internal method to switch the current render state.
+
+        @param state The GLRenderState to enter; None to only exit the current state.
+        """
+        if state is self._state:
+            if state is not None:
+                self._saved += 1
+            return
+        if self._state is not None:
+            self._state.__exit__(None, None, None)
+        self._state = state
+        if state is not None:
+            state.__enter__()
+            self._transitions += 1
+
+    def _paintRecord(self, row, visible, frustum):
+        """
+        Internal method to paint a record.
+
+        @param row     The position of the record in the list.
+        @param visible A list of booleans, True for every visible record; None if every record is visible.
+        @param frustum The world space Frustum of the active camera; None if culling is disabled.
+        """
+        if visible is not None and not visible[row]:
+            self._culled += 1
+            return
+        record = self._records[row]
+        if record.isFallback():
+            self._enter(None)
+            GL.glLoadMatrixf(record.matrix)
+            visitor = GLPaintVisitor(frustum if record.cullable else None)
+            visitor.traverse(record.node)
+            GLState.setMatrixMode(GL.GL_MODELVIEW)
+            self._culled += visitor.culled
+            return
+        self._enter(record.state)
+        GL.glLoadMatrixf(record.matrix)
+        if record.color is not None:
+            if GLState.setColor(record.color):
+                self._transitions += 1
+            else:
+                self._saved += 1
+        if record.state is GLRenderState.COMPOSITE:
+            # The composite geometry (e.g. a scatter) counts the instances of its parts and its instanced draw calls.
+            drawn, instanced = record.geometry.call()
+            self._drawn += drawn
+            self._instanced += instanced
+        else:
+            record.geometry.call()
+            self._drawn += 1
+        if record.color is None:
+            # The geometry carries its own colors.
+            GLState.invalidateColor()
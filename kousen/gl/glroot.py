@@ -4,6 +4,7 @@ This module provides class defintions of OpenGL root node adapters.
 """
 
 from OpenGL import GL
+from kousen.gl.glutil import GLState
 from kousen.gl.gladapter import GLNodeAdapter
 from kousen.scenegraph.scene import SceneGraphRoot
 
@@ -13,6 +14,7 @@ class GLRootAdapter(GLNodeAdapter):
     """
     # Additional Meta Information
     __node__ = SceneGraphRoot
+    __compiled__ = True
 
     def __init__(self, node):
         """
@@ -33,23 +35,23 @@ class GLRootAdapter(GLNodeAdapter):
         GL.glPolygonMode( GL.GL_FRONT_AND_BACK, GL.GL_FILL)
 
         # Polygon Anti-Aliasing
-        GL.glEnable( GL.GL_POLYGON_SMOOTH )
+        GLState.enable(GL.GL_POLYGON_SMOOTH)
 
         # Light Shading
         GL.glShadeModel( GL.GL_SMOOTH )
 
         # Enable Back Face Culling
-        GL.glEnable( GL.GL_CULL_FACE )
+        GLState.enable(GL.GL_CULL_FACE)
         GL.glCullFace( GL.GL_BACK )
 
         # Enable Depth Testing
-        GL.glEnable( GL.GL_DEPTH_TEST )
+        GLState.enable(GL.GL_DEPTH_TEST)
         GL.glDepthFunc( GL.GL_LEQUAL )
         GL.glDepthMask( GL.GL_TRUE )
 
         # Misc
-        GL.glDisable( GL.GL_FOG )
-        GL.glDisable( GL.GL_TEXTURE_2D )
+        GLState.disable(GL.GL_FOG)
+        GLState.disable(GL.GL_TEXTURE_2D)
 
     def resize_enter(self, width, height):
         """
@@ -64,8 +66,8 @@ class GLRootAdapter(GLNodeAdapter):
         """
         Implements the GLNodeAdapter's paint_enter method for an OpenGL Render operation.
         """
-        GL.glMatrixMode(GL.GL_PROJECTION)
+        GLState.setMatrixMode(GL.GL_PROJECTION)
         GL.glLoadIdentity()
-        GL.glMatrixMode(GL.GL_MODELVIEW)
+        GLState.setMatrixMode(GL.GL_MODELVIEW)
         GL.glLoadIdentity()
         GL.glClear(GL.GL_COLOR_BUFFER_BIT | GL.GL_DEPTH_BUFFER_BIT)
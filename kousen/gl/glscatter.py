@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+"""
+This module provides class defintions of OpenGL scatter node adapters.
+
+A ScatterNode draws the compiled parts of its prototype subtree (i.e. the render data of their adapters) at every
+instance transform: in a GLRenderList each part is drawn with one instanced draw call when the part has a mesh buffer
+and the OpenGL context supports instancing; otherwise (and when painted by a GLPaintVisitor) each instance is drawn
+with its own matrix.
+"""
+import numpy
+from OpenGL import GL
+from kousen.gl.glutil import GLState
+from kousen.gl.gladapter import GLNodeAdapter
+from kousen.gl.glinstance import GLInstancer, GLInstanceBatch
+from kousen.gl.glrender import GLRenderState
+from kousen.scenegraph import ScatterNode, TraversalEvent
+
+class GLScatterGeometry(object):
+    """
+    The GLScatterGeometry draws the parts of a prototype subtree at the instance transforms of a ScatterNode.
+    """
+    def __init__(self):
+        """
+        Constructor.
+        """
+        super(GLScatterGeometry, self).__init__()
+        self._parts = []
+        self._world = None
+        self._color = None
+        # The prototype and the transforms the parts were generated from, and if they have instance batches; None if they are stale.
+        self._key = None
+
+    def _buffers(self, matrices):
+        """
+        Internal method to convert matrices into the float32 column major buffers of OpenGL.
+
+        @param matrices A Matrix4x4Array.
+        @returns        The (N,16) float32 array of matrices.
+        """
+        return numpy.ascontiguousarray(matrices.data().transpose((0, 2, 1)), dtype=numpy.float32).reshape((-1, 16))
+
+    def isValid(self, node, instanced=False):
+        """
+        Queries if the parts were generated from the current prototype and transforms of a node.
+
+        @param node      The ScatterNode.
+        @param instanced True to also require the instance batches drawn by call().
+        @returns         True if the parts are up-to-date; False otherwise.
+        """
+        if self._key is None:
+            return False
+        prototype, transforms, batched = self._key
+        return prototype is node.prototype and transforms is node.transforms() and (batched or not instanced)
+
+    def update(self, node, instanced=True):
+        """
+        Updates the parts from a node.
+
+        The parts are only regenerated from the prototype after a prototype or a pattern change; after a transformation
+        change of the node (or of an ancestor) the instance batches are multiplied again by the world matrix, and after
+        a color change (e.g. a hover highlight) only the color of the instances is updated.
+
+        @param node      The ScatterNode.
+        @param instanced True to generate the instance batches drawn by call(); False if the parts are only drawn by paint().
+        """
+        if not self.isValid(node, instanced):
+            self._generate(node, instanced)
+        world = node.worldMatrix()
+        if not numpy.array_equal(self._world, world.buffer()):
+            self._world = world.buffer()
+            for geometry, colored, state, matrices, instances, batch in self._parts:
+                if batch is not None:
+                    batch.setMatrices(self._buffers(world * instances))
+        color = node.color.getRgbF()
+        if color != self._color:
+            self._color = color
+            for geometry, colored, state, matrices, instances, batch in self._parts:
+                if batch is not None and colored:
+                    batch.setColor(color)
+
+    def _generate(self, node, instanced):
+        """
+        Internal method to generate the parts from the prototype of a node; the instance batches are generated with the
+        identity world matrix and white instances, which update() replaces.
+
+        @param node      The ScatterNode.
+        @param instanced True to generate the instance batches.
+        """
+        self.release()
+        transforms = node.transforms()
+        self._key = (node.prototype, transforms, instanced)
+        count = len(transforms)
+        white = (1.0, 1.0, 1.0, 1.0)
+        # The subtrees of the prototype's nodes that paint by themselves are not compiled (see GLRenderList).
+        compiled = lambda item: GLNodeAdapter.adapter(item).__compiled__
+        for event, item in node.prototype.walk(compiled):
+            if event == TraversalEvent.EXIT:
+                continue
+            adapter = GLNodeAdapter.adapter(item)
+            data = adapter.render()
+            if data is None or not count:
+                continue
+            matrix, geometry, color, state = data
+            # The instances take the color (e.g. the selection color) of the node, unless the geometry carries its own colors.
+            colored = color is not None
+            instances = transforms * matrix
+            matrices = self._buffers(instances)
+            mesh = adapter.instanced() if instanced else None
+            batch = None
+            if mesh is not None:
+                batch = GLInstanceBatch(mesh, state, numpy.zeros(count, dtype=numpy.intp), matrices, [white if colored else None] * count)
+            self._parts.append((geometry, colored, state, matrices, instances, batch))
+
+    def call(self):
+        """
+        Draws the instances with the world matrix of the node loaded in the model view matrix; the parts with a mesh
+        buffer are drawn instanced if the OpenGL context supports it.
+
+        @returns A tuple of the number of drawn instances (of every part) and the number of instanced draw calls.
+        """
+        drawn, instanced = 0, 0
+        instancing = GLInstancer.supported()
+        for geometry, colored, state, matrices, instances, batch in self._parts:
+            with state:
+                if batch is not None and instancing:
+                    count = batch.draw()
+                    drawn += count
+                    instanced += 1 if count else 0
+                else:
+                    GLState.setMatrixMode(GL.GL_MODELVIEW)
+                    GL.glLoadMatrixf(self._world)
+                    self._paint(geometry, self._color if colored else None, matrices)
+                    drawn += len(matrices)
+        return drawn, instanced
+
+    def paint(self):
+        """
+        Draws the instances one by one, relative to the current model view matrix (i.e. the local space of the node).
+        """
+        GLState.setMatrixMode(GL.GL_MODELVIEW)
+        for geometry, colored, state, matrices, instances, batch in self._parts:
+            with state:
+                self._paint(geometry, self._color if colored else None, matrices)
+
+    def _paint(self, geometry, color, matrices):
+        """
+        Internal method to draw the instances of a part one by one.
+
+        @param geometry The geometry of the part (an object implementing the call() method).
+        @param color    The (r, g, b, a) color; None if the geometry carries its own colors.
+        @param matrices The (N,16) float32 array of the instance matrices, relative to the current model view matrix.
+        """
+        if color is not None:
+            GLState.setColor(color)
+        for matrix in matrices:
+            GL.glPushMatrix()
+            GL.glMultMatrixf(matrix)
+            geometry.call()
+            GL.glPopMatrix()
+        if color is None:
+            GLState.invalidateColor()
+
+    def release(self):
+        """
+        Releases the instance buffers of the parts.
+        """
+        for geometry, colored, state, matrices, instances, batch in self._parts:
+            if batch is not None:
+                batch.release()
+        self._parts = []
+        self._world = None
+        self._color = None
+        self._key = None
+
+class GLScatterAdapter(GLNodeAdapter):
+    """
+    The GLScatterAdapter implements a GLNodeAdapter for a ScatterNode
+    """
+    # Additional Meta Information
+    __node__ = ScatterNode
+    __compiled__ = True
+
+    def __init__(self, node):
+        """
+        Constructor.
+
+        @param node The adaptable node.
+        """
+        super(GLScatterAdapter, self).__init__(node)
+        self.__geometry = GLScatterGeometry()
+
+    def paint_enter(self):
+        """
+        Implements the GLNodeAdapter's paint_enter method for an OpenGL Render operation.
+        """
+        GLState.pushAttrib(GL.GL_ENABLE_BIT | GL.GL_CURRENT_BIT)
+        GLState.setMatrixMode(GL.GL_MODELVIEW)
+        GL.glPushMatrix()
+        GL.glMultMatrixf(self._node.matrix().buffer())
+        # The parts are drawn relative to the local space of the node; they are only regenerated when the node changes.
+        self.__geometry.update(self._node, False)
+        self.__geometry.paint()
+
+    def paint_exit(self):
+        """
+        Implements the GLNodeAdapter's paint_exit method for an OpenGL Render operation.
+        """
+        GLState.setMatrixMode(GL.GL_MODELVIEW)
+        GL.glPopMatrix()
+        GLState.popAttrib()
+
+    def cleanup(self):
+        """
+        Implements the GLNodeAdapter's cleanup method; releases the instance buffers and the adapters of the prototype.
+        """
+        self.__geometry.release()
+        GLNodeAdapter.release(self._node.prototype)
+
+    def render(self):
+        """
+        Implements the GLNodeAdapter's render method for a compiled OpenGL Render operation; the instances are only
+        regenerated after a prototype or a pattern change (see GLScatterGeometry.update).
+        """
+        self.__geometry.update(self._node)
+        return (self._node.worldMatrix(), self.__geometry, None, GLRenderState.COMPOSITE)
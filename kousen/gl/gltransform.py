@@ -3,6 +3,7 @@
 This module provides class defintions of OpenGL Transformation node adapters.
 """
 from OpenGL import GL
+from kousen.gl.glutil import GLState
 from kousen.scenegraph import TransformationNode
 from kousen.gl.gladapter import GLNodeAdapter
 
@@ -12,6 +13,7 @@ class GLTransformationAdapter(GLNodeAdapter):
     """
     # Additional Meta Information
     __node__ = TransformationNode
+    __compiled__ = True
 
     def __init__(self, node):
         """
@@ -25,13 +27,13 @@ class GLTransformationAdapter(GLNodeAdapter):
         """
         Implements the GLNodeAdapter's paint_enter method for an OpenGL Render operation.
         """
-        GL.glMatrixMode(GL.GL_MODELVIEW)
+        GLState.setMatrixMode(GL.GL_MODELVIEW)
         GL.glPushMatrix();
-        GL.glMultMatrixf(self._node.matrix().data())        
+        GL.glMultMatrixf(self._node.matrix().buffer())        
 
     def paint_exit(self):
         """
         Implements the GLNodeAdapter's paint_exit method for an OpenGL Render operation.
         """
-        GL.glMatrixMode(GL.GL_MODELVIEW)
+        GLState.setMatrixMode(GL.GL_MODELVIEW)
         GL.glPopMatrix();
\ No newline at end of file
@@ -3,6 +3,7 @@
 This module provides the OpenGL specializations of an AbstractSceneGraphVisitor.
 """
 from kousen.gl.glroot import GLNodeAdapter
+from kousen.math import Frustum
 from kousen.scenegraph.scene import AbstractSceneGraphVisitor
 
 class GLInitializeVisitor(AbstractSceneGraphVisitor):
@@ -70,15 +71,55 @@ class GLResizeVisitor(AbstractSceneGraphVisitor):
 class GLPaintVisitor(AbstractSceneGraphVisitor):
     """
     GLSceneGraphVisitor implementes a Scene Graph Traversal object in for an OpenGL Paint operation
+
+    With a frustum the visitor culls the subtrees whose world bounds are outside the frustum; their enter and exit
+    operations are skipped.  The subtrees entirely inside the frustum and the descendants of unbounded nodes (e.g. a
+    HUD, drawn in its own view space) are not tested.
     """
-    def __init__(self):
+    def __init__(self, frustum=None):
         """
         Constructor.
 
-        @param width The current width of the viewport.
-        @param height The current height of the viewport.
+        @param frustum The world space Frustum of the active camera; if None, culling is disabled.
         """
         super(GLPaintVisitor, self).__init__()
+        self._frustum = frustum
+        # The culling state of each entered node: True if its descendants are to be tested.
+        self._culling = [frustum is not None]
+        self._classification = Frustum.INTERSECTING
+        self._culled = 0
+
+    @property
+    def culled(self):
+        """
+        Convenience property for the number of subtrees culled by the last traversal.
+
+        @returns The number of culled subtrees.
+        """
+        return self._culled
+
+    def _istraversable(self, node):
+        """
+        Overrides the AbstractSceneGraphVisitor's _istraversable method to cull the subtrees outside the frustum.
+
+        @param node The current node in the traversal operation.
+        @return     True if the node is traversable; False otherwise.
+        """
+        self._classification = Frustum.INTERSECTING
+        if not self._culling[-1]:
+            return True
+
+        bounds = node.worldBounds()
+        if bounds is None:
+            return True
+        if bounds.isEmpty():
+            self._classification = Frustum.OUTSIDE
+        else:
+            self._classification = self._frustum.classifyBox(bounds.minimum(), bounds.maximum())
+        if self._classification == Frustum.OUTSIDE:
+            self._culled += 1
+            return False
+        return True
 
     def _enter(self, node):
         """
@@ -86,6 +127,7 @@ class GLPaintVisitor(AbstractSceneGraphVisitor):
 
         @param node The current node in the traversal
         """
+        self._culling.append(self._culling[-1] and self._classification != Frustum.INSIDE and node.localBounds() is not None)
         adapter = GLNodeAdapter.adapter(node)
         if adapter:
             adapter.paint_enter()
@@ -98,4 +140,14 @@ class GLPaintVisitor(AbstractSceneGraphVisitor):
         """
         adapter = GLNodeAdapter.adapter(node)
         if adapter:
-            adapter.paint_exit()
\ No newline at end of file
+            adapter.paint_exit()
+        self._culling.pop()
+
+    def traverse(self, model):
+        """
+        Overrides the AbstractSceneGraphVisitor's traverse method to reset the culling statistics.
+
+        @param model An instance of AbstractSceneGraphModel; or an AbstractSceneGraphItem to traverse its subtree.
+        """
+        self._culled = 0
+        super(GLPaintVisitor, self).traverse(model)
@@ -7,6 +7,246 @@ from OpenGL import GLU
 from PySide import QtCore
 from PySide import QtGui
 
+class GLState(object):
+    """
+    GLState provides a CPU side mirror of the OpenGL state changed by kousen.gl (the current color, the matrix mode,
+    the enabled capabilities and the state variables such as the line width).
+
+    Setting a state to its mirrored value is skipped and querying a mirrored state does not read it back from the
+    driver; an unknown state is read once.  The mirror follows the attribute stack: popping an attribute group
+    restores the mirrored values of the states the group saves.  Every state change has to go through GLState (or be
+    followed by an invalidation, e.g. after calling a display list that sets the color) and the mirror has to be reset
+    whenever the OpenGL context changes.
+    """
+    # The attribute groups saving the capabilities (besides GL.GL_ENABLE_BIT) and the state variables.
+    _capabilitybits = {
+        GL.GL_LIGHTING:        GL.GL_LIGHTING_BIT,
+        GL.GL_COLOR_MATERIAL:  GL.GL_LIGHTING_BIT,
+        GL.GL_DEPTH_TEST:      GL.GL_DEPTH_BUFFER_BIT,
+        GL.GL_CULL_FACE:       GL.GL_POLYGON_BIT,
+        GL.GL_POLYGON_SMOOTH:  GL.GL_POLYGON_BIT,
+        GL.GL_NORMALIZE:       GL.GL_TRANSFORM_BIT,
+        GL.GL_LINE_SMOOTH:     GL.GL_LINE_BIT,
+        GL.GL_FOG:             GL.GL_FOG_BIT,
+        GL.GL_TEXTURE_2D:      GL.GL_TEXTURE_BIT,
+        GL.GL_BLEND:           GL.GL_COLOR_BUFFER_BIT,
+    }
+    _variablebits = {
+        GL.GL_LINE_WIDTH: GL.GL_LINE_BIT,
+        GL.GL_POINT_SIZE: GL.GL_POINT_BIT,
+    }
+
+    _color = None
+    _matrixmode = None
+    _capabilities = {}
+    _variables = {}
+    _stack = []
+
+    # The number of state changes sent to the driver, skipped as redundant and read back from the driver.
+    issued = 0
+    skipped = 0
+    queried = 0
+
+    @classmethod
+    def reset(cls):
+        """
+        Forgets the mirrored state (e.g. when the OpenGL context changes); every state is read again on first request.
+        """
+        cls._color = None
+        cls._matrixmode = None
+        cls._capabilities.clear()
+        cls._variables.clear()
+        del cls._stack[:]
+        cls.issued = 0
+        cls.skipped = 0
+        cls.queried = 0
+
+    @classmethod
+    def invalidateColor(cls):
+        """
+        Forgets the mirrored current color (e.g. after a display list or a color array changed it).
+        """
+        cls._color = None
+
+    @classmethod
+    def color(cls):
+        """
+        Returns the current color.
+
+        @returns The (r, g, b, a) tuple of the current color.
+        """
+        if cls._color is None:
+            cls._color = tuple(float(c) for c in GL.glGetFloatv(GL.GL_CURRENT_COLOR))
+            cls.queried += 1
+        return cls._color
+
+    @classmethod
+    def setColor(cls, color):
+        """
+        Sets the current color.
+
+        @param color The (r, g, b) or (r, g, b, a) tuple of the color.
+        @returns     True if the color was sent to the driver; False if it was already current.
+        """
+        color = tuple(color) if len(color) == 4 else tuple(color) + (1.0,)
+        if color == cls._color:
+            cls.skipped += 1
+            return False
+        GL.glColor4f(*color)
+        cls._color = color
+        cls.issued += 1
+        return True
+
+    @classmethod
+    def matrixMode(cls):
+        """
+        Returns the current matrix mode.
+
+        @returns The OpenGL matrix mode (e.g. GL.GL_MODELVIEW).
+        """
+        if cls._matrixmode is None:
+            cls._matrixmode = int(GL.glGetIntegerv(GL.GL_MATRIX_MODE))
+            cls.queried += 1
+        return cls._matrixmode
+
+    @classmethod
+    def setMatrixMode(cls, mode):
+        """
+        Sets the current matrix mode.
+
+        @param mode The OpenGL matrix mode (e.g. GL.GL_MODELVIEW).
+        @returns    True if the mode was sent to the driver; False if it was already current.
+        """
+        if mode == cls._matrixmode:
+            cls.skipped += 1
+            return False
+        GL.glMatrixMode(mode)
+        cls._matrixmode = mode
+        cls.issued += 1
+        return True
+
+    @classmethod
+    def isEnabled(cls, capability):
+        """
+        Queries if a capability is enabled.
+
+        @param capability The OpenGL capability (e.g. GL.GL_LIGHTING).
+        @returns          True if the capability is enabled; False otherwise.
+        """
+        value = cls._capabilities.get(capability, None)
+        if value is None:
+            value = cls._capabilities[capability] = bool(GL.glIsEnabled(capability))
+            cls.queried += 1
+        return value
+
+    @classmethod
+    def _setCapability(cls, capability, value):
+        """
+        Internal method to enable or disable a capability.
+
+        @returns True if the change was sent to the driver; False if the capability was already in the state.
+        """
+        if cls._capabilities.get(capability, None) == value:
+            cls.skipped += 1
+            return False
+        if value:
+            GL.glEnable(capability)
+        else:
+            GL.glDisable(capability)
+        cls._capabilities[capability] = value
+        cls.issued += 1
+        return True
+
+    @classmethod
+    def enable(cls, capability):
+        """
+        Enables a capability.
+
+        @param capability The OpenGL capability (e.g. GL.GL_LIGHTING).
+        @returns          True if the change was sent to the driver; False if the capability was already enabled.
+        """
+        return cls._setCapability(capability, True)
+
+    @classmethod
+    def disable(cls, capability):
+        """
+        Disables a capability.
+
+        @param capability The OpenGL capability (e.g. GL.GL_LIGHTING).
+        @returns          True if the change was sent to the driver; False if the capability was already disabled.
+        """
+        return cls._setCapability(capability, False)
+
+    @classmethod
+    def variable(cls, glid):
+        """
+        Returns the value of a state variable.
+
+        @param glid The OpenGL state variable (e.g. GL.GL_LINE_WIDTH).
+        @returns    The value of the variable.
+        """
+        value = cls._variables.get(glid, None)
+        if value is None:
+            value = GL.glGetFloatv(glid)
+            value = cls._variables[glid] = float(value) if getattr(value, 'size', 1) == 1 else tuple(value)
+            cls.queried += 1
+        return value
+
+    @classmethod
+    def setVariable(cls, glmethod, glid, value):
+        """
+        Sets the value of a state variable.
+
+        @param glmethod The OpenGL method setting the variable (e.g. GL.glLineWidth).
+        @param glid     The OpenGL state variable (e.g. GL.GL_LINE_WIDTH).
+        @param value    The value of the variable.
+        @returns        True if the value was sent to the driver; False if it was already current.
+        """
+        if cls._variables.get(glid, None) == value:
+            cls.skipped += 1
+            return False
+        glmethod(value)
+        cls._variables[glid] = value
+        cls.issued += 1
+        return True
+
+    @classmethod
+    def pushAttrib(cls, mask):
+        """
+        Pushes attribute groups onto the attribute stack (i.e. GL.glPushAttrib), with a snapshot of the mirrored state.
+
+        @param mask The OpenGL attribute mask.
+        """
+        GL.glPushAttrib(mask)
+        cls._stack.append((mask, cls._color, cls._matrixmode, dict(cls._capabilities), dict(cls._variables)))
+
+    @classmethod
+    def popAttrib(cls):
+        """
+        Pops attribute groups from the attribute stack (i.e. GL.glPopAttrib), restoring the mirror of the saved states.
+        """
+        GL.glPopAttrib()
+        if not cls._stack:
+            # The matching push bypassed the mirror.
+            cls.reset()
+            return
+        mask, color, matrixmode, capabilities, variables = cls._stack.pop()
+        if mask & GL.GL_CURRENT_BIT:
+            cls._color = color
+        if mask & GL.GL_TRANSFORM_BIT:
+            cls._matrixmode = matrixmode
+        for capability in set(capabilities) | set(cls._capabilities):
+            if mask & (GL.GL_ENABLE_BIT | cls._capabilitybits.get(capability, 0)):
+                cls._capabilities.pop(capability, None)
+                if capabilities.get(capability, None) is not None:
+                    cls._capabilities[capability] = capabilities[capability]
+        for glid in set(variables) | set(cls._variables):
+            bit = cls._variablebits.get(glid, None)
+            if bit is None or mask & bit:
+                cls._variables.pop(glid, None)
+                if bit is not None and variables.get(glid, None) is not None:
+                    cls._variables[glid] = variables[glid]
+
 class Scope(object):
     """
     Scope provides a context manager base interface for various OpenGL operations.
@@ -70,10 +310,10 @@ class GLAttribScope(Scope):
         self._mask = mask
 
     def __enter__(self):
-        GL.glPushAttrib(self._mask)
+        GLState.pushAttrib(self._mask)
 
     def __exit__(self ,type, value, traceback):
-        GL.glPopAttrib()
+        GLState.popAttrib()
         return not type
 
 class GLClientAttribScope(Scope):
@@ -102,8 +342,8 @@ class GLMatrixScope(Scope):
 
     def __enter__(self):
         if self._nextmode:
-            self._prevmode = GL.glGetIntegerv(GL.GL_MATRIX_MODE)
-            GL.glMatrixMode(self._nextmode)
+            self._prevmode = GLState.matrixMode()
+            GLState.setMatrixMode(self._nextmode)
         GL.glPushMatrix();
         if self._identity:
             GL.glLoadIdentity()
@@ -111,7 +351,7 @@ class GLMatrixScope(Scope):
     def __exit__(self ,type, value, traceback):
         GL.glPopMatrix()
         if self._nextmode:
-            GL.glMatrixMode(self._prevmode)
+            GLState.setMatrixMode(self._prevmode)
         return not type
 
 class GLVariableScope(Scope):
@@ -129,11 +369,11 @@ class GLVariableScope(Scope):
         self._id = glid
 
     def __enter__(self):
-        self._prevvalue = GL.glGetInteger(self._id)
-        self._set(self._nextvalue)
+        self._prevvalue = GLState.variable(self._id)
+        GLState.setVariable(self._set, self._id, self._nextvalue)
 
     def __exit__(self ,type, value, traceback):
-        self._set(self._prevvalue)
+        GLState.setVariable(self._set, self._id, self._prevvalue)
         return not type
 
 class GLColorScope(Scope):
@@ -154,12 +394,12 @@ class GLColorScope(Scope):
 
     def __enter__(self):
         if not self._glcolor and self._qcolor:
-            self._glcolor = GL.glGetFloatv(GL.GL_CURRENT_COLOR)
-            GL.glColor(self._qcolor.getRgbF())
+            self._glcolor = GLState.color()
+            GLState.setColor(self._qcolor.getRgbF())
 
     def __exit__(self ,type, value, traceback):
         if self._glcolor:
-            GL.glColor(self._glcolor)
+            GLState.setColor(self._glcolor)
             self._glcolor = None
         return not type
 
@@ -181,3 +421,64 @@ class GLScope(Scope):
         GL.glEnd()
         return not type
 
+
+class GLDisplayList(Scope):
+    """
+    GLDisplayList provides a context manager for recording OpenGL commands into a cached display list (i.e. GL.glNewList / GL.glEndList).
+
+    The recording is identified by a key built from the values that affect the geometry; the list only needs to be re-recorded when that key changes.
+
+        if not displaylist.isValid(key):
+            with displaylist.record(key):
+            ...
+        displaylist.call()
+    """
+    def __init__(self):
+        super(GLDisplayList, self).__init__()
+        self._id = 0
+        self._key = None
+        self._nextkey = None
+
+    def __enter__(self):
+        if not self._id:
+            self._id = GL.glGenLists(1)
+        GL.glNewList(self._id, GL.GL_COMPILE)
+
+    def __exit__(self ,type, value, traceback):
+        GL.glEndList()
+        self._key = None if type else self._nextkey
+        return not type
+
+    def isValid(self, key):
+        """
+        Queries if the display list has been recorded with the key.
+
+        @param key The key identifying the recording.
+        @returns   True if the recorded display list matches the key; False otherwise.
+        """
+        return bool(self._id) and self._key == key
+
+    def record(self, key):
+        """
+        Prepares the display list for a new recording.
+
+        @param key The key identifying the recording.
+        @returns   The display list, to be used as a context manager.
+        """
+        self._nextkey = key
+        return self
+
+    def call(self):
+        """
+        Executes the recorded display list.
+        """
+        GL.glCallList(self._id)
+
+    def release(self):
+        """
+        Deletes the display list.
+        """
+        if self._id:
+            GL.glDeleteLists(self._id, 1)
+        self._id = 0
+        self._key = None
@@ -2,8 +2,13 @@
 """
 This module provides the specializations of an OpenGL.QGLWidget.
 """
-from PySide import QtCore, QtOpenGL
-from kousen.gl.gltraversal import GLInitializeVisitor, GLResizeVisitor, GLPaintVisitor
+from PySide import QtCore, QtGui, QtOpenGL
+from kousen.gl.gladapter import GLNodeAdapter
+from kousen.gl.glgeometry import GLGeometryCache
+from kousen.gl.glinstance import GLInstancer
+from kousen.gl.glrender import GLRenderList
+from kousen.gl.glutil import GLState
+from kousen.gl.gltraversal import GLInitializeVisitor, GLResizeVisitor
 
 class GLWidget(QtOpenGL.QGLWidget):
     """
@@ -15,6 +20,13 @@ class GLWidget(QtOpenGL.QGLWidget):
     # is a multiple of 120; i.e., 120 units * 1/8 = 15 degrees.
     WHEELFACTOR = 1 /  8 / 15
 
+    # Emitted with the ObjectNode under the mouse cursor (or None) as the mouse hovers over the scene.
+    nodeHovered = QtCore.Signal(object)
+    # Emitted with the nearest ObjectNode under a mouse click (or None).
+    nodePicked = QtCore.Signal(object)
+    # Emitted with the list of ObjectNodes inside or intersecting a marquee (i.e. a dragged rectangle).
+    nodesSelected = QtCore.Signal(list)
+
     #__camera_dolly__  = ":/icons/camera-dolly.png"
     #__camera_pan__    = ":/icons/camera-pan.png"
     #__camera_orbit__  = ":/icons/camera-orbit.png"
@@ -24,6 +36,17 @@ class GLWidget(QtOpenGL.QGLWidget):
         super(GLWidget, self).__init__(parent)
 
         self._model = None
+        self._culling = True
+        self._renderlist = GLRenderList()
+        self._hovered = None
+        self._mousex = 0
+        self._mousey = 0
+        self._mousepress = None
+        self._mouselock = None
+        self._marquee = QtGui.QRubberBand(QtGui.QRubberBand.Rectangle, self)
+
+        # Hover picking requires the mouse move events without a mouse button pressed.
+        self.setMouseTracking(True)
 
         #cursor_pixmap = QtGui.QPixmap(self.__camera_dolly__)
         #cursor_pixmap.setMask(cursor_pixmap.mask())
@@ -44,11 +67,98 @@ class GLWidget(QtOpenGL.QGLWidget):
     def _modelDataChanged(self, topLeft, bottomRight):
         self.update()
 
+    def _modelItemDetached(self, item):
+        self.makeCurrent()
+        GLNodeAdapter.release(item)
+        self._renderlist.invalidate()
+
+    @property
+    def culling(self):
+        """
+        Convenience property for the view frustum culling mode.
+
+        @returns True if the nodes outside the active camera's frustum are culled; False otherwise.
+        """
+        return self._culling
+
+    @culling.setter
+    def culling(self, value):
+        """
+        Convenience property for the view frustum culling mode.
+
+        @param value True to cull the nodes outside the active camera's frustum; False to paint every node.
+        """
+        self._culling = value
+        self.update()
+
+    def _setHovered(self, node):
+        """
+        Internal method to highlight the ObjectNode under the mouse cursor.
+
+        @param node The ObjectNode under the mouse cursor; None if there is none.
+        """
+        if node is self._hovered:
+            return
+        # The highlight changes the node's color, which patches its render record.
+        if self._hovered is not None:
+            self._hovered.highlighted = False
+        if node is not None:
+            node.highlighted = True
+        self._hovered = node
+        self.nodeHovered.emit(node)
+        self.update()
+
+    def pick(self, x, y, count=1):
+        """
+        Finds the ObjectNodes under a widget position with a ray cast from the model's active camera.
+
+        @param x     The horizontal widget position (in pixels, from the left).
+        @param y     The vertical widget position (in pixels, from the top).
+        @param count The maximum number of nodes; None for all nodes.
+        @returns     A list of (distance, ObjectNode) tuples sorted by distance.
+        """
+        camera = getattr(self._model, 'activeCamera', None)
+        index = getattr(self._model, 'spatialIndex', None)
+        if not camera or index is None:
+            return []
+        origin, direction = camera.ray(x, y)
+        return index.raycast(origin, direction, count=count)
+
+    def pickRegion(self, rect):
+        """
+        Finds the ObjectNodes inside or intersecting a widget rectangle with a query of the sub frustum of the rectangle.
+
+        @param rect The QtCore.QRect in widget coordinates.
+        @returns    A list of ObjectNodes.
+        """
+        camera = getattr(self._model, 'activeCamera', None)
+        index = getattr(self._model, 'spatialIndex', None)
+        if not camera or index is None:
+            return []
+        rect = rect.normalized()
+        frustum = camera.regionFrustum(rect.left(), rect.top(), rect.right() + 1, rect.bottom() + 1)
+        if frustum is None:
+            return []
+        return [node for node, classification in index.queryFrustum(frustum)]
+
+    @property
+    def renderList(self):
+        """
+        Convenience property for the compiled render list of the model (e.g. to query its drawing statistics).
+
+        @returns A GLRenderList instance.
+        """
+        return self._renderlist
+
     def setModel(self, model):
         if self._model:
             self._model.dataChanged.disconnect(self._modelDataChanged)
+            self._model.itemDetached.disconnect(self._modelItemDetached)
+        self._setHovered(None)
         self._model = model
+        self._renderlist.setModel(model)
         self._model.dataChanged.connect(self._modelDataChanged)
+        self._model.itemDetached.connect(self._modelItemDetached)
 
         self.initializeGL()
         self.resizeGL(self.width(), self.height())
@@ -73,6 +183,8 @@ class GLWidget(QtOpenGL.QGLWidget):
 
         @param event A QCloseEvent created when Qt receives a window close request for a top-level widget from the window system.
         """
+        self._setHovered(None)
+        self._renderlist.setModel(None)
         self._model = None
         super(GLWidget, self).closeEvent(event)
 
@@ -124,6 +236,7 @@ class GLWidget(QtOpenGL.QGLWidget):
         """
         self._mousex = event.x()
         self._mousey = event.y()
+        self._mousepress = (event.x(), event.y())
 
         #if not (event.buttons() & QtCore.Qt.NoButton):
         #    if event.modifiers() & QtCore.Qt.Modifier.ALT:
@@ -150,6 +263,16 @@ class GLWidget(QtOpenGL.QGLWidget):
         @param event A QMouseEvent reflecting the mouse press events.
         """
         self.unsetCursor()
+        # A left drag selects the nodes in the marquee; a left click (i.e. not a camera operation) picks the nearest node.
+        if event.button() == QtCore.Qt.LeftButton and event.modifiers() == QtCore.Qt.NoModifier and self._mousepress:
+            if self._marquee.isVisible():
+                self._marquee.hide()
+                self.nodesSelected.emit(self.pickRegion(self._marquee.geometry()))
+            else:
+                hits = self.pick(event.x(), event.y())
+                self.nodePicked.emit(hits[0][1] if hits else None)
+        self._marquee.hide()
+        self._mousepress = None
 
     def mouseMoveEvent(self, event):
         """
@@ -157,7 +280,11 @@ class GLWidget(QtOpenGL.QGLWidget):
 
         @param event A QMouseEvent reflecting the mouse move events.
         """
-        if not (event.buttons() & QtCore.Qt.NoButton):
+        if event.buttons() == QtCore.Qt.NoButton:
+            # User is hovering over the scene
+            hits = self.pick(event.x(), event.y())
+            self._setHovered(hits[0][1] if hits else None)
+        else:
             # User is dragging a mouse click
             delta_x = event.x() - self._mousex
             delta_y = event.y() - self._mousey
@@ -167,6 +294,13 @@ class GLWidget(QtOpenGL.QGLWidget):
             if delta_y == 0:
                 pass
 
+            # Marquee Selection
+            if event.buttons() == QtCore.Qt.LeftButton and event.modifiers() == QtCore.Qt.NoModifier and self._mousepress:
+                origin = QtCore.QPoint(*self._mousepress)
+                if self._marquee.isVisible() or (event.pos() - origin).manhattanLength() >= QtGui.QApplication.startDragDistance():
+                    self._marquee.setGeometry(QtCore.QRect(origin, event.pos()).normalized())
+                    self._marquee.show()
+
             # Camera Operation
             if event.modifiers() & QtCore.Qt.Modifier.ALT:
                 if event.modifiers() & QtCore.Qt.Modifier.SHIFT:
@@ -223,17 +357,24 @@ class GLWidget(QtOpenGL.QGLWidget):
         """
         Overriden method of QGLWidget to handle once before the first call to PySide.QtOpenGL.QGLWidget.paintGL() or PySide.QtOpenGL.QGLWidget.resizeGL(), and then once whenever the widget has been assigned a new PySide.QtOpenGL.QGLContext.
         """
+        # Adapters (and their OpenGL resources) are bound to the previous context.
+        GLNodeAdapter.releaseAll()
+        GLGeometryCache.releaseAll()
+        GLState.reset()
+        self._renderlist.invalidate()
+        GLInstancer.releaseAll()
         if self._model:
             visitor = GLInitializeVisitor()
             visitor.traverse(self._model)
 
     def paintGL(self):
         """
-        Overriden method of QGLWidget handle whenever the widget needs to be painted.
+        Overriden method of QGLWidget handle whenever the widget needs to be painted; the frame is painted from the
+        compiled render list of the model.
         """
         if self._model:
-            visitor = GLPaintVisitor()
-            visitor.traverse(self._model)
+            camera = getattr(self._model, 'activeCamera', None) if self._culling else None
+            self._renderlist.paint(camera.frustum() if camera else None)
 
     def resizeGL(self, width, height):
         """
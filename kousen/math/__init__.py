@@ -2,8 +2,16 @@
 """
 This kousen.math sub package provides all utility functions and class defintions for mathematic operations.
 """
-__all__ = ['conic', 'matrix', 'vector', 'point']
+__all__ = ['conic', 'matrix', 'vector', 'point', 'tessellation', 'transaction', 'observable', 'matrixarray', 'quaternion', 'frustum', 'bounds', 'bvh', 'intersection']
 
 from kousen.math.matrix import Matrix4x4
 from kousen.math.vector import Vector3D
 from kousen.math.point import Point3D
+from kousen.math.tessellation import Mesh, TessellationCache
+from kousen.math.transaction import Transaction
+from kousen.math.observable import ObservableVector3D, ObservablePoint3D
+from kousen.math.matrixarray import Matrix4x4Array
+from kousen.math.quaternion import Quaternion
+from kousen.math.frustum import Frustum
+from kousen.math.bounds import BoundingBox
+from kousen.math.bvh import BoundingVolumeHierarchy
@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+"""
+This module provides all utility functions and class defintions for bounding volume operations.
+
+A BoundingBox is an axis aligned box described by its minimum and maximum corners; an empty box (i.e. the bounds of
+nothing) has no corners and is the identity of the union operation.
+"""
+from kousen.math.point import Point3D
+from kousen.math.vector import Vector3D
+
+class BoundingBox(object):
+    """
+    BoundingBox provides a simplified but self contained axis aligned bounding box value class.
+    """
+    __slots__ = ('_minimum', '_maximum')
+
+    def __init__(self, minimum=None, maximum=None):
+        """
+        Constructor.
+
+        @param minimum The minimum corner (an object implementing the [] operator for x, y, z); if None the box is empty.
+        @param maximum The maximum corner (an object implementing the [] operator for x, y, z); if None the box is empty.
+        """
+        if minimum is None or maximum is None:
+            self._minimum = None
+            self._maximum = None
+        else:
+            self._minimum = Point3D(minimum[0], minimum[1], minimum[2])
+            self._maximum = Point3D(maximum[0], maximum[1], maximum[2])
+
+    def __repr__(self):
+        """
+        Generates the "official" string representation of the BoundingBox
+
+        @returns A string representation of the BoundingBox
+        """
+        if self.isEmpty():
+            return "{0}()".format(self.__class__.__name__)
+        return "{0}({1}, {2})".format(self.__class__.__name__, list(self._minimum), list(self._maximum))
+
+    def __eq__(self, other):
+        """
+        Calculates the equality of two BoundingBoxes
+
+        @param other A BoundingBox.
+        @returns     True if both boxes have the same corners; False otherwise.
+        """
+        if not isinstance(other, BoundingBox):
+            return NotImplemented
+        if self.isEmpty() or other.isEmpty():
+            return self.isEmpty() and other.isEmpty()
+        return self._minimum == other._minimum and self._maximum == other._maximum
+
+    def __ne__(self, other):
+        """
+        Calculates the inequality of two BoundingBoxes
+
+        @param other A BoundingBox.
+        @returns     True if the boxes have different corners; False otherwise.
+        """
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    @classmethod
+    def fromPoints(cls, points):
+        """
+        Creates the bounding box of points.
+
+        @param points An iterable of objects implementing the [] operator for x, y, z.
+        @returns      A BoundingBox; empty if there are no points.
+        """
+        points = [(p[0], p[1], p[2]) for p in points]
+        if not points:
+            return cls()
+        xs, ys, zs = zip(*points)
+        return cls((min(xs), min(ys), min(zs)), (max(xs), max(ys), max(zs)))
+
+    @classmethod
+    def fromCenter(cls, center, extents):
+        """
+        Creates a bounding box from its center and half size.
+
+        @param center  The center of the box (an object implementing the [] operator for x, y, z).
+        @param extents The half size of the box along each axis (an object implementing the [] operator for x, y, z).
+        @returns       A BoundingBox.
+        """
+        return cls(
+            (center[0] - extents[0], center[1] - extents[1], center[2] - extents[2]),
+            (center[0] + extents[0], center[1] + extents[1], center[2] + extents[2]))
+
+    def isEmpty(self):
+        """
+        Queries if the box is empty.
+
+        @returns True if the box bounds nothing; False otherwise.
+        """
+        return self._minimum is None
+
+    def minimum(self):
+        """
+        Returns the minimum corner.
+
+        @returns A Point3D if the box is not empty; None otherwise.
+        """
+        return self._minimum
+
+    def maximum(self):
+        """
+        Returns the maximum corner.
+
+        @returns A Point3D if the box is not empty; None otherwise.
+        """
+        return self._maximum
+
+    def center(self):
+        """
+        Calculates the center of the box.
+
+        @returns A Point3D if the box is not empty; None otherwise.
+        """
+        if self.isEmpty():
+            return None
+        return self._minimum.midpoint(self._maximum)
+
+    def extents(self):
+        """
+        Calculates the half size of the box along each axis.
+
+        @returns A Vector3D if the box is not empty; None otherwise.
+        """
+        if self.isEmpty():
+            return None
+        a, b = self._minimum, self._maximum
+        return Vector3D((b.x - a.x) * 0.5, (b.y - a.y) * 0.5, (b.z - a.z) * 0.5)
+
+    def radius(self):
+        """
+        Calculates the radius of the bounding sphere of the box (i.e. the sphere about the center through the corners).
+
+        @returns The radius if the box is not empty; 0 otherwise.
+        """
+        if self.isEmpty():
+            return 0.0
+        return self.extents().length()
+
+    def duplicate(self):
+        """
+        Copy Constructor.
+
+        @returns Another BoundingBox with the same values as self
+        """
+        return self.__class__(self._minimum, self._maximum)
+
+    def union(self, other):
+        """
+        Calculates the union of two boxes.
+
+        @param other A BoundingBox.
+        @returns     The BoundingBox of both boxes.
+        """
+        if other.isEmpty():
+            return self
+        if self.isEmpty():
+            return other
+        a, b = self._minimum, self._maximum
+        c, d = other._minimum, other._maximum
+        return self.__class__(
+            (min(a.x, c.x), min(a.y, c.y), min(a.z, c.z)),
+            (max(b.x, d.x), max(b.y, d.y), max(b.z, d.z)))
+
+    def contains(self, point):
+        """
+        Queries if the box contains a point.
+
+        @param point An object implementing the [] operator for x, y, z.
+        @returns     True if the point is inside or on the box; False otherwise.
+        """
+        if self.isEmpty():
+            return False
+        a, b = self._minimum, self._maximum
+        return a.x <= point[0] <= b.x and a.y <= point[1] <= b.y and a.z <= point[2] <= b.z
+
+    def intersects(self, other):
+        """
+        Queries if two boxes overlap.
+
+        @param other A BoundingBox.
+        @returns     True if the boxes overlap or touch; False otherwise.
+        """
+        if self.isEmpty() or other.isEmpty():
+            return False
+        a, b = self._minimum, self._maximum
+        c, d = other._minimum, other._maximum
+        return a.x <= d.x and c.x <= b.x and a.y <= d.y and c.y <= b.y and a.z <= d.z and c.z <= b.z
+
+    def transform(self, matrix):
+        """
+        Calculates the bounding box of the transformed box.
+
+        Affine matrices transform the center and project the extents onto the absolute 3x3 part (J. Arvo, "Transforming
+        Axis-Aligned Bounding Boxes", Graphics Gems, 1990); projective matrices transform the eight corners.
+
+        @param matrix A Matrix4x4.
+        @returns      The BoundingBox of the transformed box.
+        """
+        if self.isEmpty() or matrix.kind() == matrix.IDENTITY:
+            return self
+        if not matrix.isAffine():
+            a, b = self._minimum, self._maximum
+            corners = [(x, y, z) for x in (a.x, b.x) for y in (a.y, b.y) for z in (a.z, b.z)]
+            return self.fromPoints(matrix.transformPoints(corners, divide=True).tolist())
+
+        # The matrix data is column major: m[column * 4 + row].
+        m = matrix.data()
+        c = self.center()
+        e = self.extents()
+        center = (
+            m[0] * c.x + m[4] * c.y + m[8]  * c.z + m[12],
+            m[1] * c.x + m[5] * c.y + m[9]  * c.z + m[13],
+            m[2] * c.x + m[6] * c.y + m[10] * c.z + m[14])
+        extents = (
+            abs(m[0]) * e.x + abs(m[4]) * e.y + abs(m[8])  * e.z,
+            abs(m[1]) * e.x + abs(m[5]) * e.y + abs(m[9])  * e.z,
+            abs(m[2]) * e.x + abs(m[6]) * e.y + abs(m[10]) * e.z)
+        return self.fromCenter(center, extents)
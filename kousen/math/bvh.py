@@ -0,0 +1,542 @@
+# -*- coding: utf-8 -*-
+"""
+This module provides all utility functions and class defintions for bounding volume hierarchies.
+
+A BoundingVolumeHierarchy is a dynamic binary tree of axis aligned boxes (after E. Catto's Box2D dynamic tree): leaves
+are inserted next to the sibling that minimizes the surface area cost of the tree, the tree is kept balanced with
+rotations, and the leaves store 'fat' boxes (i.e. enlarged by a margin) so that small motions do not restructure the
+tree.  The queries prune the subtrees whose boxes do not satisfy the query, so they visit O(log N) nodes for selective
+queries.
+
+The boxes of the internal operations are tuples of (xmin, ymin, zmin, xmax, ymax, zmax).
+"""
+import heapq
+import itertools
+import math
+from kousen.math.frustum import Frustum
+
+def _box(bounds):
+    """
+    Converts a BoundingBox into an internal box tuple.
+
+    @param bounds A non empty BoundingBox.
+    @returns      A tuple of (xmin, ymin, zmin, xmax, ymax, zmax).
+    """
+    a, b = bounds.minimum(), bounds.maximum()
+    return (a[0], a[1], a[2], b[0], b[1], b[2])
+
+def _union(a, b):
+    """
+    Calculates the union of two box tuples.
+    """
+    return (min(a[0], b[0]), min(a[1], b[1]), min(a[2], b[2]), max(a[3], b[3]), max(a[4], b[4]), max(a[5], b[5]))
+
+def _area(a):
+    """
+    Calculates the surface area of a box tuple (i.e. the cost metric of the tree).
+    """
+    dx, dy, dz = a[3] - a[0], a[4] - a[1], a[5] - a[2]
+    return 2.0 * (dx * dy + dy * dz + dz * dx)
+
+def _contains(a, b):
+    """
+    Queries if the box tuple a contains the box tuple b.
+    """
+    return a[0] <= b[0] and a[1] <= b[1] and a[2] <= b[2] and a[3] >= b[3] and a[4] >= b[4] and a[5] >= b[5]
+
+def _overlaps(a, b):
+    """
+    Queries if two box tuples overlap.
+    """
+    return a[0] <= b[3] and b[0] <= a[3] and a[1] <= b[4] and b[1] <= a[4] and a[2] <= b[5] and b[2] <= a[5]
+
+def _distanceSquared(a, p):
+    """
+    Calculates the squared distance of a point to a box tuple (0 if the point is inside).
+    """
+    d = 0.0
+    for i in range(3):
+        v = p[i]
+        if v < a[i]:
+            d += (a[i] - v) ** 2
+        elif v > a[i + 3]:
+            d += (v - a[i + 3]) ** 2
+    return d
+
+def _slab(a, origin, inverse, maxDistance):
+    """
+    Calculates the entry distance of a ray into a box tuple (the 'slab' test).
+
+    @param a           The box tuple.
+    @param origin      The ray origin.
+    @param inverse     The component-wise inverse of the ray direction (infinite for zero components).
+    @param maxDistance The maximum distance along the ray.
+    @returns           The entry distance (0 if the origin is inside) if the ray hits the box; None otherwise.
+    """
+    tmin, tmax = 0.0, maxDistance
+    for i in range(3):
+        if math.isinf(inverse[i]):
+            if origin[i] < a[i] or origin[i] > a[i + 3]:
+                return None
+            continue
+        t0 = (a[i] - origin[i]) * inverse[i]
+        t1 = (a[i + 3] - origin[i]) * inverse[i]
+        if t0 > t1:
+            t0, t1 = t1, t0
+        if t0 > tmin:
+            tmin = t0
+        if t1 < tmax:
+            tmax = t1
+        if tmin > tmax:
+            return None
+    return tmin
+
+class _BVHNode(object):
+    """
+    The internal node of a BoundingVolumeHierarchy.
+    """
+    __slots__ = ('box', 'parent', 'left', 'right', 'key', 'height')
+
+    def __init__(self, box, key=None, parent=None):
+        """
+        Constructor.
+
+        @param box    The box tuple (the fat box for a leaf).
+        @param key    The key of a leaf; None for an internal node.
+        @param parent The parent _BVHNode.
+        """
+        self.box = box
+        self.key = key
+        self.parent = parent
+        self.left = None
+        self.right = None
+        self.height = 0
+
+    def isLeaf(self):
+        """
+        Queries if the node is a leaf.
+
+        @returns True if the node has no children; False otherwise.
+        """
+        return self.left is None
+
+class BoundingVolumeHierarchy(object):
+    """
+    BoundingVolumeHierarchy provides a dynamic bounding volume hierarchy of keyed axis aligned boxes.
+    """
+    def __init__(self, margin=0.0):
+        """
+        Constructor.
+
+        @param margin The enlargement of the leaf boxes; a box moving within its enlarged box does not change the tree.
+        """
+        self._margin = margin
+        self._root = None
+        self._leaves = {}
+        self._boxes = {}
+
+    def __len__(self):
+        """
+        The len operator.
+
+        @returns The number of keys.
+        """
+        return len(self._leaves)
+
+    def __contains__(self, key):
+        """
+        The in operator.
+
+        @param key A key.
+        @returns   True if the key is in the hierarchy; False otherwise.
+        """
+        return key in self._leaves
+
+    def keys(self):
+        """
+        Returns the keys.
+
+        @returns A list of the keys in the hierarchy.
+        """
+        return list(self._leaves)
+
+    def box(self, key):
+        """
+        Returns the box of a key.
+
+        @param key A key in the hierarchy.
+        @returns   The box tuple (xmin, ymin, zmin, xmax, ymax, zmax) of the key.
+        """
+        return self._boxes[key]
+
+    def height(self):
+        """
+        Returns the height of the tree.
+
+        @returns The number of levels below the root; 0 if the hierarchy has at most one key.
+        """
+        return self._root.height if self._root else 0
+
+    def clear(self):
+        """
+        Removes all keys.
+        """
+        self._root = None
+        self._leaves.clear()
+        self._boxes.clear()
+
+    def _fatten(self, box):
+        """
+        Internal method to enlarge a box tuple by the margin.
+        """
+        m = self._margin
+        return (box[0] - m, box[1] - m, box[2] - m, box[3] + m, box[4] + m, box[5] + m)
+
+    def insert(self, key, bounds):
+        """
+        Inserts a key.
+
+        @param key    A hashable key; an existing key is updated.
+        @param bounds The non empty BoundingBox of the key.
+        """
+        if key in self._leaves:
+            self.update(key, bounds)
+            return
+        box = _box(bounds)
+        leaf = _BVHNode(self._fatten(box), key)
+        self._leaves[key] = leaf
+        self._boxes[key] = box
+        self._insertLeaf(leaf)
+
+    def remove(self, key):
+        """
+        Removes a key.
+
+        @param key A key.
+        @returns   True if the key was removed; False if it is not in the hierarchy.
+        """
+        leaf = self._leaves.pop(key, None)
+        if leaf is None:
+            return False
+        del self._boxes[key]
+        self._removeLeaf(leaf)
+        return True
+
+    def update(self, key, bounds):
+        """
+        Updates (i.e. refits) the box of a key; the key is only moved in the tree if the box leaves its fat box.
+
+        @param key    A key in the hierarchy.
+        @param bounds The new non empty BoundingBox of the key.
+        @returns      True if the tree changed; False otherwise.
+        """
+        leaf = self._leaves[key]
+        box = _box(bounds)
+        self._boxes[key] = box
+        if _contains(leaf.box, box):
+            return False
+        self._removeLeaf(leaf)
+        leaf.box = self._fatten(box)
+        self._insertLeaf(leaf)
+        return True
+
+    def rebuild(self):
+        """
+        Rebuilds an optimal tree top-down (i.e. after many updates), splitting the keys at the median of the longest axis.
+        """
+        leaves = list(self._leaves.values())
+        for leaf in leaves:
+            leaf.box = self._fatten(self._boxes[leaf.key])
+        self._root = self._build(leaves) if leaves else None
+        if self._root:
+            self._root.parent = None
+
+    def _build(self, leaves):
+        """
+        Internal method to build a subtree from leaves.
+
+        @param leaves A non empty list of leaf _BVHNode.
+        @returns      The root _BVHNode of the subtree.
+        """
+        if len(leaves) == 1:
+            return leaves[0]
+
+        centers = [((l.box[0] + l.box[3]), (l.box[1] + l.box[4]), (l.box[2] + l.box[5])) for l in leaves]
+        extents = [max(c[i] for c in centers) - min(c[i] for c in centers) for i in range(3)]
+        axis = extents.index(max(extents))
+        order = sorted(range(len(leaves)), key=lambda i: centers[i][axis])
+        half = len(leaves) // 2
+
+        node = _BVHNode(None)
+        node.left = self._build([leaves[i] for i in order[:half]])
+        node.right = self._build([leaves[i] for i in order[half:]])
+        node.left.parent = node
+        node.right.parent = node
+        node.box = _union(node.left.box, node.right.box)
+        node.height = 1 + max(node.left.height, node.right.height)
+        return node
+
+    def _insertLeaf(self, leaf):
+        """
+        Internal method to insert a leaf next to the sibling of least surface area cost.
+
+        @param leaf A detached leaf _BVHNode.
+        """
+        leaf.parent = None
+        if self._root is None:
+            self._root = leaf
+            return
+
+        box = leaf.box
+        node = self._root
+        while not node.isLeaf():
+            area = _area(node.box)
+            combined = _area(_union(node.box, box))
+            # The cost of a new parent for this node and the leaf, and the cost pushed down to the children.
+            cost = 2.0 * combined
+            inheritance = 2.0 * (combined - area)
+            costs = []
+            for child in (node.left, node.right):
+                enlarged = _area(_union(box, child.box))
+                costs.append(enlarged + inheritance if child.isLeaf() else enlarged - _area(child.box) + inheritance)
+            if cost < costs[0] and cost < costs[1]:
+                break
+            node = node.left if costs[0] < costs[1] else node.right
+
+        sibling = node
+        parent = _BVHNode(_union(box, sibling.box), None, sibling.parent)
+        parent.height = sibling.height + 1
+        if sibling.parent is None:
+            self._root = parent
+        elif sibling.parent.left is sibling:
+            sibling.parent.left = parent
+        else:
+            sibling.parent.right = parent
+        parent.left = sibling
+        parent.right = leaf
+        sibling.parent = parent
+        leaf.parent = parent
+        self._refit(parent)
+
+    def _removeLeaf(self, leaf):
+        """
+        Internal method to detach a leaf; its parent is replaced by its sibling.
+
+        @param leaf A leaf _BVHNode in the tree.
+        """
+        if leaf is self._root:
+            self._root = None
+            return
+
+        parent = leaf.parent
+        grandparent = parent.parent
+        sibling = parent.right if parent.left is leaf else parent.left
+        sibling.parent = grandparent
+        leaf.parent = None
+        if grandparent is None:
+            self._root = sibling
+            return
+        if grandparent.left is parent:
+            grandparent.left = sibling
+        else:
+            grandparent.right = sibling
+        self._refit(grandparent)
+
+    def _refit(self, node):
+        """
+        Internal method to balance and refit the boxes and heights of a node and its ancestors.
+
+        @param node An internal _BVHNode.
+        """
+        while node is not None:
+            node = self._balance(node)
+            node.height = 1 + max(node.left.height, node.right.height)
+            node.box = _union(node.left.box, node.right.box)
+            node = node.parent
+
+    def _replace(self, node, other):
+        """
+        Internal method to replace a node by another in the child pointers of its parent.
+        """
+        other.parent = node.parent
+        if node.parent is None:
+            self._root = other
+        elif node.parent.left is node:
+            node.parent.left = other
+        else:
+            node.parent.right = other
+
+    def _balance(self, a):
+        """
+        Internal method to balance a node with a rotation if its subtrees differ in height by more than one.
+
+        @param a An internal _BVHNode.
+        @returns The _BVHNode at the position of a after the rotation.
+        """
+        if a.isLeaf() or a.height < 2:
+            return a
+
+        b, c = a.left, a.right
+        balance = c.height - b.height
+        if balance > 1:
+            # Rotate c up; its shorter child replaces it under a.
+            f, g = c.left, c.right
+            self._replace(a, c)
+            c.left = a
+            a.parent = c
+            if f.height > g.height:
+                c.right, a.right, g.parent = f, g, a
+            else:
+                c.right, a.right, f.parent = g, f, a
+            a.box = _union(b.box, a.right.box)
+            a.height = 1 + max(b.height, a.right.height)
+            c.box = _union(a.box, c.right.box)
+            c.height = 1 + max(a.height, c.right.height)
+            return c
+        if balance < -1:
+            # Rotate b up; its shorter child replaces it under a.
+            d, e = b.left, b.right
+            self._replace(a, b)
+            b.left = a
+            a.parent = b
+            if d.height > e.height:
+                b.right, a.left, e.parent = d, e, a
+            else:
+                b.right, a.left, d.parent = e, d, a
+            a.box = _union(c.box, a.left.box)
+            a.height = 1 + max(c.height, a.left.height)
+            b.box = _union(a.box, b.right.box)
+            b.height = 1 + max(a.height, b.right.height)
+            return b
+        return a
+
+    def _query(self, overlaps, accepts):
+        """
+        Internal method to collect the keys of a pruned traversal.
+
+        @param overlaps A function of a box tuple; False prunes the node.
+        @param accepts  A function of the box tuple of a key; True adds the key to the result.
+        @returns        A list of keys.
+        """
+        result = []
+        stack = [self._root] if self._root else []
+        while stack:
+            node = stack.pop()
+            if not overlaps(node.box):
+                continue
+            if node.isLeaf():
+                if accepts(self._boxes[node.key]):
+                    result.append(node.key)
+            else:
+                stack.append(node.left)
+                stack.append(node.right)
+        return result
+
+    def queryBox(self, bounds):
+        """
+        Finds the keys whose boxes overlap a box.
+
+        @param bounds A BoundingBox.
+        @returns      A list of keys.
+        """
+        if bounds.isEmpty():
+            return []
+        box = _box(bounds)
+        return self._query(lambda b: _overlaps(b, box), lambda b: _overlaps(b, box))
+
+    def querySphere(self, center, radius):
+        """
+        Finds the keys whose boxes overlap a sphere.
+
+        @param center The center of the sphere (an object implementing the [] operator for x, y, z).
+        @param radius The radius of the sphere.
+        @returns      A list of keys.
+        """
+        point = (center[0], center[1], center[2])
+        r2 = radius * radius
+        test = lambda b: _distanceSquared(b, point) <= r2
+        return self._query(test, test)
+
+    def queryRay(self, origin, direction, maxDistance=float('inf')):
+        """
+        Finds the keys whose boxes are hit by a ray.
+
+        @param origin      The origin of the ray (an object implementing the [] operator for x, y, z).
+        @param direction   The direction of the ray (an object implementing the [] operator for x, y, z); the distances are in multiples of its length.
+        @param maxDistance The maximum distance along the ray.
+        @returns           A list of (distance, key) tuples sorted by the distance at which the ray enters the box.
+        """
+        origin = (origin[0], origin[1], origin[2])
+        inverse = tuple(1.0 / d if d != 0 else float('inf') for d in (direction[0], direction[1], direction[2]))
+        result = []
+        stack = [self._root] if self._root else []
+        while stack:
+            node = stack.pop()
+            if _slab(node.box, origin, inverse, maxDistance) is None:
+                continue
+            if node.isLeaf():
+                t = _slab(self._boxes[node.key], origin, inverse, maxDistance)
+                if t is not None:
+                    result.append((t, node.key))
+            else:
+                stack.append(node.left)
+                stack.append(node.right)
+        result.sort(key=lambda hit: hit[0])
+        return result
+
+    def queryFrustum(self, frustum):
+        """
+        Finds the keys whose boxes are inside or intersect a frustum; the subtrees entirely inside are not tested.
+
+        @param frustum A Frustum.
+        @returns       A list of (key, classification) tuples of Frustum.INSIDE or Frustum.INTERSECTING keys.
+        """
+        result = []
+        stack = [(self._root, False)] if self._root else []
+        while stack:
+            node, inside = stack.pop()
+            if not inside:
+                b = node.box
+                classification = frustum.classifyBox((b[0], b[1], b[2]), (b[3], b[4], b[5]))
+                if classification == Frustum.OUTSIDE:
+                    continue
+                inside = classification == Frustum.INSIDE
+            if node.isLeaf():
+                if inside:
+                    result.append((node.key, Frustum.INSIDE))
+                else:
+                    b = self._boxes[node.key]
+                    classification = frustum.classifyBox((b[0], b[1], b[2]), (b[3], b[4], b[5]))
+                    if classification != Frustum.OUTSIDE:
+                        result.append((node.key, classification))
+            else:
+                stack.append((node.left, inside))
+                stack.append((node.right, inside))
+        return result
+
+    def nearest(self, point, count=1, maxDistance=float('inf')):
+        """
+        Finds the keys whose boxes are nearest to a point (best-first search).
+
+        @param point       The point (an object implementing the [] operator for x, y, z).
+        @param count       The maximum number of keys.
+        @param maxDistance The maximum distance to the point.
+        @returns           A list of (distance, key) tuples sorted by the distance of the box to the point.
+        """
+        point = (point[0], point[1], point[2])
+        limit = maxDistance * maxDistance
+        result = []
+        counter = itertools.count()
+        heap = [(0.0, next(counter), self._root, False)] if self._root else []
+        while heap and len(result) < count:
+            d2, _, node, exact = heapq.heappop(heap)
+            if d2 > limit:
+                break
+            if exact:
+                result.append((math.sqrt(d2), node.key))
+            elif node.isLeaf():
+                heapq.heappush(heap, (_distanceSquared(self._boxes[node.key], point), next(counter), node, True))
+            else:
+                for child in (node.left, node.right):
+                    heapq.heappush(heap, (_distanceSquared(child.box, point), next(counter), child, False))
+        return result
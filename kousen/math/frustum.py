@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""
+This module provides all utility functions and class defintions for view frustum operations.
+
+A Frustum is described by the six world space planes (left, right, bottom, top, near, far) of a clip matrix (i.e. the
+projection matrix multiplied by the view matrix); the plane normals point inside the frustum.
+"""
+import numpy
+from kousen.math.matrix import Matrix4x4
+
+class Frustum(object):
+    """
+    Frustum provides the sphere and axis aligned box classification of a view frustum.
+    """
+    __slots__ = ('_matrix', '_planes', '_planelist')
+
+    # The classifications, ordered by visibility.
+    OUTSIDE, INTERSECTING, INSIDE = range(3)
+
+    def __init__(self, matrix):
+        """
+        Constructor.
+
+        @param matrix The Matrix4x4 clip matrix (i.e. Projection * View) of the frustum.
+        """
+        self._matrix = matrix
+        m = matrix.toArray()
+        # Gribb & Hartmann: the planes are the sums and differences of the clip matrix rows.
+        planes = numpy.array([
+            m[3] + m[0], m[3] - m[0],
+            m[3] + m[1], m[3] - m[1],
+            m[3] + m[2], m[3] - m[2]])
+        planes /= numpy.sqrt(numpy.einsum('ij,ij->i', planes[:, :3], planes[:, :3]))[:, numpy.newaxis]
+        self._planes = planes
+        # The single classifications iterate over Python tuples; NumPy only pays off for batches.
+        self._planelist = [tuple(plane) for plane in planes.tolist()]
+
+    def __repr__(self):
+        """
+        Generates the "official" string representation of the Frustum
+
+        @returns A string representation of the Frustum
+        """
+        return "{0}({1})".format(self.__class__.__name__, self._planelist)
+
+    @classmethod
+    def perspective(cls, left, right, bottom, top, znear, zfar):
+        """
+        Creates a perspective projection matrix (i.e. the glFrustum matrix).
+
+        @param left   The left coordinate of the viewport at znear.
+        @param right  The right coordinate of the viewport at znear.
+        @param bottom The bottom coordinate of the viewport at znear.
+        @param top    The top coordinate of the viewport at znear.
+        @param znear  The distance to the near clipping plane.
+        @param zfar   The distance to the far clipping plane.
+        @returns      A Matrix4x4 Projection Matrix
+        """
+        return Matrix4x4.fromData([
+            2.0 * znear / (right - left), 0.0, 0.0, 0.0,
+            0.0, 2.0 * znear / (top - bottom), 0.0, 0.0,
+            (right + left) / (right - left), (top + bottom) / (top - bottom), -(zfar + znear) / (zfar - znear), -1.0,
+            0.0, 0.0, -2.0 * zfar * znear / (zfar - znear), 0.0
+            ], Matrix4x4.PROJECTIVE)
+
+    @classmethod
+    def fromView(cls, viewMatrix, viewport, znear, zfar):
+        """
+        Creates a Frustum from a view matrix and a perspective projection.
+
+        @param viewMatrix The Matrix4x4 view (i.e. LookAt) matrix.
+        @param viewport   The tuple of (left, right, bottom, top) of the viewport at znear.
+        @param znear      The distance to the near clipping plane.
+        @param zfar       The distance to the far clipping plane.
+        @returns          A Frustum instance.
+        """
+        return cls(cls.perspective(viewport[0], viewport[1], viewport[2], viewport[3], znear, zfar) * viewMatrix)
+
+    @classmethod
+    def fromCamera(cls, camera):
+        """
+        Creates the Frustum of a camera.
+
+        @param camera An object implementing the projectionMatrix(), viewport, znear and zfar camera interface.
+        @returns      A Frustum instance.
+        """
+        return cls.fromView(camera.projectionMatrix(), camera.viewport, camera.znear, camera.zfar)
+
+    def matrix(self):
+        """
+        Returns the clip matrix of the frustum.
+
+        @returns The Matrix4x4 clip matrix (i.e. Projection * View).
+        """
+        return self._matrix
+
+    def planes(self):
+        """
+        Returns the frustum planes.
+
+        @returns A (6,4) array of the (a, b, c, d) left, right, bottom, top, near and far planes, with inward unit normals.
+        """
+        return self._planes
+
+    def classifySphere(self, center, radius):
+        """
+        Classifies a sphere.
+
+        @param center The center of the sphere (an object implementing the [] operator for x, y, z).
+        @param radius The radius of the sphere.
+        @returns      Frustum.OUTSIDE, Frustum.INTERSECTING or Frustum.INSIDE.
+        """
+        x, y, z = center[0], center[1], center[2]
+        result = self.INSIDE
+        for a, b, c, d in self._planelist:
+            distance = a*x + b*y + c*z + d
+            if distance < -radius:
+                return self.OUTSIDE
+            if distance < radius:
+                result = self.INTERSECTING
+        return result
+
+    def classifyBox(self, minimum, maximum):
+        """
+        Classifies an axis aligned box.
+
+        @param minimum The minimum corner of the box (an object implementing the [] operator for x, y, z).
+        @param maximum The maximum corner of the box (an object implementing the [] operator for x, y, z).
+        @returns       Frustum.OUTSIDE, Frustum.INTERSECTING or Frustum.INSIDE.
+        """
+        x0, y0, z0 = minimum[0], minimum[1], minimum[2]
+        x1, y1, z1 = maximum[0], maximum[1], maximum[2]
+        result = self.INSIDE
+        for a, b, c, d in self._planelist:
+            # The corner furthest along the plane normal (p-vertex), then the nearest one (n-vertex).
+            if (a * (x1 if a > 0 else x0) + b * (y1 if b > 0 else y0) + c * (z1 if c > 0 else z0) + d) < 0:
+                return self.OUTSIDE
+            if (a * (x0 if a > 0 else x1) + b * (y0 if b > 0 else y1) + c * (z0 if c > 0 else z1) + d) < 0:
+                result = self.INTERSECTING
+        return result
+
+    def _classify(self, distances, radii):
+        """
+        Internal method to classify a batch of volumes from their plane distances.
+
+        @param distances An (N,6) array of the signed distances of the volume centers to the planes.
+        @param radii     An (N,6) or (N,1) array of the volume extents along the plane normals.
+        @returns         An (N,) int8 array of classifications.
+        """
+        result = numpy.full(len(distances), self.INTERSECTING, dtype=numpy.int8)
+        result[numpy.all(distances >= radii, axis=1)] = self.INSIDE
+        result[numpy.any(distances < -radii, axis=1)] = self.OUTSIDE
+        return result
+
+    def classifySpheres(self, centers, radii):
+        """
+        Classifies a batch of spheres.
+
+        @param centers An (N,3) array of sphere centers.
+        @param radii   An (N,) array of sphere radii (or a single radius).
+        @returns       An (N,) int8 array of Frustum.OUTSIDE, Frustum.INTERSECTING or Frustum.INSIDE.
+        """
+        centers = numpy.asarray(centers, dtype=numpy.float64).reshape((-1, 3))
+        radii = numpy.asarray(radii, dtype=numpy.float64) * numpy.ones(len(centers))
+        distances = numpy.dot(centers, self._planes[:, :3].T) + self._planes[:, 3]
+        return self._classify(distances, radii[:, numpy.newaxis])
+
+    def classifyBoxes(self, minima, maxima):
+        """
+        Classifies a batch of axis aligned boxes.
+
+        @param minima An (N,3) array of the minimum box corners.
+        @param maxima An (N,3) array of the maximum box corners.
+        @returns      An (N,) int8 array of Frustum.OUTSIDE, Frustum.INTERSECTING or Frustum.INSIDE.
+        """
+        minima = numpy.asarray(minima, dtype=numpy.float64).reshape((-1, 3))
+        maxima = numpy.asarray(maxima, dtype=numpy.float64).reshape((-1, 3))
+        centers = 0.5 * (minima + maxima)
+        extents = 0.5 * (maxima - minima)
+        distances = numpy.dot(centers, self._planes[:, :3].T) + self._planes[:, 3]
+        radii = numpy.dot(extents, numpy.abs(self._planes[:, :3]).T)
+        return self._classify(distances, radii)
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""
+This module provides all utility functions for exact ray intersection tests.
+
+A ray is described by an origin and a direction (objects implementing the [] operator for x, y, z); the tests return
+the smallest non negative ray parameter t of the hit (i.e. the hit point is origin + t * direction), so the distances
+are in multiples of the direction length.  The primitives are solid: a ray starting inside a primitive hits it at 0.
+The primitives are in their local space.
+"""
+import math
+
+def _dot(a, b):
+    """
+    Calculates the dot product of two 3D sequences.
+    """
+    return a[0] * b[0] + a[1] * b[1] + a[2] * b[2]
+
+def _nearest(candidates):
+    """
+    Selects the smallest non negative ray parameter.
+
+    @param candidates An iterable of ray parameters (or None).
+    @returns          The smallest non negative parameter; None if there is none.
+    """
+    hits = [t for t in candidates if t is not None and t >= 0.0]
+    return min(hits) if hits else None
+
+def _quadratic(a, b, c):
+    """
+    Solves a * t^2 + 2 * b * t + c = 0.
+
+    @returns A tuple of the (ascending) real roots; empty if there are none.
+    """
+    if abs(a) < 1e-12:
+        return (-c / (2.0 * b),) if abs(b) > 1e-12 else ()
+    discriminant = b * b - a * c
+    if discriminant < 0.0:
+        return ()
+    root = math.sqrt(discriminant)
+    t0, t1 = (-b - root) / a, (-b + root) / a
+    return (t0, t1) if t0 <= t1 else (t1, t0)
+
+def raySphere(origin, direction, radius, center=(0.0, 0.0, 0.0)):
+    """
+    Intersects a ray with a sphere.
+
+    @param origin    The origin of the ray.
+    @param direction The direction of the ray.
+    @param radius    The radius of the sphere.
+    @param center    The center of the sphere.
+    @returns         The ray parameter of the nearest hit (0 if the origin is inside); None if the ray misses.
+    """
+    o = (origin[0] - center[0], origin[1] - center[1], origin[2] - center[2])
+    if _dot(o, o) <= radius * radius:
+        return 0.0
+    return _nearest(_quadratic(_dot(direction, direction), _dot(o, direction), _dot(o, o) - radius * radius))
+
+def rayBox(origin, direction, minimum, maximum):
+    """
+    Intersects a ray with an axis aligned box (the 'slab' test).
+
+    @param origin    The origin of the ray.
+    @param direction The direction of the ray.
+    @param minimum   The minimum corner of the box.
+    @param maximum   The maximum corner of the box.
+    @returns         The ray parameter of the nearest hit (0 if the origin is inside); None if the ray misses.
+    """
+    tmin, tmax = 0.0, float('inf')
+    for i in range(3):
+        if direction[i] == 0.0:
+            if origin[i] < minimum[i] or origin[i] > maximum[i]:
+                return None
+            continue
+        t0 = (minimum[i] - origin[i]) / direction[i]
+        t1 = (maximum[i] - origin[i]) / direction[i]
+        if t0 > t1:
+            t0, t1 = t1, t0
+        tmin = max(tmin, t0)
+        tmax = min(tmax, t1)
+        if tmin > tmax:
+            return None
+    return tmin
+
+def _rayCap(origin, direction, axis, height, radius):
+    """
+    Intersects a ray with a disc perpendicular to an axis.
+
+    @param axis   The unit axis (the disc normal), through the origin of the local space.
+    @param height The position of the disc along the axis.
+    @param radius The radius of the disc.
+    @returns      The ray parameter of the hit; None if the ray misses.
+    """
+    da = _dot(direction, axis)
+    if da == 0.0:
+        return None
+    t = (height - _dot(origin, axis)) / da
+    p = [origin[i] + t * direction[i] for i in range(3)]
+    h = _dot(p, axis)
+    r = [p[i] - h * axis[i] for i in range(3)]
+    return t if _dot(r, r) <= radius * radius else None
+
+def _rayRevolution(origin, direction, axis, radius, length, slope):
+    """
+    Intersects a ray with the lateral surface of a capped cylinder (slope 0) or cone (slope radius / length).
+
+    The surface extends from the origin along the axis; its radius at height h along the axis is radius - slope * h.
+
+    @returns The ray parameters of the lateral hits within the length; [0] if the ray origin is inside the solid.
+    """
+    oa, da = _dot(origin, axis), _dot(direction, axis)
+    o = [origin[i] - oa * axis[i] for i in range(3)]
+    if 0.0 <= oa <= length and math.sqrt(_dot(o, o)) <= radius - slope * oa:
+        return [0.0]
+    d = [direction[i] - da * axis[i] for i in range(3)]
+    # |o + t d|^2 = (radius - slope * (oa + t da))^2
+    ro = radius - slope * oa
+    rd = -slope * da
+    roots = _quadratic(_dot(d, d) - rd * rd, _dot(o, d) - ro * rd, _dot(o, o) - ro * ro)
+    return [t for t in roots if 0.0 <= oa + t * da <= length and ro + t * rd >= 0.0]
+
+def rayCylinder(origin, direction, axis, radius, length):
+    """
+    Intersects a ray with a capped cylinder extending from the origin along an axis.
+
+    @param origin    The origin of the ray.
+    @param direction The direction of the ray.
+    @param axis      The unit axis of the cylinder.
+    @param radius    The radius of the cylinder.
+    @param length    The length of the cylinder.
+    @returns         The ray parameter of the nearest hit (0 if the origin is inside); None if the ray misses.
+    """
+    hits = _rayRevolution(origin, direction, axis, radius, length, 0.0)
+    hits.append(_rayCap(origin, direction, axis, 0.0, radius))
+    hits.append(_rayCap(origin, direction, axis, length, radius))
+    return _nearest(hits)
+
+def rayCone(origin, direction, axis, radius, length):
+    """
+    Intersects a ray with a capped cone, with its base at the origin and its apex along an axis.
+
+    @param origin    The origin of the ray.
+    @param direction The direction of the ray.
+    @param axis      The unit axis of the cone.
+    @param radius    The radius of the cone base.
+    @param length    The length (i.e. height) of the cone.
+    @returns         The ray parameter of the nearest hit (0 if the origin is inside); None if the ray misses.
+    """
+    if length <= 0.0:
+        return None
+    hits = _rayRevolution(origin, direction, axis, radius, length, radius / length)
+    hits.append(_rayCap(origin, direction, axis, 0.0, radius))
+    return _nearest(hits)
@@ -4,24 +4,35 @@ This module provides all utility functions and class defintions for matrix opera
 """
 
 import math
-import PySide.QtCore
+import numpy
 from kousen.math.point import Point3D
 from kousen.math.vector import Vector3D
 
-class Matrix4x4(PySide.QtCore.QObject):
+class Matrix4x4(object):
     """
-    Matrix4x4 provides a simplified but self contained 4x4 Matrix class.
+    Matrix4x4 provides a simplified but self contained 4x4 Matrix value class.
+
+    The matrix caches its kind (identity, translation, rigid, affine or projective) so that operations such as the
+    inverse pick the cheapest algorithm; the kind is reset by the [] operator setter.
 
     @warning The Matrix4x4 is Column Major.
+    The matrix also caches a contiguous float32 copy of its data for OpenGL (e.g. glMultMatrixf); the copy is
+    discarded by the [] operator setter as well.
+
+    @warning The kind and the float32 copy are not reset when the raw data is modified directly.
     """
-    dataChanging = PySide.QtCore.Signal(object)
-    dataChanged  = PySide.QtCore.Signal(object)
+    __slots__ = ('_data', '_kind', '_buffer')
+
+    # The matrix kinds, from the most to the least specific; a product is (at most) of the least specific kind of its factors.
+    IDENTITY, TRANSLATION, RIGID, AFFINE, PROJECTIVE = range(5)
+
+    # The tolerance of the rigid (orthonormal rotation) classification.
+    EPSILON = 1e-9
 
     def __init__(self):
         """
         Constructor.
         """
-        super(Matrix4x4, self).__init__()
         self.init()
 
     def __repr__(self):
@@ -51,19 +62,6 @@ class Matrix4x4(PySide.QtCore.QObject):
             raise IndexError()
         return self._data[key]
 
-    def __setitem__(self, key, value):
-        """
-        The [] operator setter.
-
-        @param key The lookup index to the internal data.
-        @param value The lookup index to the internal data.
-        """
-        if key >= len(self._data):
-            raise IndexError()
-        self._dataChanging(key)
-        self._data[key] = value
-        self._dataChanged(key)
-
     def __iter__(self):
         """
         Return an iterator object.
@@ -87,6 +85,8 @@ class Matrix4x4(PySide.QtCore.QObject):
         """
         if index < len(self._data):
             self._data[index] = value
+            self._kind = None
+            self._buffer = None
 
     def __mul__(self, other):
         """
@@ -96,7 +96,7 @@ class Matrix4x4(PySide.QtCore.QObject):
             3) Matrix Point Multiplication:   Product = Self * Point
 
         @param   other An instance of a 1) Matrix4x4, 2) Vector3D, or 3) Point3D.
-        @returns       The Matrix Product if Matrix multiplication; The Vector3D product if Matrix Vector multiplication; the Point3D product if Matrix Point multiplication; None otherwise.
+        @returns       The Matrix Product if Matrix multiplication; The Vector3D product if Matrix Vector multiplication; the Point3D product if Matrix Point multiplication; NotImplemented otherwise (e.g. to defer to the reflected operation of a Matrix4x4Array).
         """
         if isinstance(other,Matrix4x4):
             return self.multMatrix(other)
@@ -107,7 +107,7 @@ class Matrix4x4(PySide.QtCore.QObject):
         if isinstance(other,Point3D):
             return self.multPoint3D(other)
 
-        return None
+        return NotImplemented
 
     @classmethod
     def identity(cls):
@@ -119,6 +119,7 @@ class Matrix4x4(PySide.QtCore.QObject):
         M[ 1] = 0.0;   M[ 5] = 1.0;   M[ 9] = 0.0;   M[13] = 0.0;
         M[ 2] = 0.0;   M[ 6] = 0.0;   M[10] = 1.0;   M[14] = 0.0;
         M[ 3] = 0.0;   M[ 7] = 0.0;   M[11] = 0.0;   M[15] = 1.0;
+        M._kind = cls.IDENTITY
         return M
 
     @classmethod
@@ -134,6 +135,7 @@ class Matrix4x4(PySide.QtCore.QObject):
         M[ 1] = 0.0;   M[ 5] = 1.0;   M[ 9] = 0.0;   M[13] = vector3D.y;
         M[ 2] = 0.0;   M[ 6] = 0.0;   M[10] = 1.0;   M[14] = vector3D.z;
         M[ 3] = 0.0;   M[ 7] = 0.0;   M[11] = 0.0;   M[15] = 1.0;
+        M._kind = cls.TRANSLATION
         return M
 
     @classmethod
@@ -179,16 +181,21 @@ class Matrix4x4(PySide.QtCore.QObject):
     @classmethod
     def scale(cls, scaleFactor, originPoint = None):
         """
-        Creates a Uniform Scale Matrix from an scalar factor.
+        Creates a Scale Matrix from an scalar factor (uniform scale) or a Vector3D of per axis factors (non-uniform scale).
 
-        @param scaleFactor    The scalar factor of the scale.
+        @param scaleFactor    The scalar factor of the scale, or a Vector3D of the x, y and z factors.
         @param originPoint    The origin point of the scale; if None assume the origin (0,0,0).
         @returns A Matrix4x4 Rotation Matrix
         """
+        if isinstance(scaleFactor, Vector3D):
+            sx, sy, sz = scaleFactor.x, scaleFactor.y, scaleFactor.z
+        else:
+            sx = sy = sz = scaleFactor
+
         M = cls()
-        M[ 0] = scaleFactor; M[ 4] = 0.0;         M[ 8] = 0.0;         M[12] = 0.0;
-        M[ 1] = 0.0;         M[ 5] = scaleFactor; M[ 9] = 0.0;         M[13] = 0.0;
-        M[ 2] = 0.0;         M[ 6] = 0.0;         M[10] = scaleFactor; M[14] = 0.0;
+        M[ 0] = sx;          M[ 4] = 0.0;         M[ 8] = 0.0;         M[12] = 0.0;
+        M[ 1] = 0.0;         M[ 5] = sy;          M[ 9] = 0.0;         M[13] = 0.0;
+        M[ 2] = 0.0;         M[ 6] = 0.0;         M[10] = sz;          M[14] = 0.0;
         M[ 3] = 0.0;         M[ 7] = 0.0;         M[11] = 0.0;         M[15] = 1.0;
 
         if originPoint:
@@ -245,25 +252,42 @@ class Matrix4x4(PySide.QtCore.QObject):
         # step two: postmultiply by a translation matrix
         return M * cls.translation( - eyePoint.toVector3D() )
 
-    def _dataChanging(self, index):
+    def data(self):
         """
-        Internal method to emit the DataChanging signal.
+        Accessor method to access the raw data
+
+        @returns The list of values
         """
-        self.dataChanging.emit(index)
+        return self._data
 
-    def _dataChanged(self, index):
+    def buffer(self):
         """
-        Internal method to emit the DataChanged signal.
+        Accessor method to access the data as a contiguous, read-only float32 array (column major) ready for OpenGL.
+
+        The array is created on first request and cached until the matrix changes; passing it to
+        glMultMatrixf or glLoadMatrixf requires no conversion.
+
+        @returns The (16,) float32 array of values
         """
-        self.dataChanged.emit(index)
+        if self._buffer is None:
+            self._buffer = numpy.array(self._data, dtype=numpy.float32)
+            self._buffer.setflags(write=False)
+        return self._buffer
 
-    def data(self):
+    @classmethod
+    def fromData(cls, data, kind=None):
         """
-        Accessor method to access the raw data
+        Creates a Matrix from raw (column major) data, without initializing it to the Identity Matrix first.
 
-        @returns The list of values
+        @param data The iterable of the 16 values.
+        @param kind The kind of the matrix if known; if None it is classified on request.
+        @returns A Matrix4x4 with the values.
         """
-        return self._data
+        M = cls.__new__(cls)
+        M._data = list(data)
+        M._kind = kind
+        M._buffer = None
+        return M
 
     def duplicate(self):
         """
@@ -271,9 +295,176 @@ class Matrix4x4(PySide.QtCore.QObject):
 
         @returns Another Matrix4x4 with the same values as self
         """
-        M = self.__class__()
-        M._data = list(self._data)
-        return M
+        return self.fromData(self._data, self._kind)
+
+    def _classify(self):
+        """
+        Internal method to classify the matrix from internal data.
+
+        @returns The most specific kind of the matrix.
+        """
+        m = self._data
+        if m[3] != 0.0 or m[7] != 0.0 or m[11] != 0.0 or m[15] != 1.0:
+            return self.PROJECTIVE
+
+        if m[0] == 1.0 and m[5] == 1.0 and m[10] == 1.0 and not (m[1] or m[2] or m[4] or m[6] or m[8] or m[9]):
+            return self.TRANSLATION if (m[12] or m[13] or m[14]) else self.IDENTITY
+
+        # Rigid: the columns of the 3x3 part are orthonormal and right handed (i.e. a rotation, no reflection).
+        e = self.EPSILON
+        if (abs(m[0]*m[0] + m[1]*m[1] + m[ 2]*m[ 2] - 1.0) < e and
+            abs(m[4]*m[4] + m[5]*m[5] + m[ 6]*m[ 6] - 1.0) < e and
+            abs(m[8]*m[8] + m[9]*m[9] + m[10]*m[10] - 1.0) < e and
+            abs(m[0]*m[4] + m[1]*m[5] + m[ 2]*m[ 6]) < e and
+            abs(m[0]*m[8] + m[1]*m[9] + m[ 2]*m[10]) < e and
+            abs(m[4]*m[8] + m[5]*m[9] + m[ 6]*m[10]) < e and
+            self._determinant3() > 0.0):
+            return self.RIGID
+        return self.AFFINE
+
+    def _determinant3(self):
+        """
+        Internal method to calculate the determinant of the upper 3x3 matrix.
+
+        @returns The determinant.
+        """
+        m = self._data
+        return (m[0] * (m[5]*m[10] - m[9]*m[6]) +
+                m[4] * (m[9]*m[ 2] - m[1]*m[10]) +
+                m[8] * (m[1]*m[ 6] - m[5]*m[ 2]))
+
+    def kind(self):
+        """
+        Returns the cached kind of the matrix, classifying it on first request.
+
+        @returns One of Matrix4x4.IDENTITY, TRANSLATION, RIGID, AFFINE or PROJECTIVE.
+        """
+        if self._kind is None:
+            self._kind = self._classify()
+        return self._kind
+
+    def isAffine(self):
+        """
+        Queries if the matrix is affine (i.e. not projective).
+
+        @returns True if the last row of the matrix is (0, 0, 0, 1); False otherwise.
+        """
+        return self.kind() != self.PROJECTIVE
+
+    def determinant(self):
+        """
+        Calculates the determinant.
+
+        @returns The determinant.
+        """
+        kind = self.kind()
+        if kind <= self.RIGID:
+            return 1.0
+        if kind == self.AFFINE:
+            return self._determinant3()
+        return float(numpy.linalg.det(self.toArray()))
+
+    def inverse(self):
+        """
+        Calculates the inverse, using the cheapest algorithm of the matrix kind:
+            1) Identity:    the identity.
+            2) Translation: the negated translation.
+            3) Rigid:       the transposed rotation and the inversely rotated, negated translation.
+            4) Affine:      the 3x3 cofactor inverse and the inversely transformed, negated translation.
+            5) Projective:  the general 4x4 inverse.
+
+        @returns The inverse Matrix4x4.
+        @exception ArithmeticError if the matrix is singular.
+        """
+        kind = self.kind()
+        m = self._data
+        if kind == self.IDENTITY:
+            return self.duplicate()
+
+        if kind == self.TRANSLATION:
+            return self.fromData([
+                1.0, 0.0, 0.0, 0.0,
+                0.0, 1.0, 0.0, 0.0,
+                0.0, 0.0, 1.0, 0.0,
+                -m[12], -m[13], -m[14], 1.0
+                ], kind)
+
+        if kind == self.RIGID:
+            return self.fromData([
+                m[0], m[4], m[ 8], 0.0,
+                m[1], m[5], m[ 9], 0.0,
+                m[2], m[6], m[10], 0.0,
+                -(m[0]*m[12] + m[1]*m[13] + m[ 2]*m[14]),
+                -(m[4]*m[12] + m[5]*m[13] + m[ 6]*m[14]),
+                -(m[8]*m[12] + m[9]*m[13] + m[10]*m[14]),
+                1.0
+                ], kind)
+
+        if kind == self.AFFINE:
+            determinant = self._determinant3()
+            if determinant == 0.0:
+                raise ArithmeticError("The matrix is singular.")
+            d = 1.0 / determinant
+            # The cofactors of the 3x3 matrix (rows a, b, c), transposed into the column major inverse.
+            i0 = (m[5]*m[10] - m[9]*m[ 6]) * d
+            i1 = (m[9]*m[ 2] - m[1]*m[10]) * d
+            i2 = (m[1]*m[ 6] - m[5]*m[ 2]) * d
+            i4 = (m[8]*m[ 6] - m[4]*m[10]) * d
+            i5 = (m[0]*m[10] - m[8]*m[ 2]) * d
+            i6 = (m[4]*m[ 2] - m[0]*m[ 6]) * d
+            i8 = (m[4]*m[ 9] - m[8]*m[ 5]) * d
+            i9 = (m[8]*m[ 1] - m[0]*m[ 9]) * d
+            i10 = (m[0]*m[ 5] - m[4]*m[ 1]) * d
+            return self.fromData([
+                i0, i1, i2, 0.0,
+                i4, i5, i6, 0.0,
+                i8, i9, i10, 0.0,
+                -(i0*m[12] + i4*m[13] + i8*m[14]),
+                -(i1*m[12] + i5*m[13] + i9*m[14]),
+                -(i2*m[12] + i6*m[13] + i10*m[14]),
+                1.0
+                ], kind)
+
+        try:
+            inverse = numpy.linalg.inv(self.toArray())
+        except numpy.linalg.LinAlgError:
+            raise ArithmeticError("The matrix is singular.")
+        return self.fromData(inverse.ravel(order='F').tolist(), kind)
+
+    def decompose(self):
+        """
+        Decomposes an affine matrix into its translation, rotation and scale:  Self = Translation * Rotation * Scale
+
+        A reflection is returned as a negative x scale factor; shears are not represented.
+
+        @returns A tuple of the translation Vector3D, the rotation Matrix4x4 and the scale Vector3D.
+        @exception ValueError if the matrix is projective.
+        @exception ArithmeticError if the matrix is singular.
+        """
+        kind = self.kind()
+        if kind == self.PROJECTIVE:
+            raise ValueError("A projective matrix can not be decomposed.")
+
+        m = self._data
+        translation = Vector3D(m[12], m[13], m[14])
+        if kind <= self.RIGID:
+            rotation = self.fromData(m[:12] + [0.0, 0.0, 0.0, 1.0], self.IDENTITY if kind == self.TRANSLATION else kind)
+            return translation, rotation, Vector3D(1.0, 1.0, 1.0)
+
+        sx = math.sqrt(m[0]*m[0] + m[1]*m[1] + m[ 2]*m[ 2])
+        sy = math.sqrt(m[4]*m[4] + m[5]*m[5] + m[ 6]*m[ 6])
+        sz = math.sqrt(m[8]*m[8] + m[9]*m[9] + m[10]*m[10])
+        if sx == 0.0 or sy == 0.0 or sz == 0.0:
+            raise ArithmeticError("The matrix is singular.")
+        if self._determinant3() < 0.0:
+            sx = -sx
+        rotation = self.fromData([
+            m[0]/sx, m[1]/sx, m[ 2]/sx, 0.0,
+            m[4]/sy, m[5]/sy, m[ 6]/sy, 0.0,
+            m[8]/sz, m[9]/sz, m[10]/sz, 0.0,
+            0.0, 0.0, 0.0, 1.0
+            ])
+        return translation, rotation, Vector3D(sx, sy, sz)
 
     def init(self):
         """
@@ -283,6 +474,8 @@ class Matrix4x4(PySide.QtCore.QObject):
                    0.0, 1.0, 0.0, 0.0,
                    0.0, 0.0, 1.0, 0.0,
                    0.0, 0.0, 0.0, 1.0 ]
+        self._kind = self.IDENTITY
+        self._buffer = None
 
     def multMatrix(self, other):
         """
@@ -291,31 +484,40 @@ class Matrix4x4(PySide.QtCore.QObject):
         @param   other An instance of a Matrix4x4.
         @returns       The Matrix Product of the Matrix multiplication.
         """
-        # Convenience Variables:
-        a = self
-        b = other
-
-        M = self.__class__()
-        M[ 0] = a[ 0] * b[ 0]  +  a[ 4] * b[ 1]  +  a[ 8] * b[ 2]  +  a[12] * b[ 3]
-        M[ 1] = a[ 1] * b[ 0]  +  a[ 5] * b[ 1]  +  a[ 9] * b[ 2]  +  a[13] * b[ 3]
-        M[ 2] = a[ 2] * b[ 0]  +  a[ 6] * b[ 1]  +  a[10] * b[ 2]  +  a[14] * b[ 3]
-        M[ 3] = a[ 3] * b[ 0]  +  a[ 7] * b[ 1]  +  a[11] * b[ 2]  +  a[15] * b[ 3]
-
-        M[ 4] = a[ 0] * b[ 4]  +  a[ 4] * b[ 5]  +  a[ 8] * b[ 6]  +  a[12] * b[ 7]
-        M[ 5] = a[ 1] * b[ 4]  +  a[ 5] * b[ 5]  +  a[ 9] * b[ 6]  +  a[13] * b[ 7]
-        M[ 6] = a[ 2] * b[ 4]  +  a[ 6] * b[ 5]  +  a[10] * b[ 6]  +  a[14] * b[ 7]
-        M[ 7] = a[ 3] * b[ 4]  +  a[ 7] * b[ 5]  +  a[11] * b[ 6]  +  a[15] * b[ 7]
-
-        M[ 8] = a[ 0] * b[ 8]  +  a[ 4] * b[ 9]  +  a[ 8] * b[10]  +  a[12] * b[11]
-        M[ 9] = a[ 1] * b[ 8]  +  a[ 5] * b[ 9]  +  a[ 9] * b[10]  +  a[13] * b[11]
-        M[10] = a[ 2] * b[ 8]  +  a[ 6] * b[ 9]  +  a[10] * b[10]  +  a[14] * b[11]
-        M[11] = a[ 3] * b[ 8]  +  a[ 7] * b[ 9]  +  a[11] * b[10]  +  a[15] * b[11]
-
-        M[12] = a[ 0] * b[12]  +  a[ 4] * b[13]  +  a[ 8] * b[14]  +  a[12] * b[15]
-        M[13] = a[ 1] * b[12]  +  a[ 5] * b[13]  +  a[ 9] * b[14]  +  a[13] * b[15]
-        M[14] = a[ 2] * b[12]  +  a[ 6] * b[13]  +  a[10] * b[14]  +  a[14] * b[15]
-        M[15] = a[ 3] * b[12]  +  a[ 7] * b[13]  +  a[11] * b[14]  +  a[15] * b[15]
-        return M
+        # A known identity factor needs no multiplication.
+        if self._kind == self.IDENTITY:
+            return other.duplicate()
+        if other._kind == self.IDENTITY:
+            return self.duplicate()
+
+        # The product is (at most) of the least specific kind of its factors.
+        kind = max(self._kind, other._kind) if self._kind is not None and other._kind is not None else None
+
+        # Convenience Variables (the raw data avoids the [] operator overhead):
+        a = self._data
+        b = other._data
+
+        return self.fromData([
+            a[ 0] * b[ 0]  +  a[ 4] * b[ 1]  +  a[ 8] * b[ 2]  +  a[12] * b[ 3],
+            a[ 1] * b[ 0]  +  a[ 5] * b[ 1]  +  a[ 9] * b[ 2]  +  a[13] * b[ 3],
+            a[ 2] * b[ 0]  +  a[ 6] * b[ 1]  +  a[10] * b[ 2]  +  a[14] * b[ 3],
+            a[ 3] * b[ 0]  +  a[ 7] * b[ 1]  +  a[11] * b[ 2]  +  a[15] * b[ 3],
+
+            a[ 0] * b[ 4]  +  a[ 4] * b[ 5]  +  a[ 8] * b[ 6]  +  a[12] * b[ 7],
+            a[ 1] * b[ 4]  +  a[ 5] * b[ 5]  +  a[ 9] * b[ 6]  +  a[13] * b[ 7],
+            a[ 2] * b[ 4]  +  a[ 6] * b[ 5]  +  a[10] * b[ 6]  +  a[14] * b[ 7],
+            a[ 3] * b[ 4]  +  a[ 7] * b[ 5]  +  a[11] * b[ 6]  +  a[15] * b[ 7],
+
+            a[ 0] * b[ 8]  +  a[ 4] * b[ 9]  +  a[ 8] * b[10]  +  a[12] * b[11],
+            a[ 1] * b[ 8]  +  a[ 5] * b[ 9]  +  a[ 9] * b[10]  +  a[13] * b[11],
+            a[ 2] * b[ 8]  +  a[ 6] * b[ 9]  +  a[10] * b[10]  +  a[14] * b[11],
+            a[ 3] * b[ 8]  +  a[ 7] * b[ 9]  +  a[11] * b[10]  +  a[15] * b[11],
+
+            a[ 0] * b[12]  +  a[ 4] * b[13]  +  a[ 8] * b[14]  +  a[12] * b[15],
+            a[ 1] * b[12]  +  a[ 5] * b[13]  +  a[ 9] * b[14]  +  a[13] * b[15],
+            a[ 2] * b[12]  +  a[ 6] * b[13]  +  a[10] * b[14]  +  a[14] * b[15],
+            a[ 3] * b[12]  +  a[ 7] * b[13]  +  a[11] * b[14]  +  a[15] * b[15]
+            ], kind)
 
     def multVector3D(self, other):
         """
@@ -325,7 +527,7 @@ class Matrix4x4(PySide.QtCore.QObject):
         @returns       The Vector3D product of the Matrix Vector multiplication.
         """
         # Convenience Variables:
-        m = self
+        m = self._data
         v = other
         # Vectors (i.e direction & length) are Homogeneous Coordinate of the form (x,y,z,0) so we can simplify the mutiplication
         return Vector3D(
@@ -342,7 +544,7 @@ class Matrix4x4(PySide.QtCore.QObject):
         @returns       The Point3D product of the Matrix Point multiplication.
         """
         # Convenience Variables:
-        m = self
+        m = self._data
         p = other
         # Points are Homogeneous Coordinates of the form (x,y,z,1) so we can simplify the mutiplication
         return Point3D(
@@ -350,3 +552,96 @@ class Matrix4x4(PySide.QtCore.QObject):
             m[ 1]*p.x + m[ 5]*p.y + m[ 9]*p.z + m[13],
             m[ 2]*p.x + m[ 6]*p.y + m[10]*p.z + m[14]
             )
+
+    def toArray(self, dtype=numpy.float64):
+        """
+        Converts the matrix into a NumPy array.
+
+        @param dtype The floating point type of the array.
+        @returns     A (4,4) array indexed as [row, column].
+        """
+        return numpy.array(self._data, dtype=dtype).reshape((4, 4), order='F')
+
+    @staticmethod
+    def _buffers(source, out):
+        """
+        Internal method to view the source and output buffers of a bulk transformation as (N,3) arrays.
+
+        @param source An (N,3) array-like, or any buffer-protocol object of 3N values.
+        @param out    The (N,3) output buffer; if None an array is allocated.
+        @returns      A tuple of the source and output arrays.
+        @exception ValueError if the buffers can not be viewed as (N,3) arrays of the same length.
+        """
+        source = numpy.asarray(source)
+        if source.ndim == 1:
+            source = source.reshape((-1, 3))
+        if source.ndim != 2 or source.shape[1] != 3:
+            raise ValueError("source must be an (N,3) array")
+
+        if out is None:
+            out = numpy.empty(source.shape, dtype=source.dtype if source.dtype.kind == 'f' else numpy.float64)
+        else:
+            out = numpy.asarray(out)
+            if out.ndim == 1:
+                out = out.reshape((-1, 3))
+            if out.shape != source.shape:
+                raise ValueError("out must have the shape of the source")
+            # The products are accumulated in out; an in-place transformation needs the original values.
+            if numpy.may_share_memory(source, out):
+                source = source.copy()
+        return source, out
+
+    def transformPoints(self, points, out=None, divide=False):
+        """
+        Calculates the bulk Matrix Point Multiplication:  Product = Self * Point
+
+        Points are Homogeneous Coordinates of the form (x,y,z,1).
+
+        @param points An (N,3) array, or any buffer-protocol object of 3N values.
+        @param out    An optional (N,3) buffer receiving the products (e.g. the points themselves for an in-place transformation).
+        @param divide True to divide the products by w (i.e. for projective matrices); False to ignore w (affine matrices).
+        @returns      The (N,3) array of products.
+        """
+        points, out = self._buffers(points, out)
+        m = self.toArray(out.dtype)
+        out[...] = numpy.dot(points, m[:3, :3].T)
+        out += m[:3, 3]
+        if divide:
+            out /= (numpy.dot(points, m[3, :3]) + m[3, 3])[:, numpy.newaxis]
+        return out
+
+    def transformVectors(self, vectors, out=None):
+        """
+        Calculates the bulk Matrix Vector Multiplication:  Product = Self * Vector
+
+        Vectors (i.e direction & length) are Homogeneous Coordinate of the form (x,y,z,0).
+
+        @param vectors An (N,3) array, or any buffer-protocol object of 3N values.
+        @param out     An optional (N,3) buffer receiving the products.
+        @returns       The (N,3) array of products.
+        """
+        vectors, out = self._buffers(vectors, out)
+        m = self.toArray(out.dtype)
+        out[...] = numpy.dot(vectors, m[:3, :3].T)
+        return out
+
+    def transformNormals(self, normals, out=None, normalize=True):
+        """
+        Calculates the bulk Normal Multiplication:  Product = Transpose(Inverse(Self)) * Normal
+
+        Normals are transformed by the inverse transpose of the upper 3x3 matrix to remain perpendicular to transformed surfaces under non-uniform scales.
+
+        @param normals   An (N,3) array, or any buffer-protocol object of 3N values.
+        @param out       An optional (N,3) buffer receiving the products.
+        @param normalize True to normalize the products.
+        @returns         The (N,3) array of products.
+        @exception numpy.linalg.LinAlgError if the matrix is singular.
+        """
+        normals, out = self._buffers(normals, out)
+        # Row vectors: n' = n * Inverse(M), i.e. Transpose(Inverse(M)) * n as a column vector.
+        m = numpy.linalg.inv(self.toArray()[:3, :3])
+        out[...] = numpy.dot(normals, m)
+        if normalize:
+            lengths = numpy.sqrt(numpy.einsum('ij,ij->i', out, out))
+            out /= numpy.where(lengths > 0, lengths, 1)[:, numpy.newaxis]
+        return out
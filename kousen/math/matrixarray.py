@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+"""
+This module provides all utility functions and class defintions for batched matrix operations.
+
+A Matrix4x4Array stores N matrices in an (N,4,4) NumPy array indexed as [matrix, row, column]; the conversion to and
+from the column major Matrix4x4 is handled by the array.
+"""
+import numpy
+from kousen.math.matrix import Matrix4x4
+
+class Matrix4x4Array(object):
+    """
+    Matrix4x4Array provides a batch of 4x4 matrices with vectorized operations.
+    """
+    __slots__ = ('_data',)
+
+    def __init__(self, data=None, dtype=numpy.float64):
+        """
+        Constructor.
+
+        @param data  An (N,4,4) array-like of matrices (or a single (4,4) matrix); if None the array is empty.
+        @param dtype The floating point type of the array (numpy.float32 or numpy.float64).
+        """
+        if data is None:
+            data = numpy.empty((0, 4, 4), dtype=dtype)
+        self._data = numpy.array(data, dtype=dtype, ndmin=3)
+        if self._data.shape[1:] != (4, 4):
+            raise ValueError("data must be an (N,4,4) array")
+
+    def __repr__(self):
+        """
+        Generates the "official" string representation of the Matrix4x4Array
+
+        @returns A string representation of the Matrix4x4Array
+        """
+        return "{0}(count={1}, dtype={2})".format(self.__class__.__name__, len(self), self._data.dtype)
+
+    def __len__(self):
+        """
+        The len operator.
+
+        @returns The number of matrices.
+        """
+        return len(self._data)
+
+    def __getitem__(self, key):
+        """
+        The [] operator getter.
+
+        @param key An integer index, a slice or an index array.
+        @returns   A Matrix4x4 for an integer index; a Matrix4x4Array otherwise.
+        """
+        if isinstance(key, (int, numpy.integer)):
+            return Matrix4x4.fromData(self._data[key].ravel(order='F').tolist())
+        return self.__class__(self._data[key], self._data.dtype)
+
+    def __setitem__(self, key, value):
+        """
+        The [] operator setter.
+
+        @param key   An integer index, a slice or an index array.
+        @param value A Matrix4x4, a Matrix4x4Array or an array-like of matrices.
+        """
+        self._data[key] = self._asarray(value)
+
+    def __iter__(self):
+        """
+        Return an iterator object over Matrix4x4 instances.
+        """
+        for index in range(len(self)):
+            yield self[index]
+
+    def __mul__(self, other):
+        """
+        Calculates the product of the batched Matrix Multiplication:  Product = Self * Other
+
+        @param   other A Matrix4x4 or a Matrix4x4Array.
+        @returns       The Matrix4x4Array product.
+        """
+        if isinstance(other, (Matrix4x4, Matrix4x4Array)):
+            return self.multMatrix(other)
+        return NotImplemented
+
+    def __rmul__(self, other):
+        """
+        Calculates the product of the 'reflected' batched Matrix Multiplication:  Product = Other * Self
+
+        @param   other A Matrix4x4.
+        @returns       The Matrix4x4Array product.
+        """
+        if isinstance(other, Matrix4x4):
+            return self._fromArray(numpy.einsum('ij,njk->nik', self._asarray(other), self._data).astype(self._data.dtype, copy=False))
+        return NotImplemented
+
+    @classmethod
+    def _fromArray(cls, array):
+        """
+        Internal method to wrap an (N,4,4) array without copying it.
+
+        @param array The (N,4,4) array.
+        @returns     A Matrix4x4Array sharing the array.
+        """
+        M = cls.__new__(cls)
+        M._data = array
+        return M
+
+    @staticmethod
+    def _asarray(value):
+        """
+        Internal method to convert a value into a (4,4) or (N,4,4) array.
+
+        @param value A Matrix4x4, a Matrix4x4Array or an array-like of matrices.
+        @returns     An array indexed as [matrix, row, column].
+        """
+        if isinstance(value, Matrix4x4):
+            return numpy.array(value.data()).reshape((4, 4), order='F')
+        if isinstance(value, Matrix4x4Array):
+            return value.data()
+        return numpy.asarray(value)
+
+    @classmethod
+    def identity(cls, count, dtype=numpy.float64):
+        """
+        Creates an array of Identity Matrices.
+
+        @param count The number of matrices.
+        @param dtype The floating point type of the array.
+        @returns     A Matrix4x4Array.
+        """
+        return cls(numpy.tile(numpy.identity(4, dtype=dtype), (count, 1, 1)), dtype)
+
+    @classmethod
+    def fromMatrices(cls, matrices, dtype=numpy.float64):
+        """
+        Creates an array from Matrix4x4 instances.
+
+        @param matrices An iterable of Matrix4x4.
+        @param dtype    The floating point type of the array.
+        @returns        A Matrix4x4Array.
+        """
+        data = numpy.array([m.data() for m in matrices], dtype=dtype).reshape((-1, 4, 4))
+        return cls(data.transpose((0, 2, 1)), dtype)
+
+    def toMatrices(self):
+        """
+        Converts the array into Matrix4x4 instances.
+
+        @returns A list of Matrix4x4.
+        """
+        return [Matrix4x4.fromData(d) for d in self._data.transpose((0, 2, 1)).reshape((-1, 16)).tolist()]
+
+    def data(self):
+        """
+        Accessor method to access the raw data
+
+        @returns The (N,4,4) array of values
+        """
+        return self._data
+
+    @property
+    def dtype(self):
+        """
+        Convenience property for the floating point type of the array.
+
+        @returns The numpy.dtype of the array.
+        """
+        return self._data.dtype
+
+    def duplicate(self):
+        """
+        Copy Constructor.
+
+        @returns Another Matrix4x4Array with the same values as self
+        """
+        return self.__class__(self._data, self._data.dtype)
+
+    def multMatrix(self, other, out=None):
+        """
+        Calculates the product of the batched Matrix Multiplication:  Product = Self * Other
+
+        Either operand may contain a single matrix, which is then applied to every matrix of the other operand.
+
+        @param   other A Matrix4x4 or a Matrix4x4Array.
+        @param   out   An optional Matrix4x4Array receiving the product.
+        @returns       The Matrix4x4Array product.
+        """
+        b = self._asarray(other)
+        if b.ndim == 2:
+            product = numpy.einsum('nij,jk->nik', self._data, b)
+        else:
+            product = numpy.einsum('nij,njk->nik', self._data, b)
+        if out is None:
+            return self._fromArray(product.astype(self._data.dtype, copy=False))
+        out.data()[...] = product
+        return out
+
+    def inverse(self):
+        """
+        Calculates the inverse of every matrix.
+
+        @returns The Matrix4x4Array of inverses.
+        @exception numpy.linalg.LinAlgError if a matrix is singular.
+        """
+        return self._fromArray(numpy.linalg.inv(self._data).astype(self._data.dtype, copy=False))
+
+    def transpose(self):
+        """
+        Calculates the transpose of every matrix.
+
+        @returns The Matrix4x4Array of transposes.
+        """
+        return self._fromArray(numpy.ascontiguousarray(self._data.transpose((0, 2, 1))))
+
+    def transformPoints(self, points, out=None):
+        """
+        Calculates the batched Matrix Point Multiplication:  Product = Self * Point
+
+        Points are Homogeneous Coordinates of the form (x,y,z,1); the products are divided by w when a matrix is projective.
+
+        @param points An (N,3) array of one point per matrix, or an (N,M,3) array of M points per matrix.
+        @param out    An optional array of the same shape receiving the products.
+        @returns      The array of transformed points.
+        """
+        points = numpy.asarray(points)
+        shape = (len(self._data),) + (1,) * (points.ndim - 2) + (3,)
+        product = numpy.einsum('nij,n...j->n...i', self._data[:, :3, :3], points) + self._data[:, :3, 3].reshape(shape)
+        if numpy.any(self._data[:, 3] != (0.0, 0.0, 0.0, 1.0)):
+            w = numpy.einsum('nj,n...j->n...', self._data[:, 3, :3], points) + self._data[:, 3, 3].reshape(shape[:-1])
+            product /= w[..., numpy.newaxis]
+        if out is None:
+            return product
+        out[...] = product
+        return out
+
+    def transformVectors(self, vectors, out=None):
+        """
+        Calculates the batched Matrix Vector Multiplication:  Product = Self * Vector
+
+        Vectors (i.e direction & length) are Homogeneous Coordinate of the form (x,y,z,0); only the upper 3x3 part applies.
+
+        @param vectors An (N,3) array of one vector per matrix, or an (N,M,3) array of M vectors per matrix.
+        @param out     An optional array of the same shape receiving the products.
+        @returns       The array of transformed vectors.
+        """
+        product = numpy.einsum('nij,n...j->n...i', self._data[:, :3, :3], numpy.asarray(vectors))
+        if out is None:
+            return product
+        out[...] = product
+        return out
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+This module provides all utility functions and class defintions for observable math types.
+
+The math types are plain value types; the observable types extend them with change notifications for the few places
+that need them (e.g. the members of the transformation components).  Arithmetic on an observable type returns a plain
+value type.
+"""
+import PySide.QtCore
+from kousen.math.point import Point3D
+from kousen.math.vector import Vector3D
+from kousen.math.transaction import Transaction
+
+class DataNotifier(PySide.QtCore.QObject):
+    """
+    DataNotifier provides the change notification signals of an observable type.
+    """
+    dataChanging = PySide.QtCore.Signal(object)
+    dataChanged  = PySide.QtCore.Signal(object)
+
+class Observable(object):
+    """
+    Observable provides the change notifications of an observable type; the notifications are coalesced in transactions.
+
+    @see kousen.math.transaction.Transaction
+    """
+    __slots__ = ()
+
+    def __setitem__(self, key, value):
+        """
+        The [] operator setter.
+
+        @param key The lookup index to the internal data.
+        @param value The lookup index to the internal data.
+        """
+        Transaction.changing(self, 'dataChanging', key)
+        super(Observable, self).__setitem__(key, value)
+        Transaction.changed(self, 'dataChanged', key)
+
+    @property
+    def dataChanging(self):
+        """
+        Convenience property for the 'dataChanging' signal.
+
+        @returns The signal emitted before a value changes.
+        """
+        return self._notifier.dataChanging
+
+    @property
+    def dataChanged(self):
+        """
+        Convenience property for the 'dataChanged' signal.
+
+        @returns The signal emitted after a value changed.
+        """
+        return self._notifier.dataChanged
+
+    @classmethod
+    def fromValue(cls, value):
+        """
+        Creates an observable from a value.
+
+        @param value An object implementing x, y, z compoments.
+        @returns     The value if already observable; an observable duplicate otherwise.
+        """
+        if isinstance(value, cls):
+            return value
+        return cls(value.x, value.y, value.z)
+
+class ObservableVector3D(Observable, Vector3D):
+    """
+    ObservableVector3D provides a Vector3D notifying of its changes.
+    """
+    __slots__ = ('_notifier',)
+
+    def __init__(self, x=0, y=0, z=0):
+        """
+        Constructor.
+
+        @param x The x component value.
+        @param y The y component value.
+        @param z The z component value.
+        """
+        super(ObservableVector3D, self).__init__(x, y, z)
+        self._notifier = DataNotifier()
+
+class ObservablePoint3D(Observable, Point3D):
+    """
+    ObservablePoint3D provides a Point3D notifying of its changes.
+    """
+    __slots__ = ('_notifier',)
+
+    def __init__(self, x=0, y=0, z=0):
+        """
+        Constructor.
+
+        @param x The x component value.
+        @param y The y component value.
+        @param z The z component value.
+        """
+        super(ObservablePoint3D, self).__init__(x, y, z)
+        self._notifier = DataNotifier()
@@ -2,14 +2,14 @@
 """
 This module provides all utility functions and class defintions for point operations.
 """
-import PySide.QtCore
 
-class Point3D(PySide.QtCore.QObject):
+class Point3D(object):
     """
-    Point3D provides a simplified but self contained 3D Point class.
+    Point3D provides a simplified but self contained 3D Point value class.
+
+    @see kousen.math.observable for an implementation that notifies of changes.
     """
-    dataChanging = PySide.QtCore.Signal(object)
-    dataChanged  = PySide.QtCore.Signal(object)
+    __slots__ = ('_data',)
 
     def __init__(self,x=0,y=0,z=0):
         """
@@ -19,7 +19,6 @@ class Point3D(PySide.QtCore.QObject):
         @param y The y component value.
         @param z The z component value.
         """
-        super(Point3D, self).__init__()
         self._data = [x,y,z]
 
     def __len__(self):
@@ -50,9 +49,7 @@ class Point3D(PySide.QtCore.QObject):
         """
         if key >= len(self._data):
             raise IndexError()
-        self._dataChanging(key)
         self._data[key] = value
-        self._dataChanged(key)
 
     def __iter__(self):
         """
@@ -91,7 +88,7 @@ class Point3D(PySide.QtCore.QObject):
         @param   other An object implementing x, y, z compoments
         @returns       The Point sum.
         """
-        return self.__class__( self.x+other.x, self.y+other.y, self.z+other.z )
+        return Point3D( self.x+other.x, self.y+other.y, self.z+other.z )
 
     def __sub__(self,other):
         """
@@ -102,7 +99,7 @@ class Point3D(PySide.QtCore.QObject):
         """
         from kousen.math.vector import Vector3D
         if isinstance(other, Vector3D):
-            return self.__class__( self.x-other.x, self.y-other.y, self.z-other.z )
+            return Point3D( self.x-other.x, self.y-other.y, self.z-other.z )
         return Vector3D( self.x-other.x, self.y-other.y, self.z-other.z )
 
     def __eq__(self,other):
@@ -123,18 +120,6 @@ class Point3D(PySide.QtCore.QObject):
         """
         return not self == other
 
-    def _dataChanging(self, index):
-        """
-        Internal method to emit the DataChanging signal.
-        """
-        self.dataChanging.emit(index)
-
-    def _dataChanged(self, index):
-        """
-        Internal method to emit the DataChanged signal.
-        """
-        self.dataChanged.emit(index)
-
     @property
     def x(self):
         """
@@ -229,5 +214,5 @@ class Point3D(PySide.QtCore.QObject):
 
         @returns A Point between self and aother point.
         """
-        return self.__class__( (self.x+other.x)*0.5, (self.y+other.y)*0.5, (self.z+other.z)*0.5 )
+        return Point3D( (self.x+other.x)*0.5, (self.y+other.y)*0.5, (self.z+other.z)*0.5 )
 
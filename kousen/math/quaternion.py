@@ -0,0 +1,389 @@
+# -*- coding: utf-8 -*-
+"""
+This module provides all utility functions and class defintions for quaternion operations.
+"""
+import math
+from kousen.math.matrix import Matrix4x4
+from kousen.math.point import Point3D
+from kousen.math.vector import Vector3D
+
+class Quaternion(object):
+    """
+    Quaternion provides a simplified but self contained rotation Quaternion value class.
+
+    The rotation quaternions are expected to be of unit length; the factory methods always create unit quaternions.
+    """
+    __slots__ = ('_data',)
+
+    def __init__(self, w=1, x=0, y=0, z=0):
+        """
+        Constructor.
+
+        @param w The scalar (real) component value.
+        @param x The x (imaginary) component value.
+        @param y The y (imaginary) component value.
+        @param z The z (imaginary) component value.
+        """
+        self._data = [w, x, y, z]
+
+    def __len__(self):
+        """
+        The len operator.
+
+        @returns The number of items in the internal data.
+        """
+        return len(self._data)
+
+    def __getitem__(self, key):
+        """
+        The [] operator getter.
+
+        @param key The lookup index to the internal data (w, x, y, z).
+        @returns      The data if the lookup operation was succesful; None otherwise.
+        """
+        if key >= len(self._data):
+            raise IndexError()
+        return self._data[key]
+
+    def __iter__(self):
+        """
+        Return an iterator object.
+        """
+        return iter(self._data)
+
+    def __hash__(self):
+        """
+        Calculates the hash value of the instance.
+
+        @returns A hash value calcaulted from internal data.
+        """
+        return hash(tuple(self._data))
+
+    def __repr__(self):
+        """
+        Generates the "official" string representation of the Quaternion
+
+        @returns A string representation of the Quaternion
+        """
+        return "{0}({q.w}, {q.x}, {q.y}, {q.z})".format(self.__class__.__name__, q=self)
+
+    def __str__(self):
+        """
+        Generates the "informal" string representation of the Quaternion.
+
+        @returns A string representation of the Quaternion
+        """
+        return "Q({q.w}, {q.x}, {q.y}, {q.z})".format(q=self)
+
+    def __eq__(self, other):
+        """
+        Calculates the result of the rich comparison equality operation.
+
+        @param   other A Quaternion.
+        @returns       True if the components are equal; false otherwise
+        """
+        return isinstance(other, Quaternion) and self._data == other._data
+
+    def __ne__(self, other):
+        """
+        Calculates the result of the rich comparison not equality opeeration.
+
+        @param   other A Quaternion.
+        @returns       True if the components not are equal; false otherwise
+        """
+        return not self == other
+
+    def __neg__(self):
+        """
+        Calculates the negated quaternion (i.e. the same rotation).
+
+        @returns The Quaternion with negated values.
+        """
+        w, x, y, z = self._data
+        return Quaternion(-w, -x, -y, -z)
+
+    def __mul__(self, other):
+        """
+        Calculates the product of the
+            1) Quaternion Multiplication:  Product = Self * Quaternion (i.e. the rotation of other followed by self)
+            2) Vector Rotation:            Product = Self * Vector
+            3) Point Rotation:             Product = Self * Point (about the origin)
+
+        @param   other An instance of a 1) Quaternion, 2) Vector3D, or 3) Point3D.
+        @returns       The Quaternion product; the rotated Vector3D; the rotated Point3D; NotImplemented otherwise.
+        """
+        if isinstance(other, Quaternion):
+            return self.multQuaternion(other)
+
+        if isinstance(other, Vector3D):
+            return Vector3D(*self._rotate(other.x, other.y, other.z))
+
+        if isinstance(other, Point3D):
+            return Point3D(*self._rotate(other.x, other.y, other.z))
+
+        return NotImplemented
+
+    @property
+    def w(self):
+        """
+        Convenience property for the 'w' value
+
+        @returns The value stored for the 'w' component
+        """
+        return self._data[0]
+
+    @property
+    def x(self):
+        """
+        Convenience property for the 'x' value
+
+        @returns The value stored for the 'x' component
+        """
+        return self._data[1]
+
+    @property
+    def y(self):
+        """
+        Convenience property for the 'y' value
+
+        @returns The value stored for the 'y' component
+        """
+        return self._data[2]
+
+    @property
+    def z(self):
+        """
+        Convenience property for the 'z' value
+
+        @returns The value stored for the 'z' component
+        """
+        return self._data[3]
+
+    @classmethod
+    def identity(cls):
+        """
+        Creates an Identity Quaternion (i.e. no rotation).
+        """
+        return cls(1.0, 0.0, 0.0, 0.0)
+
+    @classmethod
+    def fromAxisAngle(cls, angleInRadians, axisVector):
+        """
+        Creates a Quaternion from an Angle and Axis Vector.
+
+        @param angleInRadians The angle (radians) of the Axis-Angle rotation.
+        @param axisVector     The axis of the Axis-Angle rotation; it does not have to be normalized.
+        @returns A unit Quaternion; the Identity Quaternion if the axis has no length.
+        """
+        length = axisVector.length()
+        if length == 0.0:
+            return cls.identity()
+        half = 0.5 * angleInRadians
+        s = math.sin(half) / length
+        return cls(math.cos(half), axisVector.x * s, axisVector.y * s, axisVector.z * s)
+
+    @classmethod
+    def fromMatrix(cls, matrix):
+        """
+        Creates a Quaternion from the rotation part of a Matrix4x4.
+
+        @param matrix A Matrix4x4 with an orthonormal (rotation) upper 3x3 matrix.
+        @returns A unit Quaternion.
+        @see http://www.euclideanspace.com/maths/geometry/rotations/conversions/matrixToQuaternion/
+        """
+        m = matrix.data()
+        trace = m[0] + m[5] + m[10]
+        # Pick the largest component as the divisor for numerical stability.
+        if trace > 0.0:
+            s = 2.0 * math.sqrt(trace + 1.0)
+            q = cls(0.25 * s, (m[6] - m[9]) / s, (m[8] - m[2]) / s, (m[1] - m[4]) / s)
+        elif m[0] > m[5] and m[0] > m[10]:
+            s = 2.0 * math.sqrt(1.0 + m[0] - m[5] - m[10])
+            q = cls((m[6] - m[9]) / s, 0.25 * s, (m[4] + m[1]) / s, (m[8] + m[2]) / s)
+        elif m[5] > m[10]:
+            s = 2.0 * math.sqrt(1.0 + m[5] - m[0] - m[10])
+            q = cls((m[8] - m[2]) / s, (m[4] + m[1]) / s, 0.25 * s, (m[9] + m[6]) / s)
+        else:
+            s = 2.0 * math.sqrt(1.0 + m[10] - m[0] - m[5])
+            q = cls((m[1] - m[4]) / s, (m[8] + m[2]) / s, (m[9] + m[6]) / s, 0.25 * s)
+        return q.normalized()
+
+    def data(self):
+        """
+        Accessor method to access the raw data
+
+        @returns The list of values (w, x, y, z)
+        """
+        return self._data
+
+    def duplicate(self):
+        """
+        Copy Constructor.
+
+        @returns A duplicate Quaternion with the same values.
+        """
+        return self.__class__(*self._data)
+
+    def dotproduct(self, other):
+        """
+        Calculates the dot product of the Quaternion dot product operation.
+
+        @param   other A Quaternion.
+        @returns       The dot product.
+        """
+        a, b = self._data, other._data
+        return a[0]*b[0] + a[1]*b[1] + a[2]*b[2] + a[3]*b[3]
+
+    def length(self):
+        """
+        Calculates the length.
+
+        @returns The Quaternion length.
+        """
+        return math.sqrt(self.dotproduct(self))
+
+    def normalized(self):
+        """
+        Calculates the quaternion of the normalization process.
+
+        @returns A unit Quaternion; the Identity Quaternion if the length is 0.
+        """
+        l = self.length()
+        if l > 0:
+            w, x, y, z = self._data
+            return Quaternion(w/l, x/l, y/l, z/l)
+        return Quaternion.identity()
+
+    def conjugate(self):
+        """
+        Calculates the conjugate (i.e. the inverse of a unit Quaternion).
+
+        @returns The conjugate Quaternion.
+        """
+        w, x, y, z = self._data
+        return Quaternion(w, -x, -y, -z)
+
+    def inverse(self):
+        """
+        Calculates the inverse.
+
+        @returns The inverse Quaternion.
+        @exception ArithmeticError if the quaternion has no length.
+        """
+        l = self.dotproduct(self)
+        if l == 0.0:
+            raise ArithmeticError("The quaternion has no length.")
+        w, x, y, z = self._data
+        return Quaternion(w/l, -x/l, -y/l, -z/l)
+
+    def multQuaternion(self, other):
+        """
+        Calculates the product of the Quaternion Multiplication (Hamilton product):  Product = Self * Quaternion
+
+        @param   other A Quaternion.
+        @returns       The Quaternion product; the rotation of other followed by the rotation of self.
+        """
+        aw, ax, ay, az = self._data
+        bw, bx, by, bz = other._data
+        return Quaternion(
+            aw*bw - ax*bx - ay*by - az*bz,
+            aw*bx + ax*bw + ay*bz - az*by,
+            aw*by - ax*bz + ay*bw + az*bx,
+            aw*bz + ax*by - ay*bx + az*bw
+            )
+
+    def _rotate(self, vx, vy, vz):
+        """
+        Internal method to rotate a vector:  v' = v + 2w(q x v) + 2q x (q x v)
+
+        @param vx The x component of the vector.
+        @param vy The y component of the vector.
+        @param vz The z component of the vector.
+        @returns  A tuple of the rotated x, y, z components.
+        """
+        w, x, y, z = self._data
+        tx = 2.0 * (y*vz - z*vy)
+        ty = 2.0 * (z*vx - x*vz)
+        tz = 2.0 * (x*vy - y*vx)
+        return (vx + w*tx + y*tz - z*ty,
+                vy + w*ty + z*tx - x*tz,
+                vz + w*tz + x*ty - y*tx)
+
+    def toAxisAngle(self):
+        """
+        Converts the Quaternion into an Angle and Axis Vector.
+
+        @returns A tuple of the angle (radians) and the normalized axis Vector3D; the axis is (0, 0, 0) for the identity.
+        """
+        w, x, y, z = self.normalized()._data
+        s = math.sqrt(max(0.0, 1.0 - w*w))
+        angle = 2.0 * math.acos(max(-1.0, min(1.0, w)))
+        if s < 1e-12:
+            return 0.0, Vector3D(0.0, 0.0, 0.0)
+        return angle, Vector3D(x/s, y/s, z/s)
+
+    def toMatrix(self, originPoint=None):
+        """
+        Converts the Quaternion into a Rotation Matrix.
+
+        @param originPoint The origin point of the rotation; if None assume the origin (0,0,0).
+        @returns A Matrix4x4 Rotation Matrix
+        """
+        w, x, y, z = self._data
+        xx, yy, zz = x*x, y*y, z*z
+        xy, xz, yz = x*y, x*z, y*z
+        wx, wy, wz = w*x, w*y, w*z
+
+        data = [
+            1.0 - 2.0*(yy + zz), 2.0*(xy + wz),       2.0*(xz - wy),       0.0,
+            2.0*(xy - wz),       1.0 - 2.0*(xx + zz), 2.0*(yz + wx),       0.0,
+            2.0*(xz + wy),       2.0*(yz - wx),       1.0 - 2.0*(xx + yy), 0.0,
+            0.0,                 0.0,                 0.0,                 1.0
+            ]
+
+        if originPoint:
+            # Translation(p) * Rotation * Translation(-p) only offsets the translation by p - Rotation * p.
+            rx, ry, rz = self._rotate(originPoint.x, originPoint.y, originPoint.z)
+            data[12] = originPoint.x - rx
+            data[13] = originPoint.y - ry
+            data[14] = originPoint.z - rz
+        return Matrix4x4.fromData(data)
+
+    def nlerp(self, other, t):
+        """
+        Calculates the normalized linear interpolation; cheaper than slerp but not of constant angular velocity.
+
+        @param other The target Quaternion.
+        @param t     The interpolation parameter, from 0 (self) to 1 (other).
+        @returns     The interpolated unit Quaternion (along the shortest arc).
+        """
+        a, b = self._data, other._data
+        # Interpolate along the shortest arc: q and -q are the same rotation.
+        sign = -1.0 if self.dotproduct(other) < 0.0 else 1.0
+        u = 1.0 - t
+        return Quaternion(*[u*a[i] + sign*t*b[i] for i in range(4)]).normalized()
+
+    def slerp(self, other, t):
+        """
+        Calculates the spherical linear interpolation (i.e. of constant angular velocity).
+
+        @param other The target Quaternion.
+        @param t     The interpolation parameter, from 0 (self) to 1 (other).
+        @returns     The interpolated unit Quaternion (along the shortest arc).
+        """
+        cosine = self.dotproduct(other)
+        b = other._data
+        if cosine < 0.0:
+            cosine = -cosine
+            b = [-v for v in b]
+
+        # Nearly parallel quaternions: fall back to the (numerically stable) nlerp.
+        if cosine > 0.9995:
+            return self.nlerp(Quaternion(*b), t)
+
+        theta = math.acos(cosine)
+        sine = math.sin(theta)
+        sa = math.sin((1.0 - t) * theta) / sine
+        sb = math.sin(t * theta) / sine
+        a = self._data
+        return Quaternion(*[sa*a[i] + sb*b[i] for i in range(4)])
@@ -0,0 +1,336 @@
+# -*- coding: utf-8 -*-
+"""
+This module provides all utility functions and class defintions for tessellating quadric surfaces into triangle meshes.
+
+The meshes are unit sized (i.e. radius and length of 1) and shared: a node applies its own dimensions through a transformation matrix.
+"""
+import math
+import collections
+import numpy
+
+class Mesh(object):
+    """
+    Mesh provides a simplified, read-only indexed triangle mesh backed by NumPy arrays.
+    """
+    def __init__(self, key, vertices, normals, indices):
+        """
+        Constructor.
+
+        @param key      The tessellation key that generated the mesh.
+        @param vertices An (N,3) array of vertex positions.
+        @param normals  An (N,3) array of vertex normals.
+        @param indices  An (M,3) array of triangle vertex indices.
+        """
+        super(Mesh, self).__init__()
+        self._key = key
+        self._vertices = numpy.ascontiguousarray(vertices, dtype=numpy.float32)
+        self._normals = numpy.ascontiguousarray(normals, dtype=numpy.float32)
+        self._indices = numpy.ascontiguousarray(indices, dtype=numpy.uint32)
+        for array in (self._vertices, self._normals, self._indices):
+            array.setflags(write=False)
+
+    def __repr__(self):
+        """
+        Generates the "official" string representation of the Mesh
+
+        @returns A string representation of the Mesh
+        """
+        return "{0}({1}, vertices={2}, triangles={3})".format(self.__class__.__name__, self._key, len(self._vertices), len(self._indices))
+
+    @property
+    def key(self):
+        """
+        Convenience property for the tessellation key.
+
+        @returns The tuple of the tessellation parameters.
+        """
+        return self._key
+
+    @property
+    def vertices(self):
+        """
+        Convenience property for the vertex positions.
+
+        @returns An (N,3) float32 array.
+        """
+        return self._vertices
+
+    @property
+    def normals(self):
+        """
+        Convenience property for the vertex normals.
+
+        @returns An (N,3) float32 array.
+        """
+        return self._normals
+
+    @property
+    def indices(self):
+        """
+        Convenience property for the triangle indices.
+
+        @returns An (M,3) uint32 array.
+        """
+        return self._indices
+
+class TessellationCache(object):
+    """
+    TessellationCache provides a least recently used cache of meshes keyed by their tessellation parameters.
+    """
+    def __init__(self, capacity=128):
+        """
+        Constructor.
+
+        @param capacity The maximum number of meshes kept in the cache.
+        """
+        super(TessellationCache, self).__init__()
+        self._meshes = collections.OrderedDict()
+        self._capacity = capacity
+        self._hits = 0
+        self._misses = 0
+
+    def __len__(self):
+        """
+        The len operator.
+
+        @returns The number of meshes in the cache.
+        """
+        return len(self._meshes)
+
+    def __contains__(self, key):
+        """
+        The in operator.
+
+        @param key The tessellation key.
+        @returns   True if a mesh is cached for the key; False otherwise.
+        """
+        return key in self._meshes
+
+    @property
+    def capacity(self):
+        """
+        Convenience property for the maximum number of cached meshes.
+
+        @returns The cache capacity.
+        """
+        return self._capacity
+
+    @capacity.setter
+    def capacity(self, value):
+        """
+        Convenience property for the maximum number of cached meshes.
+
+        @param value The cache capacity.
+        """
+        self._capacity = value
+        self._evict()
+
+    @property
+    def hits(self):
+        """
+        Convenience property for the number of lookups served from the cache.
+
+        @returns The hit count.
+        """
+        return self._hits
+
+    @property
+    def misses(self):
+        """
+        Convenience property for the number of lookups that required a tessellation.
+
+        @returns The miss count.
+        """
+        return self._misses
+
+    def _evict(self):
+        """
+        Internal method to discard the least recently used meshes above capacity.
+        """
+        while len(self._meshes) > max(self._capacity, 0):
+            self._meshes.popitem(last=False)
+
+    def mesh(self, key, generator):
+        """
+        Returns the cached mesh of a key, tessellating it on a cache miss.
+
+        @param key       The tessellation key, a hashable tuple of the tessellation parameters.
+        @param generator A callable creating the Mesh of the key.
+        @returns         The shared Mesh instance.
+        """
+        mesh = self._meshes.pop(key, None)
+        if mesh is None:
+            self._misses += 1
+            mesh = generator()
+        else:
+            self._hits += 1
+        self._meshes[key] = mesh
+        self._evict()
+        return mesh
+
+    def clear(self):
+        """
+        Clears the cache of all meshes and resets the statistics.
+        """
+        self._meshes.clear()
+        self._hits = 0
+        self._misses = 0
+
+def _quads(rows, columns):
+    """
+    Generates the quads of a (rows+1) x (columns+1) grid of vertices.
+
+    @param rows    The number of rows of quads.
+    @param columns The number of columns of quads.
+    @returns       An (rows*columns,4) array of counter clockwise vertex indices (row i, row i, row i+1, row i+1).
+    """
+    i, j = numpy.mgrid[0:rows, 0:columns]
+    a = (i * (columns + 1) + j).ravel()
+    b = a + columns + 1
+    return numpy.column_stack((a, a + 1, b + 1, b))
+
+def _triangles(quads, vertices):
+    """
+    Splits quads into triangles and discards degenerate triangles (e.g. at the poles or the center of a disc).
+
+    @param quads    An (N,4) array of vertex indices.
+    @param vertices An (M,3) array of vertex positions.
+    @returns        An (K,3) array of vertex indices.
+    """
+    triangles = numpy.concatenate((quads[:, [0, 1, 2]], quads[:, [0, 2, 3]]))
+    p = vertices[triangles]
+    area = numpy.cross(p[:, 1] - p[:, 0], p[:, 2] - p[:, 0])
+    return triangles[numpy.einsum('ij,ij->i', area, area) > 1e-12]
+
+def _disc(slices, loops, z, facing):
+    """
+    Tessellates a unit disc in the x-y plane.
+
+    @param slices The number of subdivisions around the z-axis.
+    @param loops  The number of concentric rings of the disc.
+    @param z      The z position of the disc.
+    @param facing The direction (1 or -1) of the disc normal along the z-axis.
+    @returns      A tuple of vertices, normals and quads.
+    """
+    theta = numpy.linspace(0, 2 * math.pi, slices + 1)
+    radii = numpy.linspace(0, 1, loops + 1)
+    r, t = numpy.meshgrid(radii, theta, indexing='ij')
+    vertices = numpy.column_stack((r.ravel() * numpy.cos(t.ravel()), r.ravel() * numpy.sin(t.ravel()), numpy.full(r.size, z)))
+    normals = numpy.tile((0.0, 0.0, float(facing)), (r.size, 1))
+    quads = _quads(loops, slices)
+    # Rings grow outward so the quads wind clockwise when viewed from +z.
+    return vertices, normals, quads if facing < 0 else quads[:, ::-1]
+
+def _revolve(slices, stacks, top):
+    """
+    Tessellates a unit cylinder (top = 1) or cone (top = 0) around the z-axis, from z = 0 to z = 1.
+
+    @param slices The number of subdivisions around the z-axis.
+    @param stacks The number of subdivisions along the z-axis.
+    @param top    The radius at z = 1.
+    @returns      A tuple of vertices, normals and quads.
+    """
+    theta = numpy.linspace(0, 2 * math.pi, slices + 1)
+    heights = numpy.linspace(0, 1, stacks + 1)
+    h, t = numpy.meshgrid(heights, theta, indexing='ij')
+    h, t = h.ravel(), t.ravel()
+    r = 1 + (top - 1) * h
+    vertices = numpy.column_stack((r * numpy.cos(t), r * numpy.sin(t), h))
+    # The slope of the side (radius difference over unit height) tilts the normal along z.
+    normals = numpy.column_stack((numpy.cos(t), numpy.sin(t), numpy.full(t.size, 1.0 - top)))
+    normals /= numpy.linalg.norm(normals, axis=1)[:, numpy.newaxis]
+    return vertices, normals, _quads(stacks, slices)
+
+def _assemble(key, parts):
+    """
+    Assembles the parts of a surface into a single mesh.
+
+    @param key   The tessellation key.
+    @param parts A sequence of (vertices, normals, quads) tuples.
+    @returns     A Mesh instance.
+    """
+    vertices, normals, triangles = [], [], []
+    offset = 0
+    for v, n, q in parts:
+        vertices.append(v)
+        normals.append(n)
+        triangles.append(_triangles(q, v) + offset)
+        offset += len(v)
+    return Mesh(key, numpy.concatenate(vertices), numpy.concatenate(normals), numpy.concatenate(triangles))
+
+def tessellateSphere(slices, stacks):
+    """
+    Tessellates a unit sphere centered on the origin.
+
+    @param slices The number of subdivisions around the z-axis (similar to lines of longitude).
+    @param stacks The number of subdivisions along the z-axis (similar to lines of latitude).
+    @returns      A Mesh instance.
+    """
+    theta = numpy.linspace(0, 2 * math.pi, slices + 1)
+    phi = numpy.linspace(math.pi, 0, stacks + 1)
+    p, t = numpy.meshgrid(phi, theta, indexing='ij')
+    p, t = p.ravel(), t.ravel()
+    vertices = numpy.column_stack((numpy.sin(p) * numpy.cos(t), numpy.sin(p) * numpy.sin(t), numpy.cos(p)))
+    return _assemble(('sphere', slices, stacks), [(vertices, vertices, _quads(stacks, slices))])
+
+def tessellateCylinder(slices, stacks, loops):
+    """
+    Tessellates a closed unit cylinder along the z-axis, with its base at the origin.
+
+    @param slices The number of subdivisions around the z-axis (similar to lines of longitude).
+    @param stacks The number of subdivisions along the z-axis (similar to lines of latitude).
+    @param loops  The number of concentric rings about the origin into which the cylinder's base is subdivided.
+    @returns      A Mesh instance.
+    """
+    return _assemble(('cylinder', slices, stacks, loops), [
+        _revolve(slices, stacks, 1.0),
+        _disc(slices, loops, 1.0, 1),
+        _disc(slices, loops, 0.0, -1)])
+
+def tessellateCone(slices, stacks, loops):
+    """
+    Tessellates a closed unit cone along the z-axis, with its base at the origin.
+
+    @param slices The number of subdivisions around the z-axis (similar to lines of longitude).
+    @param stacks The number of subdivisions along the z-axis (similar to lines of latitude).
+    @param loops  The number of concentric rings about the origin into which the cone's base is subdivided.
+    @returns      A Mesh instance.
+    """
+    return _assemble(('cone', slices, stacks, loops), [
+        _revolve(slices, stacks, 0.0),
+        _disc(slices, loops, 0.0, -1)])
+
+# The process-wide cache of unit meshes.
+cache = TessellationCache()
+
+def sphere(slices, stacks):
+    """
+    Returns the shared unit sphere mesh of the tessellation parameters.
+
+    @param slices The number of subdivisions around the z-axis.
+    @param stacks The number of subdivisions along the z-axis.
+    @returns      A shared Mesh instance.
+    """
+    return cache.mesh(('sphere', slices, stacks), lambda: tessellateSphere(slices, stacks))
+
+def cylinder(slices, stacks, loops):
+    """
+    Returns the shared unit cylinder mesh of the tessellation parameters.
+
+    @param slices The number of subdivisions around the z-axis.
+    @param stacks The number of subdivisions along the z-axis.
+    @param loops  The number of concentric rings of the base discs.
+    @returns      A shared Mesh instance.
+    """
+    return cache.mesh(('cylinder', slices, stacks, loops), lambda: tessellateCylinder(slices, stacks, loops))
+
+def cone(slices, stacks, loops):
+    """
+    Returns the shared unit cone mesh of the tessellation parameters.
+
+    @param slices The number of subdivisions around the z-axis.
+    @param stacks The number of subdivisions along the z-axis.
+    @param loops  The number of concentric rings of the base disc.
+    @returns      A shared Mesh instance.
+    """
+    return cache.mesh(('cone', slices, stacks, loops), lambda: tessellateCone(slices, stacks, loops))
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+This module provides all utility functions and class defintions for coalescing change notifications.
+
+A Transaction defers the change notifications of the math types and of the objects observing them (e.g. the
+transformation components and nodes) until the outermost transaction is committed:
+
+    with Transaction():
+        node.translation.direction.x = 1
+        node.translation.direction.y = 2
+        node.rotation.angle = 45
+
+Each sender emits its 'changing' signal once, on its first change, and its 'changed' signal once, on commit.
+"""
+import collections
+
+class Transaction(object):
+    """
+    Transaction provides a (re-entrant) context manager coalescing change notifications.
+    """
+    # The transaction state is shared by all instances: nested transactions join the outermost one.
+    _depth = 0
+    # The notifications are keyed by the sender's id: the observable math types compare (and hash) by value.  The
+    # senders are referenced until the commit, so that an id cannot be reused by another sender within a transaction.
+    _changing = {}
+    _pending = collections.OrderedDict()
+
+    def __enter__(self):
+        """
+        Opens the transaction.
+
+        @returns The Transaction instance.
+        """
+        Transaction._depth += 1
+        return self
+
+    def __exit__(self, type, value, traceback):
+        """
+        Closes the transaction; the outermost transaction commits the deferred notifications.
+
+        The notifications are committed even if an exception is raised: the changes are applied when they are made.
+        """
+        Transaction._depth -= 1
+        if Transaction._depth == 0:
+            Transaction._commit()
+        return False
+
+    @classmethod
+    def active(cls):
+        """
+        Queries if a transaction is open.
+
+        @returns True if a transaction is open; False otherwise.
+        """
+        return cls._depth > 0
+
+    @classmethod
+    def changing(cls, sender, signal, *args):
+        """
+        Emits a 'changing' signal, once per sender and signal within a transaction.
+
+        @param sender The QObject emitting the signal.
+        @param signal The name of the signal.
+        @param args   The signal arguments.
+        """
+        if cls._depth:
+            key = (id(sender), signal)
+            if key in cls._changing:
+                return
+            cls._changing[key] = sender
+        getattr(sender, signal).emit(*args)
+
+    @classmethod
+    def changed(cls, sender, signal, *args):
+        """
+        Emits a 'changed' signal, deferred until commit (and coalesced per sender and signal) within a transaction.
+
+        Arguments that differ between coalesced notifications are replaced by None.
+
+        @param sender The QObject emitting the signal.
+        @param signal The name of the signal.
+        @param args   The signal arguments.
+        """
+        if not cls._depth:
+            getattr(sender, signal).emit(*args)
+            return
+
+        key = (id(sender), signal)
+        pending = cls._pending.get(key, None)
+        if pending is not None:
+            args = tuple(a if a == b else None for a, b in zip(pending[1], args))
+        cls._pending[key] = (sender, args)
+
+    @classmethod
+    def _commit(cls):
+        """
+        Internal method to emit the deferred notifications.
+
+        The commit runs as a transaction itself: the notifications of the observers (e.g. a transformation node
+        observing its components) are coalesced into the same commit.
+        """
+        cls._depth += 1
+        try:
+            while cls._pending:
+                (identifier, signal), (sender, args) = cls._pending.popitem(last=False)
+                getattr(sender, signal).emit(*args)
+        finally:
+            cls._depth -= 1
+            cls._changing.clear()
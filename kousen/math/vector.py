@@ -3,14 +3,14 @@
 This module provides all utility functions and class defintions for vector operations.
 """
 import math
-import PySide.QtCore
 
-class Vector3D(PySide.QtCore.QObject):
+class Vector3D(object):
     """
-    Vector3D provides a simplified but self contained 3D Vector class.
+    Vector3D provides a simplified but self contained 3D Vector value class.
+
+    @see kousen.math.observable for an implementation that notifies of changes.
     """
-    dataChanging = PySide.QtCore.Signal(object)
-    dataChanged  = PySide.QtCore.Signal(object)
+    __slots__ = ('_data',)
 
     def __init__(self, x=0, y=0, z=0):        
         """
@@ -20,7 +20,6 @@ class Vector3D(PySide.QtCore.QObject):
         @param y The y component value.
         @param z The z component value.
         """
-        super(Vector3D, self).__init__()
         self._data = [x,y,z]
 
     def __len__(self):
@@ -51,9 +50,7 @@ class Vector3D(PySide.QtCore.QObject):
         """
         if key >= len(self._data):
             raise IndexError()
-        self._dataChanging(key)
         self._data[key] = value
-        self._dataChanged(key)
 
     def __iter__(self):
         """
@@ -91,7 +88,7 @@ class Vector3D(PySide.QtCore.QObject):
 
         @returns The duplicate vector with negated values.
         """
-        return self.__class__( -self.x, -self.y, -self.z )
+        return Vector3D( -self.x, -self.y, -self.z )
 
     def __add__(self,other):
         """
@@ -102,8 +99,8 @@ class Vector3D(PySide.QtCore.QObject):
         """
         from kousen.math.point import Point3D
         if isinstance(other,Point3D):
-            return other.__class__( self.x+other.x, self.y+other.y, self.z+other.z )
-        return self.__class__( self.x+other.x, self.y+other.y, self.z+other.z )
+            return Point3D( self.x+other.x, self.y+other.y, self.z+other.z )
+        return Vector3D( self.x+other.x, self.y+other.y, self.z+other.z )
 
     def __sub__(self,other):
         """
@@ -112,7 +109,7 @@ class Vector3D(PySide.QtCore.QObject):
         @param   other An object implementing x, y, z compoments
         @returns       The Vector3D difference
         """
-        return self.__class__( self.x-other.x, self.y-other.y, self.z-other.z )
+        return Vector3D( self.x-other.x, self.y-other.y, self.z-other.z )
 
     def __mul__(self, other):
         """
@@ -126,7 +123,7 @@ class Vector3D(PySide.QtCore.QObject):
            return self.dotproduct(other)
 
         # scalar product
-        return self.__class__( self.x*other, self.y*other, self.z*other )
+        return Vector3D( self.x*other, self.y*other, self.z*other )
 
     def __rmul__(self,other):
         """
@@ -144,7 +141,9 @@ class Vector3D(PySide.QtCore.QObject):
         @param   other A single scalar value
         @returns       The Vector3D product
         """
-        return self.__class__( self.x/other, self.y/other, self.z/other )
+        return Vector3D( self.x/other, self.y/other, self.z/other )
+
+    __truediv__ = __div__
 
     def __xor__(self, other):
         """
@@ -174,18 +173,6 @@ class Vector3D(PySide.QtCore.QObject):
         """
         return not (self==other)
 
-    def _dataChanging(self, index):
-        """
-        Internal method to emit the DataChanging signal.
-        """
-        self.dataChanging.emit(index)
-
-    def _dataChanged(self, index):
-        """
-        Internal method to emit the DataChanged signal.
-        """
-        self.dataChanged.emit(index)
-
     @property
     def x(self):
         """
@@ -274,7 +261,7 @@ class Vector3D(PySide.QtCore.QObject):
         @param   normalized Flag to normalize the resulting cross product
         @returns            The cross product Vector3D
         """
-        product = self.__class__(
+        product = Vector3D(
             self.y*other.z - self.z*other.y,
             self.z*other.x - self.x*other.z,
             self.x*other.y - self.y*other.x )
@@ -343,8 +330,8 @@ class Vector3D(PySide.QtCore.QObject):
         """
         l = self.length()
         if ( l > 0 ):
-            return self.__class__( self.x/l, self.y/l, self.z/l )
-        return self.duplicate()
+            return Vector3D( self.x/l, self.y/l, self.z/l )
+        return Vector3D( self.x, self.y, self.z )
 
 XAxis = Vector3D(1,0,0)
 YAxis = Vector3D(0,1,0)
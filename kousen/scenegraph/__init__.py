@@ -7,7 +7,8 @@ from kousen.scenegraph.scene import (
     SceneGraphNode,
     AbstractSceneGraphModel,
     SceneGraphType,
-    SceneGraphTypeTreeModel
+    SceneGraphTypeTreeModel,
+    TraversalEvent
 )
 from kousen.scenegraph.primitive import (
     SphereNode,
@@ -25,6 +26,7 @@ from kousen.scenegraph.quadric import (
     QuadricGnomonNode
 )
 from kousen.scenegraph.object import ObjectNode
+from kousen.scenegraph.scatter import ScatterNode
 from kousen.scenegraph.viewport import (
     ViewportNode,
     VirtualScreen
@@ -32,3 +34,4 @@ from kousen.scenegraph.viewport import (
 from kousen.scenegraph.camera import CameraNode
 from kousen.scenegraph.hud import CameraHUDNode
 from kousen.scenegraph.transform import TransformationNode
+from kousen.scenegraph.spatial import SpatialIndex
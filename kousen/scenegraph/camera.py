@@ -4,12 +4,15 @@ This module provides camera specializations of object nodes.
 """
 import math
 from kousen.scenegraph import ObjectNode, VirtualScreen
-from kousen.math import Point3D, Vector3D, Matrix4x4
+from kousen.math import Point3D, Vector3D, Matrix4x4, Quaternion, Frustum
 from kousen.math.conic import conicwidth
 
 class CameraNode(ObjectNode, VirtualScreen):
     """
     The Camera Node provides Camera implementation of a AbstractSceneGraphItem.
+
+    The view is held as the target point, the distance to it and one orientation Quaternion; the tumble and roll
+    operations accumulate into the orientation, and the position and up vector are derived from it.
     """
     # Additional Meta Information
     __category__     = "Camera Node"
@@ -52,16 +55,36 @@ class CameraNode(ObjectNode, VirtualScreen):
         self._restore['_screenwidth']  = swidth  or self.__camera_swidth__
         self._restore['_screenheight'] = sheight or self.__camera_sheight__
         self._restore['_fov']          = fov or self.__camera_fov__
-        self._restore['_position']     = (position or self.__camera_position__).duplicate()
-        self._restore['_target']       = (target or self.__camera_target__).duplicate()
-        self._restore['_up']           = (up or self.__camera_upvector__).duplicate()
+        position = position or self.__camera_position__
+        target   = target or self.__camera_target__
+        self._restore['_target']       = target.duplicate()
+        self._restore['_distance']     = (position - target).length()
+        self._restore['_orientation']  = self._generateOrientation(position, target, up or self.__camera_upvector__)
         self._restore['_viewport']     = self._generateViewport(self._restore['_fov'], self._restore['_screenwidth'], self._restore['_screenheight'], self._restore['_znear'])
 
         self.__projectionmatrix = None
+        self.__frustum = None
 
         self.reset()
         self._updateProjectionMatrix()
 
+    def reset(self):
+        """
+        Resets the non-constant components of the camera.
+        """
+        super(CameraNode, self).reset()
+        if self.__projectionmatrix is not None:
+            self._updateProjectionMatrix()
+        self.__frustum = None
+
+    def localBounds(self):
+        """
+        Overrides the TransformationNode's localBounds method; a camera defines the view and is never culled.
+
+        @returns None.
+        """
+        return None
+
     @property
     def znear(self):
         return self._znear;
@@ -84,7 +107,7 @@ class CameraNode(ObjectNode, VirtualScreen):
 
     @property
     def position(self):
-        return self._position;
+        return self._target + self._orientation * Vector3D(0, 0, self._distance)
 
     @property
     def target(self):
@@ -92,19 +115,38 @@ class CameraNode(ObjectNode, VirtualScreen):
 
     @property
     def up(self):
-        return self._up;
+        return self._orientation * Vector3D(0, 1, 0)
+
+    @property
+    def orientation(self):
+        return self._orientation;
 
     @property
     def viewport(self):
         return self._viewport;
 
+    def _generateOrientation(self, position, target, up):
+        """
+        Generates the orientation of the camera from its LookAt vectors.
+
+        @param position The position of the camera (in world space).
+        @param target   The camera target point (in world space).
+        @param up       The camera up vector (in world space); it does not have to be orthogonal to the direction.
+        @returns        The unit Quaternion rotating the camera space (looking down the negative z-axis, y-axis up) into world space.
+        """
+        z = (position - target).normalized()
+        x = (up ^ z).normalized()
+        y = z ^ x
+        return Quaternion.fromMatrix(Matrix4x4.fromData([x.x, x.y, x.z, 0.0, y.x, y.y, y.z, 0.0, z.x, z.y, z.z, 0.0, 0.0, 0.0, 0.0, 1.0]))
+
     def _generateProjectionMatrix(self):
         """
         Generates a LookAt matrix from internal data.
 
         @returns A Matrix4x4 representation of camera's LookAt component.
         """
-        return Matrix4x4.lookAt(self._position, self._target, self._up, False)
+        # The inverse rotation of the orientation (i.e. its conjugate), after moving the camera position to the origin.
+        return self._orientation.conjugate().toMatrix() * Matrix4x4.translation(- self.position.toVector3D())
 
     def _generateViewport(self, fov, width, height, znear):
         """
@@ -137,7 +179,10 @@ class CameraNode(ObjectNode, VirtualScreen):
         """
         Internal method to manually update the cached transformation matrix from internal data.
         """
-        self.__projectionmatrix = self._generateProjectionMatrix()
+        matrix = self._generateProjectionMatrix()
+        if self.__projectionmatrix is None or matrix.data() != self.__projectionmatrix.data():
+            self.__frustum = None
+        self.__projectionmatrix = matrix
 
     def projectionMatrix(self):
         """
@@ -147,11 +192,59 @@ class CameraNode(ObjectNode, VirtualScreen):
         """
         return self.__projectionmatrix
 
+    def frustum(self):
+        """
+        Returns the cached view frustum; the frustum is rebuilt on request after the view, the viewport or the clipping planes changed.
+
+        @returns A Frustum representation of the camera's viewing volume (in world space).
+        """
+        if self.__frustum is None:
+            self.__frustum = Frustum.fromCamera(self)
+        return self.__frustum
+
+    def regionFrustum(self, x0, y0, x1, y1):
+        """
+        Calculates the sub frustum of a screen rectangle (e.g. a marquee selection); the rectangle is clamped to the screen.
+
+        @param x0 The horizontal screen position of a corner (in pixels, from the left).
+        @param y0 The vertical screen position of a corner (in pixels, from the top).
+        @param x1 The horizontal screen position of the opposite corner.
+        @param y1 The vertical screen position of the opposite corner.
+        @returns  A Frustum representation of the viewing volume of the rectangle (in world space); None if it is empty.
+        """
+        x0, x1 = max(min(x0, x1), 0), min(max(x0, x1), self._screenwidth)
+        y0, y1 = max(min(y0, y1), 0), min(max(y0, y1), self._screenheight)
+        if x0 >= x1 or y0 >= y1:
+            return None
+        left, right, bottom, top = self._viewport
+        sx = (right - left) / self._screenwidth
+        sy = (top - bottom) / self._screenheight
+        viewport = (left + x0 * sx, left + x1 * sx, top - y1 * sy, top - y0 * sy)
+        return Frustum.fromView(self.projectionMatrix(), viewport, self._znear, self._zfar)
+
+    def ray(self, x, y):
+        """
+        Calculates the world space ray from the camera through a screen position (i.e. the unprojection of the position).
+
+        @param x The horizontal screen position (in pixels, from the left).
+        @param y The vertical screen position (in pixels, from the top).
+        @returns A tuple of the Point3D origin (the camera position) and the normalized Vector3D direction of the ray.
+        """
+        left, right, bottom, top = self._viewport
+        u = left + (x + 0.5) / self._screenwidth * (right - left)
+        v = top - (y + 0.5) / self._screenheight * (top - bottom)
+        # The screen position on the near plane, in camera space; the LookAt matrix maps world to camera space.
+        direction = self.projectionMatrix().inverse() * Vector3D(u, v, -self._znear)
+        return (self.position, direction.normalized())
+
     def resize(self, width, height):
         """
         Resizes the virtual screen.
         """
-        self._viewport = self._generateViewport(self._fov, width, height, self._znear)
+        viewport = self._generateViewport(self._fov, width, height, self._znear)
+        if viewport != self._viewport:
+            self.__frustum = None
+        self._viewport = viewport
         self._screenminsize = min(width, height)
         self._screenwidth = width
         self._screenheight = height
@@ -169,27 +262,21 @@ class CameraNode(ObjectNode, VirtualScreen):
         @see Maya Rotation defintions (http://download.autodesk.com/global/docs/maya2013/en_us/index.html?url=files/Viewing_the_scene_Tumble_track_dolly_or_tilt_the_view.htm,topicNumber=d30e15213)
         @see Rotation algorithm (http://gamedev.stackexchange.com/questions/20758/how-can-i-orbit-a-camera-about-its-target-point)
         """
-        # Get the current look at vector (e.g inverse direction)
-        idirection = self._position - self._target
-
         # Rotate the y-axis (aka 'up' vector) which is the plane normal coming out of the x-z plane.
         # The x-z plane is typically the horizontal plane and the yaw angle is measured by the horizontal delta parameter.
         hrotation  = - hdelta * self._pixelradians
-        M          = Matrix4x4.rotation( hrotation, self.__camera_upvector__ )
-        idirection = M * idirection
-        self._up   = M * self._up
-        right      = (self._up ^ idirection).normalized()
+        H          = Quaternion.fromAxisAngle( hrotation, self.__camera_upvector__ )
 
         # Now rotate the x-axis (aka 'right' vector) which is the plane normal coming out of the y-z plane.
         # The y-z plane is typically the vertical plane and the pitch angle is measured by the vertical delta parameter.
         vrotation  = - vdelta * self._pixelradians
-        M          = Matrix4x4.rotation( vrotation, right )
-        idirection = M * idirection
-        self._up   = M * self._up
+        V          = Quaternion.fromAxisAngle( vrotation, Vector3D(1, 0, 0) )
+
+        # Accumulate both rotations into the orientation: the yaw is about the world up vector (on the left), the pitch
+        # about the camera's right vector, i.e. the x-axis of the camera space (on the right).  The position and the up
+        # vector follow from the orientation.
+        self._orientation = H * self._orientation * V
 
-        # Update the camera's position
-        self._position = self._target + idirection
-        
         self._updateProjectionMatrix()
 
     def roll(self, delta):
@@ -200,16 +287,13 @@ class CameraNode(ObjectNode, VirtualScreen):
 
         @param delta The rotation delta (the change in rotating around the direction vector)
         """
-        # Get the current look at vector (e.g inverse direction)
-        direction = self._target - self._position
-
         # Rotate the z-axis (aka 'look at' vector) which is the plane normal coming out of the x-y plane.
         # Since we're rotating the x-y plane, the concept of vertical or horizontal delta doesn't apply; it's
-        # a straight up spin of the look at vector
+        # a straight up spin of the look at vector, i.e. the negative z-axis of the camera space.
         rotation = - delta * self._pixelradians
-        M        = Matrix4x4.rotation( rotation, direction )
-        self._up = M * self._up
-        
+        Q        = Quaternion.fromAxisAngle( rotation, Vector3D(0, 0, -1) )
+        self._orientation = self._orientation * Q
+
         self._updateProjectionMatrix()
 
     def track( self, hdelta, vdelta ):
@@ -222,24 +306,19 @@ class CameraNode(ObjectNode, VirtualScreen):
         @param vdelta The vertical delta (the change in distance along the up vector)
         """
         # We need to calculation a ratio of pixels to world units for speed.
-        # Get the direction vector (normalized) and the distance.
-        direction = self._target - self._position
-        distance  = direction.length()
-        direction = direction.normalized()
-
         # Get the view width at the point along the z-axis and build a pixels to unit ratio
-        viewwidth = conicwidth(self._fov, distance)
+        viewwidth = conicwidth(self._fov, self._distance)
         factor = viewwidth / self._screenminsize
 
-        # Update the right vector
-        right = direction ^ self._up
+        # The right and up vectors are the x and y axes of the camera space.
+        right = self._orientation * Vector3D(1, 0, 0)
+        up    = self._orientation * Vector3D(0, 1, 0)
 
         # Calcaulte the x-y axis translation vector
-        translation = right * (- hdelta * factor) + self._up * (- vdelta * factor)
+        translation = right * (- hdelta * factor) + up * (- vdelta * factor)
 
-        # Move the Position and Target
-        self._position += translation
-        self._target += translation
+        # Move the Target; the Position follows it.
+        self._target = self._target + translation
 
         self._updateProjectionMatrix()
 
@@ -252,20 +331,12 @@ class CameraNode(ObjectNode, VirtualScreen):
         @param delta The translation delta (the change in distance along the direction vector)
         """
         # We need to calculation a ratio of pixels to world units for speed.
-        # Get the direction vector (normalized) and the distance.
-        direction = self._target - self._position
-        distance  = direction.length()
-        direction = direction.normalized()
-
         # Get the view width at the point along the z-axis and build a pixels to unit ratio
-        viewwidth = conicwidth(self._fov, distance)
+        viewwidth = conicwidth(self._fov, self._distance)
         factor = viewwidth / self._screenminsize
 
-        # Calculate the translation along the direction vector
-        translation = direction * (- delta * factor)
-
-        # Move the Position only; the look at point reamins unchanged.
-        self._position += translation
+        # Move the Position only, along the direction vector; the look at point reamins unchanged.
+        self._distance += delta * factor
 
         self._updateProjectionMatrix()
 
@@ -279,5 +350,9 @@ class CameraNode(ObjectNode, VirtualScreen):
         @see http://gamedev.stackexchange.com/questions/30357/3d-zooming-technique-to-maintain-the-relative-position-of-an-object-on-screen
         """
         # Clamp the __camera_fov__ (in degrees) to 1 and 180
-        self._fov  = sorted((1, self._fov - delta, 180))[1]
+        fov = sorted((1, self._fov - delta, 180))[1]
+        if fov == self._fov:
+            return
+        self._fov  = fov
         self._viewport = self._generateViewport(self._fov, self._screenwidth, self._screenheight, self._znear)
+        self.__frustum = None
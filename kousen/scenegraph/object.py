@@ -3,6 +3,8 @@
 This module provides object specializations of transformation nodes.
 """
 from PySide import QtCore, QtGui
+from kousen.math.intersection import rayBox
+from kousen.scenegraph.scene import notifyingSetter
 from kousen.scenegraph.transform import TransformationNode
 
 class ObjectNode(TransformationNode):
@@ -14,6 +16,7 @@ class ObjectNode(TransformationNode):
     __icon__           = ":/icons/node.png"
     __description__    = "<Unknown Primitive>"
     __selectioncolor__ = QtGui.QColor(255, 0, 0)
+    __highlightcolor__ = QtGui.QColor(255, 255, 0)
 
     nodeSelected = QtCore.Signal(bool)
 
@@ -29,6 +32,7 @@ class ObjectNode(TransformationNode):
         # Initial color of the object.
         self.__color = QtGui.QColor(0, 255, 0)
         self.__selected = False
+        self.__highlighted = False
 
     @property
     def selected(self):
@@ -40,6 +44,7 @@ class ObjectNode(TransformationNode):
         return self.__selected
 
     @selected.setter
+    @notifyingSetter()
     def selected(self, value):
         """
         Convenience property to access the selection state of the object node.
@@ -48,6 +53,25 @@ class ObjectNode(TransformationNode):
         """
         self.__selected = value
 
+    @property
+    def highlighted(self):
+        """
+        Convenience property to access the highlight (e.g. mouse hover) state of the object node.
+
+        @returns True if the object is highlighted; False otherwise.
+        """
+        return self.__highlighted
+
+    @highlighted.setter
+    @notifyingSetter()
+    def highlighted(self, value):
+        """
+        Convenience property to access the highlight (e.g. mouse hover) state of the object node.
+
+        @param value True if the object is to be highlighted; False otherwise.
+        """
+        self.__highlighted = value
+
     @property
     def color(self):
         """
@@ -56,10 +80,13 @@ class ObjectNode(TransformationNode):
         @returns A QtGui.QColor instance.
         """
         if self.__selected:
-            return self.__primitive_selectioncolor__
+            return self.__selectioncolor__
+        if self.__highlighted:
+            return self.__highlightcolor__
         return self.__color
 
     @color.setter
+    @notifyingSetter()
     def color(self, value):
         """
         Convenience property to access the color state of the object node.
@@ -77,3 +104,16 @@ class ObjectNode(TransformationNode):
         self.color = color
         for child in self.children():
             child.setColor(color)
+
+    def intersectRay(self, origin, direction):
+        """
+        Intersects a ray with the geometry of the node; the default geometry is the local bounding box.
+
+        @param origin    The Point3D origin of the ray, in the local space of the node.
+        @param direction The Vector3D direction of the ray, in the local space of the node.
+        @returns         The ray parameter of the nearest hit (see kousen.math.intersection); None if the ray misses.
+        """
+        bounds = self.localBounds()
+        if bounds is None or bounds.isEmpty():
+            return None
+        return rayBox(origin, direction, bounds.minimum(), bounds.maximum())
@@ -4,8 +4,11 @@ This module provides primitive specializations of object nodes.
 
 A Primitive is a simple geometric shape defined in constructive solid geometry.  See http://en.wikipedia.org/wiki/Geometric_primitive for more information.
 """
+from kousen.scenegraph.scene import notifyingSetter
 from kousen.scenegraph.object import ObjectNode
-from kousen.math import Point3D, Vector3D
+import math
+from kousen.math import Point3D, Vector3D, BoundingBox
+from kousen.math.intersection import raySphere, rayBox, rayCylinder, rayCone
 
 class PrimitiveNode(ObjectNode):
     """
@@ -39,6 +42,14 @@ class PrimitiveNode(ObjectNode):
         """
         pass
 
+    def localBounds(self):
+        """
+        Overrides the TransformationNode's localBounds method; the geometry of an unknown primitive is not bounded.
+
+        @returns None; specializations return the BoundingBox of their geometry.
+        """
+        return None
+
 class SphereNode(PrimitiveNode):
     """
     SphereNonde implements a Sphere PrimitiveNode.
@@ -57,6 +68,25 @@ class SphereNode(PrimitiveNode):
         super(SphereNode, self).__init__(self.__description__, parent)
         self.__radius = radius
 
+    def localBounds(self):
+        """
+        Overrides the PrimitiveNode's localBounds method.
+
+        @returns The BoundingBox of the sphere.
+        """
+        r = self.radius
+        return BoundingBox((-r, -r, -r), (r, r, r))
+
+    def intersectRay(self, origin, direction):
+        """
+        Overrides the ObjectNode's intersectRay method with the exact sphere test.
+
+        @param origin    The Point3D origin of the ray, in the local space of the node.
+        @param direction The Vector3D direction of the ray, in the local space of the node.
+        @returns         The ray parameter of the nearest hit; None if the ray misses.
+        """
+        return raySphere(origin, direction, self.radius)
+
     @property
     def radius(self):
         """
@@ -67,6 +97,7 @@ class SphereNode(PrimitiveNode):
         return self.__radius
 
     @radius.setter
+    @notifyingSetter(bounds=True)
     def radius(self, value):
         """
         Convenience property for the 'radius' value
@@ -74,6 +105,7 @@ class SphereNode(PrimitiveNode):
         @param The value to store in the 'radius' component
         """
         self.__radius = value
+        self._updateGeometry()
 
 
 class CubeNode(PrimitiveNode):
@@ -94,6 +126,26 @@ class CubeNode(PrimitiveNode):
         super(CubeNode, self).__init__(self.__description__, parent)
         self.__size = size
 
+    def localBounds(self):
+        """
+        Overrides the PrimitiveNode's localBounds method.
+
+        @returns The BoundingBox of the cube.
+        """
+        h = self.size * 0.5
+        return BoundingBox((-h, -h, -h), (h, h, h))
+
+    def intersectRay(self, origin, direction):
+        """
+        Overrides the ObjectNode's intersectRay method with the exact box test.
+
+        @param origin    The Point3D origin of the ray, in the local space of the node.
+        @param direction The Vector3D direction of the ray, in the local space of the node.
+        @returns         The ray parameter of the nearest hit; None if the ray misses.
+        """
+        h = self.size * 0.5
+        return rayBox(origin, direction, (-h, -h, -h), (h, h, h))
+
     @property
     def size(self):
         """
@@ -104,6 +156,7 @@ class CubeNode(PrimitiveNode):
         return self.__size
 
     @size.setter
+    @notifyingSetter(bounds=True)
     def size(self, value):
         """
         Convenience property for the 'size' value
@@ -134,6 +187,32 @@ class CylinderNode(PrimitiveNode):
         self.__length = length
         self.__axis = axis
 
+    def localBounds(self):
+        """
+        Overrides the PrimitiveNode's localBounds method.
+
+        The cylinder extends from the origin along its axis; each base disc extends along a coordinate axis by the radius
+        times the sine of the angle between the coordinate axis and the cylinder axis.
+
+        @returns The BoundingBox of the cylinder.
+        """
+        axis = self.axis.normalized()
+        top = axis * self.length
+        extents = [self.radius * math.sqrt(max(0.0, 1.0 - a * a)) for a in axis]
+        return BoundingBox(
+            [min(0.0, t) - e for t, e in zip(top, extents)],
+            [max(0.0, t) + e for t, e in zip(top, extents)])
+
+    def intersectRay(self, origin, direction):
+        """
+        Overrides the ObjectNode's intersectRay method with the exact capped cylinder test.
+
+        @param origin    The Point3D origin of the ray, in the local space of the node.
+        @param direction The Vector3D direction of the ray, in the local space of the node.
+        @returns         The ray parameter of the nearest hit; None if the ray misses.
+        """
+        return rayCylinder(origin, direction, self.axis.normalized(), self.radius, self.length)
+
     @property
     def radius(self):
         """
@@ -144,6 +223,7 @@ class CylinderNode(PrimitiveNode):
         return self.__radius
 
     @radius.setter
+    @notifyingSetter(bounds=True)
     def radius(self, value):
         """
         Convenience property for the 'radius' value
@@ -151,6 +231,7 @@ class CylinderNode(PrimitiveNode):
         @param The value to store in the 'radius' component
         """
         self.__radius = value
+        self._updateGeometry()
 
     @property
     def length(self):
@@ -162,6 +243,7 @@ class CylinderNode(PrimitiveNode):
         return self.__length
 
     @length.setter
+    @notifyingSetter(bounds=True)
     def length(self, value):
         """
         Convenience property for the 'length' value
@@ -169,6 +251,7 @@ class CylinderNode(PrimitiveNode):
         @param The value to store in the 'length' component
         """
         self.__length = value
+        self._updateGeometry()
 
     @property
     def axis(self):
@@ -180,6 +263,7 @@ class CylinderNode(PrimitiveNode):
         return self.__axis
 
     @axis.setter
+    @notifyingSetter(bounds=True)
     def axis(self, value):
         """
         Convenience property for the 'axis' value
@@ -187,6 +271,7 @@ class CylinderNode(PrimitiveNode):
         @param The value to store in the 'axis' component
         """
         self.__axis = value
+        self._updateGeometry()
 
 class ConeNode(CylinderNode):
     """
@@ -196,6 +281,16 @@ class ConeNode(CylinderNode):
     __description__  = "Cone Primitve"
     __instantiable__ = True
 
+    def intersectRay(self, origin, direction):
+        """
+        Overrides the CylinderNode's intersectRay method with the exact capped cone test.
+
+        @param origin    The Point3D origin of the ray, in the local space of the node.
+        @param direction The Vector3D direction of the ray, in the local space of the node.
+        @returns         The ray parameter of the nearest hit; None if the ray misses.
+        """
+        return rayCone(origin, direction, self.axis.normalized(), self.radius, self.length)
+
 class ArrowNode(PrimitiveNode):
     """
     ArrowNode implements a primitive composite node.
@@ -225,6 +320,14 @@ class ArrowNode(PrimitiveNode):
         
         self._updateGeometry()
 
+    def localBounds(self):
+        """
+        Overrides the PrimitiveNode's localBounds method; the geometry of the arrow is carried by its child nodes.
+
+        @returns An empty BoundingBox.
+        """
+        return BoundingBox()
+
     def _updateGeometry(self):
         """
         Internal method to manually update the cached geometry data from internal data.
@@ -368,6 +471,14 @@ class GnomonNode(PrimitiveNode):
         self.__coradius = coradius
         self._updateGeometry()
 
+    def localBounds(self):
+        """
+        Overrides the PrimitiveNode's localBounds method; the geometry of the gnomon is carried by its child nodes.
+
+        @returns An empty BoundingBox.
+        """
+        return BoundingBox()
+
     def _updateGeometry(self):
         """
         Internal method to manually update the cached geometry data from internal data.
@@ -553,6 +664,19 @@ class PlaneNode(PrimitiveNode):
         self.__width = width
         self.__normal = normal
 
+    def localBounds(self):
+        """
+        Overrides the PrimitiveNode's localBounds method.
+
+        The plane is bounded by the disc, perpendicular to the normal, through its corners; each coordinate extent is
+        the disc radius times the sine of the angle between the coordinate axis and the normal.
+
+        @returns The BoundingBox of the plane.
+        """
+        normal = self.normal.normalized()
+        radius = math.sqrt(self.length * self.length + self.width * self.width) * 0.5
+        return BoundingBox.fromCenter((0.0, 0.0, 0.0), [radius * math.sqrt(max(0.0, 1.0 - n * n)) for n in normal])
+
     @property
     def length(self):
         """
@@ -563,6 +687,7 @@ class PlaneNode(PrimitiveNode):
         return self.__length
 
     @length.setter
+    @notifyingSetter(bounds=True)
     def length(self, value):
         """
         Convenience property for the 'length' value
@@ -581,6 +706,7 @@ class PlaneNode(PrimitiveNode):
         return self.__width
 
     @width.setter
+    @notifyingSetter(bounds=True)
     def width(self, value):
         """
         Convenience property for the 'width' value
@@ -599,6 +725,7 @@ class PlaneNode(PrimitiveNode):
         return self.__normal
 
     @normal.setter
+    @notifyingSetter(bounds=True)
     def normal(self, value):
         """
         Convenience property for the 'normal' value
@@ -630,6 +757,15 @@ class GridNode(PlaneNode):
         self.__spacing = spacing
         self.__count = count
 
+    def localBounds(self):
+        """
+        Overrides the PlaneNode's localBounds method; the grid lines are centered on the origin in the xz-plane.
+
+        @returns The BoundingBox of the grid.
+        """
+        c = self.count / 2 * self.spacing
+        return BoundingBox((-c, 0.0, -c), (c, 0.0, c))
+
     @property
     def spacing(self):
         """
@@ -640,6 +776,7 @@ class GridNode(PlaneNode):
         return self.__spacing
 
     @spacing.setter
+    @notifyingSetter(bounds=True)
     def spacing(self, value):
         """
         Convenience property for the 'spacing' value
@@ -658,6 +795,7 @@ class GridNode(PlaneNode):
         return self.__count
 
     @count.setter
+    @notifyingSetter(bounds=True)
     def count(self, value):
         """
         Convenience property for the 'count' value
@@ -4,7 +4,9 @@ This module provides quadric specializations of primitive nodes.
 
 A Quadric surface is a tessellated polygon defined by a quadratic polynomial.  See http://en.wikipedia.org/wiki/Quadric for more information.
 """
+import math
 from PySide import QtCore, QtGui
+from kousen.scenegraph.scene import notifyingSetter
 from kousen.scenegraph.primitive import (
     SphereNode,
     CylinderNode,
@@ -14,8 +16,51 @@ from kousen.scenegraph.primitive import (
 )
 from kousen.math import (
     Point3D, 
-    Vector3D
+    Vector3D,
+    Matrix4x4,
+    BoundingBox,
+    tessellation
 )
+from kousen.math.intersection import raySphere, rayCylinder, rayCone
+
+def _axisMatrix(axis):
+    """
+    Generates the rotation matrix aligning the positive z-axis (the axis of the unit quadric meshes) with an axis.
+
+    @param axis The axis Vector3D.
+    @returns    A Matrix4x4 Rotation Matrix.
+    """
+    # If our vector is not parallel to the z-axis, e.g. (0, 0, Z), then rotate it.
+    #   1) Get a normal from the z-v plane
+    #   2) Get the angle inbetween z-v on the plane (see vector dot product)
+    #   3) Rotate the normal by that angle.
+    m = Matrix4x4.identity()
+    if axis.x != 0 or axis.y != 0:
+        zaxis  = Vector3D(0,0,1)
+        angle  = zaxis.angle(axis)
+        normal = zaxis.crossproduct(axis, True)
+        m *= Matrix4x4.rotation(angle, normal)
+
+    # If our z is negative, we need to flip the mesh
+    if axis.z < 0:
+        yaxis  = Vector3D(1,0,0)
+        m *= Matrix4x4.rotation(math.radians(180), yaxis)
+    return m
+
+def _meshRay(node, origin, direction):
+    """
+    Transforms a ray from the local space of a quadric node into the space of its unit mesh; the ray parameters are preserved.
+
+    @param node      The quadric node.
+    @param origin    The Point3D origin of the ray, in the local space of the node.
+    @param direction The Vector3D direction of the ray, in the local space of the node.
+    @returns         A tuple of the origin and direction in the unit mesh space; None if the mesh matrix is singular.
+    """
+    try:
+        inverse = node.meshMatrix().inverse()
+    except ArithmeticError:
+        return None
+    return (inverse * origin, inverse * direction)
 
 class QuadricSphereNode(SphereNode):
     """
@@ -26,6 +71,9 @@ class QuadricSphereNode(SphereNode):
     __description__  = "Quadric Sphere Primitve"
     __instantiable__ = True
 
+    # The bounds of the unit mesh (see kousen.math.tessellation).
+    __unitbounds = BoundingBox((-1, -1, -1), (1, 1, 1))
+
     def __init__(self, radius = 1.0, slices = 32, stacks = 32, parent=None):
         """
         Constructor.
@@ -38,6 +86,49 @@ class QuadricSphereNode(SphereNode):
         super(QuadricSphereNode, self).__init__(radius, parent)
         self.__stacks = stacks
         self.__slices = slices
+        self._updateGeometry()
+
+    def _updateGeometry(self):
+        """
+        Internal method to manually update the cached geometry data from internal data.
+        """
+        self.__mesh = tessellation.sphere(self.slices, self.stacks)
+        self.__meshmatrix = Matrix4x4.scale(self.radius)
+
+    def mesh(self):
+        """
+        Returns the shared unit sphere mesh of the node's tessellation.
+
+        @returns A Mesh instance.
+        """
+        return self.__mesh
+
+    def meshMatrix(self):
+        """
+        Returns the pre-calculated matrix applying the node's dimensions to its unit mesh.
+
+        @returns A Matrix4x4 Scale Matrix.
+        """
+        return self.__meshmatrix
+
+    def localBounds(self):
+        """
+        Overrides the SphereNode's localBounds method with the bounds of the unit mesh transformed by the mesh matrix.
+
+        @returns The BoundingBox of the tessellated sphere.
+        """
+        return self.__unitbounds.transform(self.__meshmatrix)
+
+    def intersectRay(self, origin, direction):
+        """
+        Overrides the SphereNode's intersectRay method with the exact test of the unit sphere mesh.
+
+        @param origin    The Point3D origin of the ray, in the local space of the node.
+        @param direction The Vector3D direction of the ray, in the local space of the node.
+        @returns         The ray parameter of the nearest hit; None if the ray misses.
+        """
+        ray = _meshRay(self, origin, direction)
+        return raySphere(ray[0], ray[1], 1.0) if ray else None
 
     @property
     def slices(self):
@@ -49,6 +140,7 @@ class QuadricSphereNode(SphereNode):
         return self.__slices
 
     @slices.setter
+    @notifyingSetter()
     def slices(self, value):
         """
         Convenience property for the 'slices' value
@@ -56,6 +148,7 @@ class QuadricSphereNode(SphereNode):
         @param The value to store in the 'slices' component
         """
         self.__slices = value
+        self._updateGeometry()
 
     @property
     def stacks(self):
@@ -67,6 +160,7 @@ class QuadricSphereNode(SphereNode):
         return self.__stacks
 
     @stacks.setter
+    @notifyingSetter()
     def stacks(self, value):
         """
         Convenience property for the 'stacks' value
@@ -74,6 +168,7 @@ class QuadricSphereNode(SphereNode):
         @param The value to store in the 'stacks' component
         """
         self.__stacks = value
+        self._updateGeometry()
 
 
 class QuadricCylinderNode(CylinderNode):
@@ -85,6 +180,9 @@ class QuadricCylinderNode(CylinderNode):
     __description__  = "Quadric Cylinder Primitve"
     __instantiable__ = True
 
+    # The bounds of the unit mesh (see kousen.math.tessellation).
+    __unitbounds = BoundingBox((-1, -1, 0), (1, 1, 1))
+
     def __init__(self, radius = 1.0, length = 1, axis=Vector3D(0,1,0), slices = 32, stacks = 1, loops = 1, parent=None):
         """
         Constructor.
@@ -101,6 +199,49 @@ class QuadricCylinderNode(CylinderNode):
         self.__stacks = stacks
         self.__slices = slices
         self.__loops = loops
+        self._updateGeometry()
+
+    def _updateGeometry(self):
+        """
+        Internal method to manually update the cached geometry data from internal data.
+        """
+        self.__mesh = tessellation.cylinder(self.slices, self.stacks, self.loops)
+        self.__meshmatrix = _axisMatrix(self.axis) * Matrix4x4.scale(Vector3D(self.radius, self.radius, self.length))
+
+    def mesh(self):
+        """
+        Returns the shared unit cylinder mesh of the node's tessellation.
+
+        @returns A Mesh instance.
+        """
+        return self.__mesh
+
+    def meshMatrix(self):
+        """
+        Returns the pre-calculated matrix applying the node's dimensions and axis to its unit mesh.
+
+        @returns A Matrix4x4 Transformation Matrix.
+        """
+        return self.__meshmatrix
+
+    def localBounds(self):
+        """
+        Overrides the CylinderNode's localBounds method with the bounds of the unit mesh transformed by the mesh matrix.
+
+        @returns The BoundingBox of the tessellated cylinder.
+        """
+        return self.__unitbounds.transform(self.__meshmatrix)
+
+    def intersectRay(self, origin, direction):
+        """
+        Overrides the CylinderNode's intersectRay method with the exact test of the unit capped cylinder mesh.
+
+        @param origin    The Point3D origin of the ray, in the local space of the node.
+        @param direction The Vector3D direction of the ray, in the local space of the node.
+        @returns         The ray parameter of the nearest hit; None if the ray misses.
+        """
+        ray = _meshRay(self, origin, direction)
+        return rayCylinder(ray[0], ray[1], (0.0, 0.0, 1.0), 1.0, 1.0) if ray else None
 
     @property
     def slices(self):
@@ -112,6 +253,7 @@ class QuadricCylinderNode(CylinderNode):
         return self.__slices
 
     @slices.setter
+    @notifyingSetter()
     def slices(self, value):
         """
         Convenience property for the 'slices' value
@@ -119,6 +261,7 @@ class QuadricCylinderNode(CylinderNode):
         @param The value to store in the 'slices' component
         """
         self.__slices = value
+        self._updateGeometry()
 
     @property
     def stacks(self):
@@ -130,6 +273,7 @@ class QuadricCylinderNode(CylinderNode):
         return self.__stacks
 
     @stacks.setter
+    @notifyingSetter()
     def stacks(self, value):
         """
         Convenience property for the 'stacks' value
@@ -137,6 +281,7 @@ class QuadricCylinderNode(CylinderNode):
         @param The value to store in the 'stacks' component
         """
         self.__stacks = value
+        self._updateGeometry()
 
     @property
     def loops(self):
@@ -148,6 +293,7 @@ class QuadricCylinderNode(CylinderNode):
         return self.__loops
 
     @loops.setter
+    @notifyingSetter()
     def loops(self, value):
         """
         Convenience property for the 'loops' value
@@ -155,6 +301,7 @@ class QuadricCylinderNode(CylinderNode):
         @param The value to store in the 'loops' component
         """
         self.__loops = value
+        self._updateGeometry()
 
 
 class QuadricConeNode(ConeNode):
@@ -166,6 +313,9 @@ class QuadricConeNode(ConeNode):
     __description__  = "Quadric Cone Primitve"
     __instantiable__ = True
 
+    # The bounds of the unit mesh (see kousen.math.tessellation).
+    __unitbounds = BoundingBox((-1, -1, 0), (1, 1, 1))
+
     def __init__(self, radius = 1.0, length = 1, axis=Vector3D(0,1,0), slices = 32, stacks = 32, loops = 1, parent=None):
         """
         Constructor.
@@ -182,6 +332,49 @@ class QuadricConeNode(ConeNode):
         self.__stacks = stacks
         self.__slices = slices
         self.__loops = loops
+        self._updateGeometry()
+
+    def _updateGeometry(self):
+        """
+        Internal method to manually update the cached geometry data from internal data.
+        """
+        self.__mesh = tessellation.cone(self.slices, self.stacks, self.loops)
+        self.__meshmatrix = _axisMatrix(self.axis) * Matrix4x4.scale(Vector3D(self.radius, self.radius, self.length))
+
+    def mesh(self):
+        """
+        Returns the shared unit cone mesh of the node's tessellation.
+
+        @returns A Mesh instance.
+        """
+        return self.__mesh
+
+    def meshMatrix(self):
+        """
+        Returns the pre-calculated matrix applying the node's dimensions and axis to its unit mesh.
+
+        @returns A Matrix4x4 Transformation Matrix.
+        """
+        return self.__meshmatrix
+
+    def localBounds(self):
+        """
+        Overrides the ConeNode's localBounds method with the bounds of the unit mesh transformed by the mesh matrix.
+
+        @returns The BoundingBox of the tessellated cone.
+        """
+        return self.__unitbounds.transform(self.__meshmatrix)
+
+    def intersectRay(self, origin, direction):
+        """
+        Overrides the ConeNode's intersectRay method with the exact test of the unit capped cone mesh.
+
+        @param origin    The Point3D origin of the ray, in the local space of the node.
+        @param direction The Vector3D direction of the ray, in the local space of the node.
+        @returns         The ray parameter of the nearest hit; None if the ray misses.
+        """
+        ray = _meshRay(self, origin, direction)
+        return rayCone(ray[0], ray[1], (0.0, 0.0, 1.0), 1.0, 1.0) if ray else None
 
     @property
     def slices(self):
@@ -193,6 +386,7 @@ class QuadricConeNode(ConeNode):
         return self.__slices
 
     @slices.setter
+    @notifyingSetter()
     def slices(self, value):
         """
         Convenience property for the 'slices' value
@@ -200,6 +394,7 @@ class QuadricConeNode(ConeNode):
         @param The value to store in the 'slices' component
         """
         self.__slices = value
+        self._updateGeometry()
 
     @property
     def stacks(self):
@@ -211,6 +406,7 @@ class QuadricConeNode(ConeNode):
         return self.__stacks
 
     @stacks.setter
+    @notifyingSetter()
     def stacks(self, value):
         """
         Convenience property for the 'stacks' value
@@ -218,6 +414,7 @@ class QuadricConeNode(ConeNode):
         @param The value to store in the 'stacks' component
         """
         self.__stacks = value
+        self._updateGeometry()
 
     @property
     def loops(self):
@@ -229,6 +426,7 @@ class QuadricConeNode(ConeNode):
         return self.__loops
 
     @loops.setter
+    @notifyingSetter()
     def loops(self, value):
         """
         Convenience property for the 'loops' value
@@ -236,6 +434,7 @@ class QuadricConeNode(ConeNode):
         @param The value to store in the 'loops' component
         """
         self.__loops = value
+        self._updateGeometry()
 
 class QuadricArrowNode(ArrowNode):
     """
@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+"""
+This module provides the scatter specialization of object nodes.
+
+A ScatterNode repeats a prototype subtree at the instance transforms generated from a pattern (a grid, a ring, a
+seeded random distribution or an explicit array of matrices); the transforms are held in one Matrix4x4Array instead of
+one node per instance, so thousands of instances cost one node (and one row in the scene explorer).  The prototype is
+not a child of the ScatterNode: it is not part of the scene graph model and is only drawn, bounded and picked through
+the instances.  The changes of the prototype's own data (e.g. a dimension) are not observed: they are applied by
+assigning the prototype again.
+"""
+import math
+import numpy
+from PySide import QtCore
+from kousen.math import Point3D, Vector3D, Matrix4x4, Matrix4x4Array, BoundingBox, Transaction
+from kousen.scenegraph.object import ObjectNode
+from kousen.scenegraph.quadric import QuadricSphereNode
+
+def _rayBoxes(origins, directions, minimum, maximum):
+    """
+    Intersects rays with an axis aligned box (the vectorized 'slab' test, see kousen.math.intersection.rayBox).
+
+    @param origins    An (N,3) array of ray origins.
+    @param directions An (N,3) array of ray directions.
+    @param minimum    The minimum corner of the box.
+    @param maximum    The maximum corner of the box.
+    @returns          An (N,) array of the ray parameters at which the rays enter the box (0 if the origin is inside); inf if a ray misses.
+    """
+    minimum, maximum = numpy.array(tuple(minimum)), numpy.array(tuple(maximum))
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        t0 = (minimum - origins) / directions
+        t1 = (maximum - origins) / directions
+    parallel = directions == 0.0
+    inside = (origins >= minimum) & (origins <= maximum)
+    near = numpy.where(parallel, numpy.where(inside, -numpy.inf, numpy.inf), numpy.minimum(t0, t1))
+    far = numpy.where(parallel, numpy.where(inside, numpy.inf, -numpy.inf), numpy.maximum(t0, t1))
+    enter = numpy.maximum(near.max(axis=1), 0.0)
+    enter[enter > far.min(axis=1)] = numpy.inf
+    return enter
+
+def _placements(translations, angles=None):
+    """
+    Generates the instance transforms of translated (and rotated about the y-axis) instances.
+
+    @param translations An (N,3) array of translations.
+    @param angles       An (N,) array of angles in radians; None for no rotation.
+    @returns            A Matrix4x4Array.
+    """
+    translations = numpy.asarray(translations, dtype=numpy.float64).reshape((-1, 3))
+    transforms = Matrix4x4Array.identity(len(translations))
+    data = transforms.data()
+    data[:, :3, 3] = translations
+    if angles is not None:
+        c, s = numpy.cos(angles), numpy.sin(angles)
+        data[:, 0, 0] = c
+        data[:, 0, 2] = s
+        data[:, 2, 0] = -s
+        data[:, 2, 2] = c
+    return transforms
+
+class ScatterNode(ObjectNode):
+    """
+    ScatterNode implements an ObjectNode repeating a prototype subtree at procedurally generated instance transforms.
+    """
+    # Additional Meta Information
+    __category__     = "Scatter Node"
+    __description__  = "Scatter"
+    __instantiable__ = True
+
+    # The patterns of the instance transforms.
+    GRID, RADIAL, RANDOM, EXPLICIT = range(4)
+
+    def __init__(self, prototype=None, parent=None):
+        """
+        Constructor.
+
+        @param prototype The root AbstractSceneGraphItem of the repeated subtree (without a parent); if None, a small sphere.
+        @param parent    The parent SceneGraphNode instance.
+        """
+        super(ScatterNode, self).__init__(self.__description__, parent)
+        self.__prototype = prototype if prototype is not None else QuadricSphereNode(0.25, 16, 16)
+        self.__pattern = None
+        self.__transforms = Matrix4x4Array.identity(0)
+        self.setGrid()
+
+    def _setTransforms(self, pattern, transforms):
+        """
+        Internal method to replace the instance transforms and notify the change.
+
+        @param pattern    The pattern of the transforms.
+        @param transforms A Matrix4x4Array.
+        """
+        Transaction.changing(self, 'dataChanging', self.Fields.NAME, QtCore.Qt.DisplayRole)
+        self.__pattern = pattern
+        self.__transforms = transforms
+        self._updateBounds()
+        Transaction.changed(self, 'dataChanged', self.Fields.NAME, QtCore.Qt.DisplayRole)
+
+    @property
+    def prototype(self):
+        """
+        Convenience property to access the prototype of the instances.
+
+        @returns The root AbstractSceneGraphItem of the repeated subtree.
+        """
+        return self.__prototype
+
+    @prototype.setter
+    def prototype(self, value):
+        """
+        Convenience property to access the prototype of the instances.
+
+        @param value The root AbstractSceneGraphItem of the repeated subtree (without a parent).
+        """
+        self.__prototype = value
+        self._setTransforms(self.__pattern, self.__transforms)
+
+    @property
+    def pattern(self):
+        """
+        Convenience property for the pattern of the instance transforms.
+
+        @returns One of ScatterNode.GRID, ScatterNode.RADIAL, ScatterNode.RANDOM or ScatterNode.EXPLICIT.
+        """
+        return self.__pattern
+
+    @property
+    def count(self):
+        """
+        Convenience property for the number of instances.
+
+        @returns The number of instance transforms.
+        """
+        return len(self.__transforms)
+
+    def transforms(self):
+        """
+        Returns the instance transforms; the array must not be modified (see setTransforms).
+
+        @returns A Matrix4x4Array of the transforms from the prototype space to the local space of the node.
+        """
+        return self.__transforms
+
+    def setGrid(self, counts=(10, 1, 10), spacing=(1.0, 1.0, 1.0)):
+        """
+        Places the instances on a regular grid centered on the origin.
+
+        @param counts  The number of instances along the x, y and z axes.
+        @param spacing The distance between the instances along the x, y and z axes.
+        """
+        axes = [(numpy.arange(n) - (n - 1) * 0.5) * d for n, d in zip(counts, spacing)]
+        x, y, z = numpy.meshgrid(*axes, indexing='ij')
+        self._setTransforms(self.GRID, _placements(numpy.column_stack((x.ravel(), y.ravel(), z.ravel()))))
+
+    def setRadial(self, count=12, radius=5.0):
+        """
+        Places the instances evenly on a circle around the y-axis, each rotated to face away from the axis (i.e. along its x-axis).
+
+        @param count  The number of instances.
+        @param radius The radius of the circle.
+        """
+        angles = numpy.arange(count) * (2.0 * math.pi / count) if count else numpy.zeros(0)
+        translations = numpy.column_stack((radius * numpy.cos(angles), numpy.zeros(count), -radius * numpy.sin(angles)))
+        self._setTransforms(self.RADIAL, _placements(translations, angles))
+
+    def setRandom(self, count=100, extents=(5.0, 5.0, 5.0), seed=0):
+        """
+        Places the instances at random positions within a box centered on the origin, each randomly rotated about the y-axis.
+
+        The distribution is reproducible: the same seed generates the same transforms.
+
+        @param count   The number of instances.
+        @param extents The half size of the box along the x, y and z axes.
+        @param seed    The seed of the random number generator.
+        """
+        generator = numpy.random.RandomState(seed)
+        extents = numpy.asarray(extents, dtype=numpy.float64)
+        translations = generator.uniform(-1.0, 1.0, (count, 3)) * extents
+        angles = generator.uniform(0.0, 2.0 * math.pi, count)
+        self._setTransforms(self.RANDOM, _placements(translations, angles))
+
+    def setTransforms(self, transforms):
+        """
+        Places the instances at explicit transforms.
+
+        @param transforms A Matrix4x4Array, an (N,4,4) array-like indexed as [matrix, row, column] or a list of Matrix4x4.
+        """
+        if isinstance(transforms, Matrix4x4Array):
+            pass
+        elif len(transforms) and isinstance(transforms[0], Matrix4x4):
+            transforms = Matrix4x4Array.fromMatrices(transforms)
+        else:
+            transforms = Matrix4x4Array(numpy.asarray(transforms, dtype=numpy.float64).reshape((-1, 4, 4)))
+        self._setTransforms(self.EXPLICIT, transforms.duplicate())
+
+    def localBounds(self):
+        """
+        Overrides the ObjectNode's localBounds method with the union of the prototype bounds at every instance transform.
+
+        @returns A BoundingBox; None if the prototype is not bounded.
+        """
+        bounds = self.__prototype.worldBounds()
+        if bounds is None or bounds.isEmpty() or not self.count:
+            return bounds if bounds is None else BoundingBox()
+        # The transformed bounds of the instances (see BoundingBox.transform), for affine transforms.
+        data = self.__transforms.data()
+        c, e = numpy.array(tuple(bounds.center())), numpy.array(tuple(bounds.extents()))
+        centers = numpy.einsum('nij,j->ni', data[:, :3, :3], c) + data[:, :3, 3]
+        extents = numpy.einsum('nij,j->ni', numpy.abs(data[:, :3, :3]), e)
+        return BoundingBox((centers - extents).min(axis=0).tolist(), (centers + extents).max(axis=0).tolist())
+
+    def intersectRay(self, origin, direction):
+        """
+        Overrides the ObjectNode's intersectRay method with the exact tests of the prototype's ObjectNodes at every instance.
+
+        The rays are transformed into the space of every instance at once; only the instances whose bounds are hit
+        before the nearest exact hit are tested exactly.
+
+        @param origin    The Point3D origin of the ray, in the local space of the node.
+        @param direction The Vector3D direction of the ray, in the local space of the node.
+        @returns         The ray parameter of the nearest hit; None if the ray misses.
+        """
+        nearest = None
+        if not self.count:
+            return nearest
+        origins = numpy.tile((origin[0], origin[1], origin[2]), (self.count, 1))
+        directions = numpy.tile((direction[0], direction[1], direction[2]), (self.count, 1))
+        for part in self.__prototype.iter_filter(lambda item: isinstance(item, ObjectNode)):
+            bounds = part.localBounds()
+            if bounds is None or bounds.isEmpty():
+                continue
+            try:
+                inverse = (self.__transforms * part.worldMatrix()).inverse()
+            except numpy.linalg.LinAlgError:
+                continue
+            o = inverse.transformPoints(origins)
+            d = inverse.transformVectors(directions)
+            enter = _rayBoxes(o, d, bounds.minimum(), bounds.maximum())
+            for i in numpy.argsort(enter):
+                if enter[i] == numpy.inf or (nearest is not None and enter[i] > nearest):
+                    break
+                t = part.intersectRay(Point3D(*o[i].tolist()), Vector3D(*d[i].tolist()))
+                if t is not None and (nearest is None or t < nearest):
+                    nearest = t
+        return nearest
@@ -4,8 +4,69 @@ This module provides the base components of the scene graph.
 
 The module implements the scene graph as a specialized AbstractDataTreeModel and the various scene graph nodes as specialized AbstractDataTreeItems.
 """
+import functools
 from PySide import QtCore, QtGui
 from kousen.core.abstractmodel import AbstractData, AbstractDataFields, AbstractDataTreeItem, AbstractDataTreeModel
+from kousen.math import BoundingBox, Transaction
+
+class TraversalEvent(object):
+    """
+    The TraversalEvent class provides an enumeration of the events generated by a scene graph walk.
+    """
+    ENTER = 0
+    EXIT  = 1
+
+def walk(root, next, traversable=None):
+    """
+    Walks a tree depth first with an explicit stack, so the depth of the tree is not limited by the recursion limit.
+
+    The walk is lazy: the children of a node are requested (and the traversability of a child is evaluated) only after
+    the events preceding them were consumed, and closing the generator (e.g. breaking out of the loop) ends the walk.
+
+    @param root        The node at the root of the walk.
+    @param next        A callable returning the iterable of the children of a node.
+    @param traversable A callable evaluating if a node (and its subtree) is walked; None to walk every node.
+    @returns           A generator of (TraversalEvent, node) tuples; ENTER in pre-order and EXIT in post-order.
+    """
+    if traversable is not None and not traversable(root):
+        return
+    yield TraversalEvent.ENTER, root
+    stack = [(root, iter(next(root)))]
+    while stack:
+        node, children = stack[-1]
+        for child in children:
+            if traversable is None or traversable(child):
+                yield TraversalEvent.ENTER, child
+                stack.append((child, iter(next(child))))
+                break
+        else:
+            stack.pop()
+            yield TraversalEvent.EXIT, node
+
+def notifyingSetter(bounds=False):
+    """
+    Creates a decorator of the property setters of an AbstractSceneGraphItem notifying the change of the property.
+
+        @radius.setter
+        @notifyingSetter(bounds=True)
+        def radius(self, value):
+            self.__radius = value
+
+    @param bounds True if the property changes the bounds of the item (e.g. a dimension); the cached world bounds are
+                  invalidated and the model refits the item in its spatial index.  False for the properties only
+                  changing the appearance of the item (e.g. its color or its tessellation).
+    @returns      A decorator of a setter function.
+    """
+    def decorator(setter):
+        @functools.wraps(setter)
+        def notifying(self, value):
+            self._propertyChanging()
+            setter(self, value)
+            if bounds:
+                self._updateBounds()
+            self._propertyChanged()
+        return notifying
+    return decorator
 
 class AbstractSceneItemData(AbstractData):
     """
@@ -79,6 +140,28 @@ class AbstractSceneGraphItem(AbstractDataTreeItem):
         """
         super(AbstractSceneGraphItem, self).__init__(sdata, parent)
         self._restore = {}
+        self._worldbounds = None
+        self._boundsdirty = True
+        # True if the item moved or changed its geometry since the model last refitted it in its spatial index.
+        self._indexdirty = False
+
+    def _childAdded(self, item):
+        """
+        Overrides the AbstractDataTreeItem's _childAdded method to invalidate the cached world bounds.
+
+        @parem item The item that has been added as a 'child'
+        """
+        self._updateBounds()
+        super(AbstractSceneGraphItem, self)._childAdded(item)
+
+    def _childRemoved(self, item):
+        """
+        Overrides the AbstractDataTreeItem's _childRemoved method to invalidate the cached world bounds.
+
+        @parem item The item that has been removed as a 'child'
+        """
+        self._updateBounds()
+        super(AbstractSceneGraphItem, self)._childRemoved(item)
 
     def reset(self):
         """
@@ -95,6 +178,26 @@ class AbstractSceneGraphItem(AbstractDataTreeItem):
         """
         return self.Fields.size()
 
+    def walk(self, traversable=None):
+        """
+        Walks the item and its descendants depth first (see kousen.scenegraph.scene.walk).
+
+        @param traversable A callable evaluating if an item (and its subtree) is walked; None to walk every item.
+        @returns           A generator of (TraversalEvent, AbstractSceneGraphItem) tuples.
+        """
+        return walk(self, lambda item: item._children, traversable)
+
+    def iter_filter(self, condition):
+        """
+        Generates the item and its descendants, in pre-order, based on a boolean expression evaluation.
+
+        @param   condition A lambda expression used to evaluate each item.
+        @returns           A generator of AbstractSceneGraphItem that succesfully evaluate the condition.
+        """
+        for event, item in self.walk():
+            if event == TraversalEvent.ENTER and condition(item):
+                yield item
+
     def filter(self, condition):
         """
         Generates an inclusive list of node and children based on a boolean expression evaluation.
@@ -102,10 +205,81 @@ class AbstractSceneGraphItem(AbstractDataTreeItem):
         @param   condition A lambda expression used to recursively evaluate each node.
         @returns           A list of AbstractSceneGraphItem that succesfully evaluate the condition.
         """
-        result = [self] if condition(self) else []
+        return list(self.iter_filter(condition))
+
+    def localBounds(self):
+        """
+        Calculates the bounding box of the item's own geometry, in the item's local space.
+
+        @returns A BoundingBox (empty if the item has no geometry); None if the item is not bounded in the scene (e.g. it is drawn in its own view space).
+        """
+        return None
+
+    def _propertyChanging(self):
+        """
+        Internal method to notify that a property of the item (e.g. a dimension or a color) is about to change.
+        """
+        Transaction.changing(self, 'dataChanging', self.Fields.NAME, QtCore.Qt.DisplayRole)
+
+    def _propertyChanged(self):
+        """
+        Internal method to notify that a property of the item changed; the views (e.g. a GLRenderList) update their
+        data of the item, and the model refits the item in its spatial index if its bounds changed (see _updateBounds).
+        """
+        Transaction.changed(self, 'dataChanged', self.Fields.NAME, QtCore.Qt.DisplayRole)
+
+    def _updateBounds(self):
+        """
+        Internal method to mark the cached world bounds of this item and its ancestors as dirty (e.g. after a dimension change).
+
+        The ancestors of a dirty item are always dirty, so the propagation stops at the first item that is already dirty.
+        The item is also marked to be refitted in the spatial index of its model on its next change notification.
+        """
+        self._indexdirty = True
+        item = self
+        while isinstance(item, AbstractSceneGraphItem) and not item._boundsdirty:
+            item._boundsdirty = True
+            item = item.parent()
+
+    def _generateWorldBounds(self):
+        """
+        Generates the world bounds of the item and all its descendants.
+
+        An item without a transformation has its local space in world space.
+
+        @returns A BoundingBox; None if the item or one of its descendants is not bounded.
+        """
+        return self._unionChildBounds(self.localBounds())
+
+    def worldBounds(self):
+        """
+        Returns the cached bounding box of the item and all its descendants, in world space.
+
+        Only the dirty items (i.e. the items whose geometry, transformation or children changed, and their ancestors) are recalculated,
+        in post-order, so the children are up-to-date when their parent is generated.
+
+        @returns A BoundingBox; None if the item or one of its descendants is not bounded.
+        """
+        if self._boundsdirty:
+            for event, item in self.walk(lambda item: item._boundsdirty):
+                if event == TraversalEvent.EXIT:
+                    item._worldbounds = item._generateWorldBounds()
+                    item._boundsdirty = False
+        return self._worldbounds
+
+    def _unionChildBounds(self, bounds):
+        """
+        Internal method to extend a world space bounding box with the world bounds of the children.
+
+        @param bounds The BoundingBox of the item; None if the item is not bounded.
+        @returns      A BoundingBox; None if the item or one of its descendants is not bounded.
+        """
         for child in self._children:
-            result += child.filter(condition)
-        return result
+            if bounds is None:
+                break
+            childBounds = child.worldBounds()
+            bounds = bounds.union(childBounds) if childBounds is not None else None
+        return bounds
 
 class SceneGraphNode(AbstractSceneGraphItem):
     """
@@ -164,12 +338,22 @@ class SceneGraphRoot(AbstractSceneGraphItem):
         """
         self._camera = value
 
+    def localBounds(self):
+        """
+        Overrides the AbstractSceneGraphItem's localBounds method; the root has no geometry.
+
+        @returns An empty BoundingBox.
+        """
+        return BoundingBox()
+
 class AbstractSceneGraphModel(AbstractDataTreeModel):
     """
     The Scene Model represents a complete scene hierarchy.
     """
     SceneGraphItemType = []
 
+    itemDetached = QtCore.Signal(object)
+
     def __init__(self, parent):
         """
         Constructor.
@@ -178,6 +362,85 @@ class AbstractSceneGraphModel(AbstractDataTreeModel):
         @param parent     The initial parent AbstractDataTreeItem of this AbstractDataTreeItem
         """
         super(AbstractSceneGraphModel, self).__init__(AbstractSceneGraphItem.Fields.headerdata(), parent)
+        # The spatial module depends on the node modules, which depend on this one.
+        from kousen.scenegraph.spatial import SpatialIndex
+        self._spatialIndex = SpatialIndex()
+
+    def _itemDetached(self, item):
+        """
+        Internal method to emit the itemDetached signal.
+
+        @param item The item that has been detached from the model.
+        """
+        self.itemDetached.emit(item)
+
+    def _itemRemovePosition(self, parent, position):
+        """
+        Overrides the AbstractDataTreeModel's _itemRemovePosition method to notify listeners of the detached item.
+
+        @param parent    The parent item that contains the item in its internal collection.
+        @param position  The position to remove from the parent's internal collection.
+        """
+        item = super(AbstractSceneGraphModel, self)._itemRemovePosition(parent, position)
+        if item:
+            self._spatialIndex.remove(item)
+            self._itemDetached(item)
+        return item
+
+    def _itemInsert(self, parent, item):
+        """
+        Overrides the AbstractDataTreeModel's _itemInsert method to index the inserted item.
+
+        @param parent The parent that will contain the item.
+        @param item   The item to append to end of the parent's internal collection
+        """
+        super(AbstractSceneGraphModel, self)._itemInsert(parent, item)
+        self._spatialIndex.insert(item)
+        item._indexdirty = False
+
+    def _itemInsertPosition(self, parent, item, position):
+        """
+        Overrides the AbstractDataTreeModel's _itemInsertPosition method to index the inserted item.
+
+        @param parent    The parent item that will contain the new item in its internal collection.
+        @param item      The item to insert into the parent's internal collection.
+        @param position  The position where the insertion operation will take place in the parent's internal collection
+        """
+        super(AbstractSceneGraphModel, self)._itemInsertPosition(parent, item, position)
+        self._spatialIndex.insert(item)
+        item._indexdirty = False
+
+    def _itemRemove(self, parent, item):
+        """
+        Overrides the AbstractDataTreeModel's _itemRemove method to remove the item from the index.
+
+        @param parent    The parent item that contains the item in its internal collection.
+        @param item      The item to remove from the parent's internal collection.
+        """
+        super(AbstractSceneGraphModel, self)._itemRemove(parent, item)
+        self._spatialIndex.remove(item)
+
+    def _itemChanged(self, id, role):
+        """
+        Overrides the AbstractDataTreeModel's _itemChanged handler to refit the changed item in the index.
+
+        Only the changes of the bounds (e.g. a transformation or a dimension change) refit the item; the changes of its
+        appearance (e.g. its color or its hover highlight) leave the index untouched.
+        """
+        item = self.sender()
+        if getattr(item, '_indexdirty', True):
+            item._indexdirty = False
+            self._spatialIndex.invalidate(item)
+        super(AbstractSceneGraphModel, self)._itemChanged(id, role)
+
+    @property
+    def spatialIndex(self):
+        """
+        Convenience property to access the Scene Graph Model's SpatialIndex of its ObjectNodes.
+
+        @returns A SpatialIndex instance.
+        """
+        return self._spatialIndex
 
     @property
     def activeCamera(self):
@@ -224,6 +487,24 @@ class AbstractSceneGraphModel(AbstractDataTreeModel):
         """
         return self._root.filter(condition)
 
+    def walk(self, traversable=None):
+        """
+        Walks the scene graph depth first (see AbstractSceneGraphItem.walk).
+
+        @param traversable A callable evaluating if an item (and its subtree) is walked; None to walk every item.
+        @returns           A generator of (TraversalEvent, AbstractSceneGraphItem) tuples.
+        """
+        return self._root.walk(traversable)
+
+    def iter_filter(self, condition):
+        """
+        Generates the items of the scene graph, in pre-order, based on a boolean expression evaluation.
+
+        @param   condition A lambda expression used to evaluate each item.
+        @returns           A generator of AbstractSceneGraphItem that succesfully evaluate the condition.
+        """
+        return self._root.iter_filter(condition)
+
 class AbstractSceneGraphVisitor(object):
     """
     SceneGraphVisitor provides an interface to a Scene Graph Traversal object.
@@ -267,25 +548,23 @@ class AbstractSceneGraphVisitor(object):
 
     def _traverse(self, node):
         """
-        The internal node traversal operation.
+        The internal node traversal operation; the walk is iterative, so the depth of the scene graph is not limited.
 
         @param node The current node in the traversal
         """
-        if not self._istraversable(node):
-            return
-
-        self._enter(node)
-        for next in self._next(node):
-            self._traverse(next)
-        self._exit(node)
+        for event, current in walk(node, self._next, self._istraversable):
+            if event == TraversalEvent.ENTER:
+                self._enter(current)
+            else:
+                self._exit(current)
 
     def traverse(self, model):
         """
         Traverses the model.
 
-        @param model An instance of AbstractSceneGraphModel.
+        @param model An instance of AbstractSceneGraphModel; or an AbstractSceneGraphItem to traverse its subtree.
         """
-        root = model.root()
+        root = model.root() if isinstance(model, AbstractSceneGraphModel) else model
         self._traverse(root)
 
 class SceneGraphType(AbstractDataTreeItem):
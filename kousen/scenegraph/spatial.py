@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+"""
+This module provides the spatial index of a scene graph.
+
+The SpatialIndex maintains a BoundingVolumeHierarchy of the world bounds of the ObjectNodes of a scene graph; the
+AbstractSceneGraphModel inserts and removes the nodes as the items are inserted into and removed from the model (e.g.
+by the InsertItemCommand and RemoveItemCommand) and invalidates the nodes whose data changed.  The invalidated nodes
+are refitted on the next query.
+"""
+import bisect
+from kousen.math import Point3D, Vector3D, BoundingVolumeHierarchy
+from kousen.scenegraph.object import ObjectNode
+
+class SpatialIndex(object):
+    """
+    SpatialIndex provides the box, sphere, ray, frustum and nearest neighbour queries of the ObjectNodes of a scene graph.
+    """
+    def __init__(self, margin=0.1):
+        """
+        Constructor.
+
+        @param margin The enlargement of the indexed node bounds; a node moving within its enlarged bounds does not change the hierarchy.
+        """
+        self._hierarchy = BoundingVolumeHierarchy(margin)
+        self._pending = set()
+
+    def __len__(self):
+        """
+        The len operator.
+
+        @returns The number of indexed nodes.
+        """
+        self.refit()
+        return len(self._hierarchy)
+
+    def __contains__(self, node):
+        """
+        The in operator.
+
+        @param node An AbstractSceneGraphItem.
+        @returns    True if the node is indexed; False otherwise.
+        """
+        self.refit()
+        return node in self._hierarchy
+
+    def _isWorldSpace(self, item):
+        """
+        Internal method to query if an item is drawn in world space (i.e. it has no unbounded ancestor, such as a HUD).
+
+        @param item An AbstractSceneGraphItem.
+        @returns    True if all ancestors are bounded; False otherwise.
+        """
+        parent = item.parent()
+        while parent is not None and hasattr(parent, 'localBounds'):
+            if parent.localBounds() is None:
+                return False
+            parent = parent.parent()
+        return True
+
+    def _walk(self, item):
+        """
+        Internal method to generate the world bounds of the ObjectNodes of a subtree.
+
+        The subtrees of unbounded nodes are not in world space and are not traversed.
+
+        @param item The AbstractSceneGraphItem at the root of the subtree.
+        @returns    A generator of (node, bounds) tuples; bounds is None if the node is not to be indexed.
+        """
+        stack = [item]
+        while stack:
+            node = stack.pop()
+            bounds = node.localBounds()
+            if bounds is None:
+                continue
+            if isinstance(node, ObjectNode) and not bounds.isEmpty():
+                yield node, bounds.transform(node.worldMatrix())
+            else:
+                yield node, None
+            stack.extend(node.children())
+
+    def insert(self, item):
+        """
+        Inserts the ObjectNodes of a subtree.
+
+        @param item The AbstractSceneGraphItem at the root of the subtree.
+        """
+        if not self._isWorldSpace(item):
+            return
+        for node, bounds in self._walk(item):
+            if bounds is not None:
+                self._hierarchy.insert(node, bounds)
+
+    def remove(self, item):
+        """
+        Removes the ObjectNodes of a subtree.
+
+        @param item The AbstractSceneGraphItem at the root of the subtree.
+        """
+        stack = [item]
+        while stack:
+            node = stack.pop()
+            self._hierarchy.remove(node)
+            self._pending.discard(node)
+            stack.extend(node.children())
+
+    def invalidate(self, item):
+        """
+        Marks the ObjectNodes of a subtree to be refitted (e.g. after a transformation or a dimension change).
+
+        @param item The AbstractSceneGraphItem at the root of the subtree.
+        """
+        self._pending.add(item)
+
+    def refit(self):
+        """
+        Refits the invalidated subtrees; the queries refit implicitly.
+        """
+        while self._pending:
+            item = self._pending.pop()
+            if not self._isWorldSpace(item):
+                continue
+            for node, bounds in self._walk(item):
+                if bounds is not None:
+                    self._hierarchy.insert(node, bounds)
+                else:
+                    self._hierarchy.remove(node)
+
+    def rebuild(self, root):
+        """
+        Rebuilds the index of a scene graph from scratch, with an optimal hierarchy.
+
+        @param root The root AbstractSceneGraphItem of the scene graph.
+        """
+        self._hierarchy.clear()
+        self._pending.clear()
+        self.insert(root)
+        self._hierarchy.rebuild()
+
+    def queryBox(self, bounds):
+        """
+        Finds the nodes whose world bounds overlap a box.
+
+        @param bounds A world space BoundingBox.
+        @returns      A list of ObjectNodes.
+        """
+        self.refit()
+        return self._hierarchy.queryBox(bounds)
+
+    def querySphere(self, center, radius):
+        """
+        Finds the nodes whose world bounds overlap a sphere.
+
+        @param center The world space center of the sphere.
+        @param radius The radius of the sphere.
+        @returns      A list of ObjectNodes.
+        """
+        self.refit()
+        return self._hierarchy.querySphere(center, radius)
+
+    def queryRay(self, origin, direction, maxDistance=float('inf')):
+        """
+        Finds the nodes whose world bounds are hit by a ray.
+
+        @param origin      The world space origin of the ray.
+        @param direction   The world space direction of the ray.
+        @param maxDistance The maximum distance along the ray (in multiples of the direction length).
+        @returns           A list of (distance, ObjectNode) tuples sorted by the distance at which the ray enters the bounds.
+        """
+        self.refit()
+        return self._hierarchy.queryRay(origin, direction, maxDistance)
+
+    def raycast(self, origin, direction, maxDistance=float('inf'), count=None):
+        """
+        Finds the nodes hit by a ray: the hierarchy provides the candidates in the order the ray enters their bounds,
+        then the exact geometry of each candidate is tested (see ObjectNode.intersectRay) in its local space.
+
+        @param origin      The world space origin of the ray.
+        @param direction   The world space direction of the ray.
+        @param maxDistance The maximum distance along the ray (in multiples of the direction length).
+        @param count       The maximum number of hits (e.g. 1 for the nearest node); None for all hits.
+        @returns           A list of (distance, ObjectNode) tuples sorted by distance.
+        """
+        origin = Point3D(origin[0], origin[1], origin[2])
+        direction = Vector3D(direction[0], direction[1], direction[2])
+        hits = []
+        for entry, node in self.queryRay(origin, direction, maxDistance):
+            # The candidates are sorted by entry distance, which bounds the distance of their exact hits.
+            if count is not None and len(hits) >= count and entry > hits[count - 1][0]:
+                break
+            try:
+                inverse = node.worldMatrix().inverse()
+            except ArithmeticError:
+                continue
+            t = node.intersectRay(inverse * origin, inverse * direction)
+            if t is not None and t <= maxDistance:
+                bisect.insort(hits, (t, id(node), node))
+        return [(t, node) for t, _, node in hits[:count]]
+
+    def queryFrustum(self, frustum):
+        """
+        Finds the nodes whose world bounds are inside or intersect a frustum.
+
+        @param frustum A world space Frustum.
+        @returns       A list of (ObjectNode, classification) tuples of Frustum.INSIDE or Frustum.INTERSECTING nodes.
+        """
+        self.refit()
+        return self._hierarchy.queryFrustum(frustum)
+
+    def nearest(self, point, count=1, maxDistance=float('inf')):
+        """
+        Finds the nodes whose world bounds are nearest to a point.
+
+        @param point       The world space point.
+        @param count       The maximum number of nodes.
+        @param maxDistance The maximum distance to the point.
+        @returns           A list of (distance, ObjectNode) tuples sorted by distance.
+        """
+        self.refit()
+        return self._hierarchy.nearest(point, count, maxDistance)
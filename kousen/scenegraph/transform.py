@@ -6,7 +6,7 @@ A Transformation node is a composite node of more transformation component.
 """
 import math
 from PySide import QtCore
-from kousen.math import Vector3D, Point3D, Matrix4x4
+from kousen.math import Vector3D, Point3D, Matrix4x4, Quaternion, Transaction, ObservableVector3D, ObservablePoint3D, BoundingBox
 from kousen.scenegraph import SceneGraphNode
 
 class TransformationComponent(QtCore.QObject):
@@ -16,11 +16,11 @@ class TransformationComponent(QtCore.QObject):
     dataChanging = QtCore.Signal()
     dataChanged  = QtCore.Signal()
 
-    def __init__(self, matrix=Matrix4x4.identity()):
+    def __init__(self, matrix=None):
         """
         Constructor.
 
-        @param m The initial transformation matrix value.
+        @param m The initial transformation matrix value; if None the matrix is generated on first request.
         """
         super(TransformationComponent, self).__init__()
         self.__matrix = matrix
@@ -32,7 +32,7 @@ class TransformationComponent(QtCore.QObject):
         if self.signalsBlocked():
             return
 
-        self.dataChanging.emit()
+        Transaction.changing(self, 'dataChanging')
 
     def _dataChanged(self):
         """
@@ -42,31 +42,33 @@ class TransformationComponent(QtCore.QObject):
             return
 
         self._updateMatrix()
-        self.dataChanged.emit()
+        Transaction.changed(self, 'dataChanged')
 
-    def _connect(self, dataObject):
+    def _connect(self, dataObject, handler=None):
         """
         Internal method to connect to dataObject.
 
         @param dataObject An instance of a DataObject.
+        @param handler    The dataChanged event handler; if None the _dataChanged method.
         """
         dataObject.dataChanging.connect(self._dataChanging)
-        dataObject.dataChanged.connect(self._dataChanged)
+        dataObject.dataChanged.connect(handler or self._dataChanged)
 
-    def _disconnect(self, dataObject):
+    def _disconnect(self, dataObject, handler=None):
         """
         Internal method to disconnect from a dataObject.
 
         @param dataObject An instance of a DataObject.
+        @param handler    The dataChanged event handler; if None the _dataChanged method.
         """
         dataObject.dataChanging.disconnect(self._dataChanging)
-        dataObject.dataChanged.disconnect(self._dataChanged)
+        dataObject.dataChanged.disconnect(handler or self._dataChanged)
 
     def _updateMatrix(self):
         """
-        Internal method to manually update the cached transformation matrix from internal data.
+        Internal method to invalidate the cached transformation matrix; the matrix is regenerated from internal data on the next request.
         """
-        self.__matrix = self._generateMatrix()
+        self.__matrix = None
 
     def _generateMatrix(self):
         """
@@ -82,6 +84,8 @@ class TransformationComponent(QtCore.QObject):
         
         @returns A Matrix4x4 representation of the transformation component.
         """
+        if self.__matrix is None:
+            self.__matrix = self._generateMatrix()
         return self.__matrix
 
 class TranslationComponent(TransformationComponent):
@@ -123,7 +127,7 @@ class TranslationComponent(TransformationComponent):
         """
         Convenience property to access the Translation Component direction vector.
 
-        @param value An instance of a Vector3D.
+        @param value An instance of a Vector3D; a plain value is observed through an ObservableVector3D duplicate.
         """
         if not isinstance(value, Vector3D):
             raise TypeError("direction must be a Vector3D")
@@ -131,13 +135,16 @@ class TranslationComponent(TransformationComponent):
         self._dataChanging()
         if self.__direction:
             self._disconnect(self.__direction)
-        self.__direction = value
+        self.__direction = ObservableVector3D.fromValue(value)
         self._connect(self.__direction)
         self._dataChanged()
 
 class RotationComponent(TransformationComponent):
     """
     RotationComponent provides a Rotation implementation of a TransformationComponent.
+
+    The rotation is stored as a Quaternion; the angle and axis are derived from it on request, so that composing
+    rotations through the quaternion property needs no Axis-Angle conversion.
     """
     def __init__(self, angle=0, axis=None, point=None):
         """
@@ -148,24 +155,76 @@ class RotationComponent(TransformationComponent):
         @param point   The initial rotation origin point.
         """
         super(RotationComponent, self).__init__()        
-        self.__angle = None        
+        self.__quaternion = Quaternion.identity()
         self.__axis = None        
+        self.__reference = Vector3D(0,0,0)
+        self.__pending = 0.0
         self.__point = None
         self.blockSignals(True)
-        self.angle = angle
         self.axis = axis or Vector3D(0,0,0)
+        self.angle = angle
         self.point = point or Point3D(0,0,0)
         self.blockSignals(False)
         self._updateMatrix()
 
+    def _axisAngle(self):
+        """
+        Internal method to derive the Axis-Angle representation of the quaternion.
+
+        The axis is oriented as the last axis assigned or derived (i.e. a negative angle keeps its axis); the axis of
+        the identity rotation is the last axis assigned, and its angle the angle assigned without an axis (if any).
+
+        @returns A tuple of the angle (radians) and the axis Vector3D.
+        """
+        radians, axis = self.__quaternion.toAxisAngle()
+        if not radians:
+            return self.__pending, self.__reference
+        if axis * self.__reference < 0.0:
+            radians, axis = -radians, -axis
+        self.__reference = axis
+        return radians, axis
+
+    def _axisChanged(self):
+        """
+        Internal axis changed event handler.
+        """
+        radians = self._axisAngle()[0]
+        self.__reference = Vector3D(self.__axis.x, self.__axis.y, self.__axis.z)
+        self.__quaternion = Quaternion.fromAxisAngle(radians, self.__reference)
+        self.__pending = radians if not self.__reference.length() else 0.0
+        self._dataChanged()
+
     def _generateMatrix(self):
         """
         Generates a transformation matrix from internal data.
 
         @returns A Matrix4x4 representation of the transformation component.
         """
-        radians = math.radians(self.angle)
-        return Matrix4x4.rotation(radians, self.__axis, self.__point)
+        return self.__quaternion.toMatrix(self.__point)
+
+    @property
+    def quaternion(self):
+        """
+        Convenience property to access the Rotation Component rotation.
+
+        @returns The unit Quaternion of the rotation.
+        """
+        return self.__quaternion
+
+    @quaternion.setter
+    def quaternion(self, value):
+        """
+        Convenience property to access the Rotation Component rotation.
+
+        @param value An instance of a unit Quaternion.
+        """
+        if not isinstance(value, Quaternion):
+            raise TypeError("quaternion must be a Quaternion")
+
+        self._dataChanging()
+        self.__quaternion = value
+        self.__pending = 0.0
+        self._dataChanged()
 
     @property
     def axis(self):
@@ -174,6 +233,11 @@ class RotationComponent(TransformationComponent):
 
         @returns An instance of a Vector3D if valid; None otherwise.
         """
+        if self.__axis is not None:
+            # Refresh the observed axis silently: it only reflects the quaternion.
+            axis = self._axisAngle()[1]
+            if axis != self.__axis:
+                self.__axis.data()[:] = [axis.x, axis.y, axis.z]
         return self.__axis
 
     @axis.setter
@@ -181,16 +245,20 @@ class RotationComponent(TransformationComponent):
         """
         Convenience property to access the Rotation Component axis vector.
 
-        @param value An instance of a Vector3D.
+        @param value An instance of a Vector3D; a plain value is observed through an ObservableVector3D duplicate.
         """
         if not isinstance(value, Vector3D):
             raise TypeError("point must be a Vector3D")
 
+        radians = self._axisAngle()[0]
         self._dataChanging()
         if self.__axis:
-            self._diconnect(self.__axis)
-        self.__axis = value
-        self._connect(self.__axis)
+            self._disconnect(self.__axis, self._axisChanged)
+        self.__axis = ObservableVector3D.fromValue(value)
+        self._connect(self.__axis, self._axisChanged)
+        self.__reference = Vector3D(value.x, value.y, value.z)
+        self.__quaternion = Quaternion.fromAxisAngle(radians, self.__reference)
+        self.__pending = radians if not self.__reference.length() else 0.0
         self._dataChanged()
 
     @property
@@ -200,7 +268,7 @@ class RotationComponent(TransformationComponent):
 
         @returns An rotation angle in degrees.
         """
-        return self.__angle
+        return math.degrees(self._axisAngle()[0])
 
     @angle.setter
     def angle(self, value):
@@ -212,8 +280,11 @@ class RotationComponent(TransformationComponent):
         if not isinstance(value, (int, float)):
             raise TypeError("angle must be a number")
 
+        radians, axis = math.radians(value), self._axisAngle()[1]
         self._dataChanging()
-        self.__angle = value
+        self.__quaternion = Quaternion.fromAxisAngle(radians, axis)
+        # Without an axis the rotation is the identity; the angle applies once an axis is assigned.
+        self.__pending = radians if not axis.length() else 0.0
         self._dataChanged()
 
     @property
@@ -230,7 +301,7 @@ class RotationComponent(TransformationComponent):
         """
         Convenience property to access the Rotation Component rotation point.
 
-        @param value An instance of a Point3D.
+        @param value An instance of a Point3D; a plain value is observed through an ObservablePoint3D duplicate.
         """
         if not isinstance(value, Point3D):
             raise TypeError("point must be a Point3D")
@@ -238,7 +309,7 @@ class RotationComponent(TransformationComponent):
         self._dataChanging()
         if self.__point:
             self._disconnect(self.__point)
-        self.__point = value
+        self.__point = ObservablePoint3D.fromValue(value)
         self._connect(self.__point)
         self._dataChanged()
 
@@ -309,7 +380,7 @@ class ScaleComponent(TransformationComponent):
         """
         Convenience property to access the Scale Component scale point.
 
-        @param value An instance of a Point3D.
+        @param value An instance of a Point3D; a plain value is observed through an ObservablePoint3D duplicate.
         """
         if not isinstance(value, Point3D):
             raise TypeError("point must be a Point3D")
@@ -317,14 +388,18 @@ class ScaleComponent(TransformationComponent):
         self._dataChanging()
         if self.__point:
             self._disconnect(self.__point)
-        self.__point = value
+        self.__point = ObservablePoint3D.fromValue(value)
         self._connect(self.__point)
         self._dataChanged()
 
 class AffineTransformation(TransformationComponent):
     """
     AffineTransformation provides an Affine Transforamtion (composite of Translation, Roation, Scale) implementation of a TransformationComponent.
+
+    The composite matrix is recalculated lazily: the product of the rotation and scale components is cached separately so that a translation change only patches the translation entries of the composite matrix.
     """
+    # The dirty states of the cached matrices.
+    CLEAN, TRANSLATION, LINEAR = 0, 1, 2
 
     def __init__(self, translation=None, rotation=None, scale=None):
         """
@@ -338,6 +413,9 @@ class AffineTransformation(TransformationComponent):
         self.__translation = None
         self.__rotation = None
         self.__scale = None
+        self.__linear = None
+        self.__matrix = None
+        self.__dirty = self.LINEAR
         self.blockSignals(True)
         self.translation = translation or TranslationComponent()
         self.rotation = rotation or RotationComponent()        
@@ -345,16 +423,80 @@ class AffineTransformation(TransformationComponent):
         self.blockSignals(False)
         self._updateMatrix()
 
+    def _translationChanged(self):
+        """
+        Internal translation component changed event handler.
+        """
+        if self.signalsBlocked():
+            return
+
+        self.__dirty |= self.TRANSLATION
+        Transaction.changed(self, 'dataChanged')
+
+    def _linearChanged(self):
+        """
+        Internal rotation and scale components changed event handler.
+        """
+        if self.signalsBlocked():
+            return
+
+        self.__dirty |= self.LINEAR
+        Transaction.changed(self, 'dataChanged')
+
+    def _connectComponent(self, component, handler):
+        """
+        Internal method to connect to a transformation component.
+
+        @param component An instance of a TransformationComponent.
+        @param handler   The dataChanged event handler of the component.
+        """
+        component.dataChanging.connect(self._dataChanging)
+        component.dataChanged.connect(handler)
+
+    def _disconnectComponent(self, component, handler):
+        """
+        Internal method to disconnect from a transformation component.
+
+        @param component An instance of a TransformationComponent.
+        @param handler   The dataChanged event handler of the component.
+        """
+        component.dataChanging.disconnect(self._dataChanging)
+        component.dataChanged.disconnect(handler)
+
+    def _updateMatrix(self):
+        """
+        Internal method to invalidate all cached matrices.
+        """
+        self.__dirty |= self.LINEAR
+
     def _generateMatrix(self):
         """
         Generates a transformation matrix from internal data.
 
         @returns A Matrix4x4 representation of the transformation component.
         """
-        t = self.__translation.matrix() if self.__translation else Matrix4x4.identity()
-        r = self.__rotation.matrix() if self.__rotation else Matrix4x4.identity()
-        s = self.__scale.matrix() if self.__scale else Matrix4x4.identity()
-        return t * r * s
+        return self.__translation.matrix() * self.__rotation.matrix() * self.__scale.matrix()
+
+    def matrix(self):
+        """
+        Returns the composite transformation matrix, recalculating only the parts invalidated since the last request.
+
+        A returned matrix is never modified afterwards: a change creates a new matrix, so the callers may keep it (e.g. in a cache).
+
+        @returns A Matrix4x4 representation of the transformation component.
+        """
+        if self.__dirty & self.LINEAR:
+            self.__linear = self.__rotation.matrix() * self.__scale.matrix()
+        if self.__dirty:
+            # The translation only offsets the last column of the rotation-scale product.
+            direction = self.__translation.direction
+            matrix = self.__linear.duplicate()
+            matrix[12] = self.__linear[12] + direction.x
+            matrix[13] = self.__linear[13] + direction.y
+            matrix[14] = self.__linear[14] + direction.z
+            self.__matrix = matrix
+        self.__dirty = self.CLEAN
+        return self.__matrix
 
     @property
     def translation(self):
@@ -377,9 +519,9 @@ class AffineTransformation(TransformationComponent):
 
         self._dataChanging()
         if self.__translation:
-            self._disconnect(self.__translation)
+            self._disconnectComponent(self.__translation, self._translationChanged)
         self.__translation = value
-        self._connect(self.__translation)
+        self._connectComponent(self.__translation, self._translationChanged)
         self._dataChanged()
 
     @property
@@ -403,9 +545,9 @@ class AffineTransformation(TransformationComponent):
 
         self._dataChanging()
         if self.__rotation:
-            self._disconnect(self.__rotation)
+            self._disconnectComponent(self.__rotation, self._linearChanged)
         self.__rotation = value
-        self._connect(self.__rotation)
+        self._connectComponent(self.__rotation, self._linearChanged)
         self._dataChanged()
 
     @property
@@ -429,9 +571,9 @@ class AffineTransformation(TransformationComponent):
 
         self._dataChanging()
         if self.__scale:
-            self._disconnect(self.__scale)
+            self._disconnectComponent(self.__scale, self._linearChanged)
         self.__scale = value
-        self._connect(self.__scale)
+        self._connectComponent(self.__scale, self._linearChanged)
         self._dataChanged()
 
 class TransformationNode(SceneGraphNode):
@@ -450,9 +592,65 @@ class TransformationNode(SceneGraphNode):
         @param parent  The initial AbstractDataTreeItem-derived parent.
         """
         super(TransformationNode, self).__init__(name, parent)
+        self.__worldmatrix = None
+        self.__worlddirty = True
         self.__transformation = AffineTransformation()
-        self.__transformation.dataChanging.connect(lambda: self._dataChanging(self.Fields.NAME, QtCore.Qt.DisplayRole))
-        self.__transformation.dataChanged.connect(lambda: self._dataChanged(self.Fields.NAME, QtCore.Qt.DisplayRole))
+        self.__transformation.dataChanging.connect(self._transformationChanging)
+        self.__transformation.dataChanged.connect(self._transformationChanged)
+
+    def _transformationChanging(self):
+        """
+        Internal transformation changing event handler.
+        """
+        Transaction.changing(self, 'dataChanging', self.Fields.NAME, QtCore.Qt.DisplayRole)
+
+    def _transformationChanged(self):
+        """
+        Internal transformation changed event handler.
+        """
+        self._invalidateWorldMatrix()
+        Transaction.changed(self, 'dataChanged', self.Fields.NAME, QtCore.Qt.DisplayRole)
+
+    def _parentTransformation(self):
+        """
+        Finds the closest TransformationNode ancestor of this node.
+
+        @returns A TransformationNode if valid; None otherwise.
+        """
+        parent = self.parent()
+        while parent is not None and not isinstance(parent, TransformationNode):
+            parent = parent.parent()
+        return parent
+
+    def _invalidateWorldMatrix(self, force=False):
+        """
+        Internal method to mark the cached world matrix of this node and its descendants as dirty.
+
+        The descendants of a dirty node are always dirty, so a subtree that is already dirty is not traversed again.
+
+        @param force True to traverse the subtree even if this node is already dirty (e.g. after reparenting).
+        """
+        # The world bounds of the ancestors depend on the subtree; those of the subtree on the world matrices.
+        self._updateBounds()
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, TransformationNode):
+                if node.__worlddirty and not (force and node is self):
+                    continue
+                node.__worlddirty = True
+            if isinstance(node, SceneGraphNode):
+                node._boundsdirty = True
+            stack.extend(node.children())
+
+    def setParent(self, parent):
+        """
+        Overrides the QtCore.QObject's setParent method to invalidate the world matrix of the reparented subtree.
+
+        @param parent The new parent QObject.
+        """
+        super(TransformationNode, self).setParent(parent)
+        self._invalidateWorldMatrix(True)
 
     @property
     def translation(self):
@@ -487,4 +685,46 @@ class TransformationNode(SceneGraphNode):
         
         @returns A Matrix4x4 representation of the transformation component.
         """
-        return self.__transformation.matrix()
\ No newline at end of file
+        return self.__transformation.matrix()
+
+    def worldMatrix(self):
+        """
+        Returns the cached world transformation matrix (i.e. the product of the transformation matrices of all TransformationNode ancestors and this node).
+
+        Only the dirty part of the hierarchy, between this node and its closest up-to-date ancestor, is recalculated.
+
+        @returns A Matrix4x4 representation of the world transformation.
+        """
+        if self.__worlddirty:
+            # Collect the dirty ancestors, from this node up to the first up-to-date one.
+            chain = []
+            node = self
+            while node is not None and node.__worlddirty:
+                chain.append(node)
+                node = node._parentTransformation()
+
+            matrix = node.__worldmatrix if node is not None else None
+            for node in reversed(chain):
+                matrix = node.matrix().duplicate() if matrix is None else matrix * node.matrix()
+                node.__worldmatrix = matrix
+                node.__worlddirty = False
+        return self.__worldmatrix
+
+    def localBounds(self):
+        """
+        Overrides the AbstractSceneGraphItem's localBounds method; a transformation has no geometry of its own.
+
+        @returns An empty BoundingBox.
+        """
+        return BoundingBox()
+
+    def _generateWorldBounds(self):
+        """
+        Overrides the AbstractSceneGraphItem's _generateWorldBounds method to apply the world transformation to the local bounds.
+
+        @returns A BoundingBox; None if the node or one of its descendants is not bounded.
+        """
+        bounds = self.localBounds()
+        if bounds is not None:
+            bounds = bounds.transform(self.worldMatrix())
+        return self._unionChildBounds(bounds)
@@ -9,6 +9,7 @@ from kousen.gl.glcamera import *
 from kousen.gl.glhud import *
 from kousen.gl.glprimitive import *
 from kousen.gl.glquadric import *
+from kousen.gl.glscatter import *
 from kousen.gl.gltransform import *
 
 __form_class__, __base_class__ = UiLoader.loadUiType(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'itemdialog.ui'))
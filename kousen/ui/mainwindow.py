@@ -61,6 +61,10 @@ class MainWindow(__form_class__, __base_class__):
         self.propertyEditor.model.setUndoModel(self._undoStack)
         self.propertyEditor.push(TreeColumnFilterProxyModel())
 
+        # OpenGL View
+        self.glwidget.nodePicked.connect(self._glwidgetNodePicked)
+        self.glwidget.nodesSelected.connect(self._glwidgetNodesSelected)
+
         # Actions
         self.actionNewScene.triggered.connect(self._sceneNew)
         self.actionInsertNode.triggered.connect(self._nodeInsert)
@@ -247,6 +251,26 @@ class MainWindow(__form_class__, __base_class__):
         sourceSelected = self.sceneExplorer.mapSelectionToSourceItem(selected)
         self.propertyEditor.source.insertProperties(sourceSelected)
 
+    def _glwidgetNodePicked(self, node):
+        """
+        Handles the Node Picked event from the OpenGL View.
+
+        @param node The picked node; None if the click missed every node (which clears the selection).
+        """
+        if self.sceneExplorer.source is None:
+            return
+        self.sceneExplorer.selectedItems = [node] if node is not None else []
+
+    def _glwidgetNodesSelected(self, nodes):
+        """
+        Handles the Nodes Selected event (i.e. a marquee selection) from the OpenGL View.
+
+        @param nodes The list of nodes in the marquee; the nodes replace the selection in a single selection change.
+        """
+        if self.sceneExplorer.source is None:
+            return
+        self.sceneExplorer.selectedItems = nodes
+
     def _propertyEditorContextMenuRequested(self, pos):
         """
         Handles the Custome Context Menu Requested event from the Property Editor.